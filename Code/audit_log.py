@@ -0,0 +1,308 @@
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# --- Configuration ---
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_MAX_QUEUE = 10000
+# SQLite "synchronous" level per durability mode: "off" leaves flushing to the
+# OS (fastest, may lose the last batches on power loss), "normal" survives a
+# process crash, "full" also survives power loss.
+DURABILITY_LEVELS = {"off": "OFF", "normal": "NORMAL", "full": "FULL"}
+SEGMENT_PATTERN = "audit-{:06d}.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    ts REAL NOT NULL,
+    source TEXT,
+    model_version TEXT,
+    latency_ms REAL,
+    predicted_disease TEXT,
+    confidence REAL,
+    symptoms TEXT,
+    top5 TEXT
+)
+"""
+COLUMNS = ("ts", "source", "model_version", "latency_ms", "predicted_disease", "confidence", "symptoms", "top5")
+
+
+def _segments(directory):
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN.replace("{:06d}", "[0-9]" * 6))))
+
+
+# --- Writer ---
+class AuditLog:
+    """
+    Append-only record of every prediction, written off the request path.
+
+    ``record`` only puts a tuple on a bounded in-memory queue. A background
+    thread drains the queue and inserts whatever has accumulated (up to
+    ``batch_size`` rows) in one transaction, so the per-prediction cost is a
+    queue put and disk syncs are amortized over a batch. Rows go to numbered
+    SQLite segment files; once the current segment reaches ``max_bytes`` the
+    writer starts the next one.
+
+    Args:
+        directory: Where the segment files are kept.
+        max_bytes: Size at which the writer rotates to a new segment.
+        durability: "off", "normal" or "full" (see DURABILITY_LEVELS).
+        batch_size: Maximum rows per transaction.
+        flush_interval: Maximum seconds a recorded row waits before being written.
+        max_queue: Capacity of the in-memory queue.
+        block_when_full: When the queue is full, wait for the writer (so no record
+            is lost) instead of dropping the record and counting it.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, durability="normal",
+                 batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_queue=DEFAULT_MAX_QUEUE, block_when_full=True):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability mode '{durability}'; use one of {sorted(DURABILITY_LEVELS)}.")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.durability = durability
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_when_full = block_when_full
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+
+        os.makedirs(directory, exist_ok=True)
+        existing = _segments(directory)
+        self._conn = None
+        self._open_segment(int(os.path.basename(existing[-1])[6:12]) if existing else 1)
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._work, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def _open_segment(self, segment):
+        path = os.path.join(self.directory, SEGMENT_PATTERN.format(segment))
+        # The connection is created here and then used only by the writer thread
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={DURABILITY_LEVELS[self.durability]}")
+            conn.execute(SCHEMA)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self._conn, self._segment, self.path = conn, segment, path
+
+    def _discard_connection(self):
+        """Drops a connection that failed; the next batch reopens the current segment."""
+        if self._conn is None:
+            return
+        try:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+        self._conn = None
+
+    def _segment_bytes(self):
+        pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        return pages * self._conn.execute("PRAGMA page_size").fetchone()[0]
+
+    def _rotate(self):
+        # If the next segment cannot be opened the current one is reopened by
+        # the next batch, and rotation is tried again once that batch is written
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
+        self._conn = None
+        self._open_segment(self._segment + 1)
+
+    def record(self, symptoms, top5, model_version, latency_ms, source=None, ts=None):
+        """
+        Queues one prediction for the log.
+
+        Args:
+            symptoms: The input symptom names.
+            top5: List of (disease, confidence_percentage), best first.
+            model_version: Version of the model that made the prediction.
+            latency_ms: How long the prediction took.
+            source: Optional origin label, e.g. "server" or "gui".
+            ts: Unix timestamp (default: now).
+
+        Returns:
+            True if the record was queued, False if it was dropped (the queue
+            was full, or the log is closed).
+        """
+        if self._stop.is_set():
+            with self._lock:
+                self.dropped += 1
+            return False
+        top5 = [(str(d), float(c)) for d, c in top5]
+        row = (ts or time.time(), source, None if model_version is None else str(model_version),
+               float(latency_ms), top5[0][0] if top5 else None, top5[0][1] if top5 else None,
+               json.dumps(list(symptoms)), json.dumps(top5))
+        try:
+            if self.block_when_full:
+                self._queue.put(row)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _work(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            if self._conn is None:
+                self._open_segment(self._segment)
+            self._conn.execute("BEGIN")
+            self._conn.executemany(f"INSERT INTO predictions VALUES ({', '.join('?' * len(COLUMNS))})", batch)
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"Error writing audit log batch: {e}")
+            self._discard_connection()
+            with self._lock:
+                self.errors += 1
+                self.dropped += len(batch)
+            return
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+
+        try:
+            if self._segment_bytes() >= self.max_bytes:
+                self._rotate()
+        except sqlite3.Error as e:
+            print(f"Error rotating audit log segment: {e}")
+            self._discard_connection()
+            with self._lock:
+                self.errors += 1
+
+    def stats(self):
+        """Returns written/dropped/batch counters, queue depth and the current segment."""
+        with self._lock:
+            return {"written": self.written, "dropped": self.dropped, "batches": self.batches,
+                    "errors": self.errors, "queue_depth": self._queue.qsize(),
+                    "segment": os.path.basename(self.path), "durability": self.durability}
+
+    def close(self):
+        """
+        Writes everything still queued, then closes the current segment.
+
+        Records made after ``close`` are dropped and counted in ``dropped``.
+        """
+        self._stop.set()
+        self._thread.join()
+        # Rows queued by a ``record`` that raced with close
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self.dropped += 1
+        self._discard_connection()
+
+
+# --- Reader ---
+def _select(since=None, until=None, model_version=None):
+    where, params = [], []
+    if since is not None:
+        where.append("ts >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("ts < ?")
+        params.append(until)
+    if model_version is not None:
+        where.append("model_version = ?")
+        params.append(str(model_version))
+    sql = f"SELECT {', '.join(COLUMNS)} FROM predictions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY rowid", params
+
+
+def iter_records(directory, since=None, until=None, model_version=None, chunksize=10000):
+    """
+    Streams logged predictions from all segments in write order.
+
+    Segments are opened read-only, so this can run while the writer is
+    active. Rows are fetched ``chunksize`` at a time and yielded as dicts.
+
+    Args:
+        directory: The audit log directory.
+        since: Only rows with ts >= since (Unix time).
+        until: Only rows with ts < until.
+        model_version: Only rows of this model version.
+    """
+    sql, params = _select(since, until, model_version)
+    for path in _segments(directory):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                for row in rows:
+                    record = dict(zip(COLUMNS, row))
+                    record["symptoms"] = json.loads(record["symptoms"])
+                    record["top5"] = json.loads(record["top5"])
+                    yield record
+        finally:
+            conn.close()
+
+
+def load_dataframe(directory, since=None, until=None, model_version=None):
+    """
+    Loads logged predictions into a pandas DataFrame for offline analysis.
+
+    The JSON columns (symptoms, top5) are left as text; parse them only
+    where needed, which keeps loading large logs fast.
+    """
+    import pandas as pd
+
+    sql, params = _select(since, until, model_version)
+    frames = []
+    for path in _segments(directory):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            frames.append(pd.read_sql_query(sql, conn, params=params))
+        finally:
+            conn.close()
+    if not frames:
+        return pd.DataFrame(columns=list(COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+def audit_log_from_env(default_directory):
+    """
+    Creates the AuditLog configured by AUDIT_LOG_DIR, AUDIT_LOG_MAX_MB and
+    AUDIT_LOG_DURABILITY; AUDIT_LOG_DIR="" disables logging (returns None).
+    """
+    directory = os.environ.get("AUDIT_LOG_DIR", default_directory)
+    if not directory:
+        return None
+    return AuditLog(directory,
+                    max_bytes=int(float(os.environ.get("AUDIT_LOG_MAX_MB", DEFAULT_MAX_BYTES / 2 ** 20)) * 2 ** 20),
+                    durability=os.environ.get("AUDIT_LOG_DURABILITY", "normal"))
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+
+# --- Recipe ---
+class AugmentationRecipe:
+    """
+    How many variants to derive from each base profile and how to perturb them.
+
+    Args:
+        variants_per_profile: Perturbed copies generated per base profile.
+        dropout_rate: Probability of removing each present symptom.
+        add_rate: Expected number of symptoms added per variant, drawn from the
+            symptoms seen with the same disease in other profiles.
+        keep_original: Also emit every base profile unchanged.
+    """
+
+    def __init__(self, variants_per_profile=10, dropout_rate=0.2, add_rate=1.0, keep_original=True):
+        self.variants_per_profile = int(variants_per_profile)
+        self.dropout_rate = float(dropout_rate)
+        self.add_rate = float(add_rate)
+        self.keep_original = bool(keep_original)
+
+    def to_dict(self):
+        return {"variants_per_profile": self.variants_per_profile, "dropout_rate": self.dropout_rate,
+                "add_rate": self.add_rate, "keep_original": self.keep_original}
+
+    def rows_per_profile(self):
+        return self.variants_per_profile + int(self.keep_original)
+
+
+# --- Base Profiles ---
+def load_base_profiles(data_path, chunksize=20000):
+    """
+    Reads the distinct (disease, symptom set) rows of a dataset CSV.
+
+    Rows are deduplicated chunk by chunk on their bit-packed symptom vector,
+    so a large or already augmented file reduces to its base profiles without
+    being loaded whole.
+
+    Returns:
+        A tuple (profiles, labels, classes, symptom_names) where profiles is a
+        uint8 (n_profiles, n_symptoms) matrix and labels index into classes.
+    """
+    header = pd.read_csv(data_path, nrows=0).columns.tolist()
+    symptom_names = [c for c in header if c != "diseases"]
+    dtypes = dict.fromkeys(symptom_names, np.uint8)
+
+    seen = {}
+    for chunk in pd.read_csv(data_path, dtype=dtypes, chunksize=chunksize):
+        packed = np.packbits(chunk[symptom_names].to_numpy() > 0, axis=1)
+        for disease, bits in zip(chunk["diseases"].astype(str), packed):
+            seen.setdefault((disease, bits.tobytes()), None)
+
+    classes = np.array(sorted({disease for disease, _ in seen}), dtype=object)
+    class_index = {name: i for i, name in enumerate(classes)}
+    labels = np.fromiter((class_index[disease] for disease, _ in seen), dtype=np.int64, count=len(seen))
+    packed = np.frombuffer(b"".join(bits for _, bits in seen), dtype=np.uint8).reshape(len(seen), -1)
+    profiles = np.unpackbits(packed, axis=1, count=len(symptom_names))
+    return profiles, labels, classes, symptom_names
+
+
+def split_profiles(labels, test_size=0.2, seed=42):
+    """
+    Splits base profiles into train and test profiles, stratified by disease.
+
+    Splitting the profiles before augmenting keeps every variant of a test
+    profile out of training. Diseases with a single profile stay in training.
+
+    Returns:
+        A tuple (train_idx, test_idx) of sorted profile indices.
+    """
+    from sklearn.model_selection import train_test_split
+
+    labels = np.asarray(labels)
+    counts = np.bincount(labels)
+    shared = np.flatnonzero(counts[labels] >= 2)
+    n_test = int(round(test_size * len(shared)))
+    if n_test < len(np.unique(labels[shared])):
+        # Too few profiles to give every disease a test profile; fall back to a plain random split
+        train_idx, test_idx = train_test_split(shared, test_size=test_size, random_state=seed)
+    else:
+        train_idx, test_idx = train_test_split(shared, test_size=n_test, random_state=seed, stratify=labels[shared])
+    train_idx = np.concatenate([train_idx, np.flatnonzero(counts[labels] < 2)])
+    return np.sort(train_idx), np.sort(test_idx)
+
+
+def class_symptom_frequencies(profiles, labels, n_classes):
+    """Returns the (n_classes, n_symptoms) share of each disease's profiles that list each symptom."""
+    sums = np.zeros((n_classes, profiles.shape[1]), dtype=np.float64)
+    np.add.at(sums, labels, profiles)
+    counts = np.bincount(labels, minlength=n_classes).astype(np.float64)
+    return (sums / np.maximum(counts, 1)[:, None]).astype(np.float32)
+
+
+# --- Generator ---
+def augment_batches(profiles, labels, recipe, batch_size=4096, seed=42, n_classes=None):
+    """
+    Yields augmented training rows in compact uint8 batches.
+
+    Each batch repeats a slice of base profiles and perturbs all of it with
+    array operations: present symptoms are dropped with ``dropout_rate``, and
+    absent ones are added with a probability proportional to how often the
+    disease shows them elsewhere, normalized over each row's absent symptoms
+    so about ``add_rate`` are added per row. A variant whose symptoms were
+    all dropped keeps one of its original symptoms. Output is deterministic
+    for a given seed and batch size.
+
+    Args:
+        profiles: uint8 (n_profiles, n_symptoms) base profiles.
+        labels: Disease index of every profile.
+        recipe: An AugmentationRecipe.
+        batch_size: Approximate number of rows per yielded batch.
+        seed: Seed of the random generator.
+        n_classes: Number of diseases (default: inferred from labels).
+
+    Yields:
+        Tuples (X, y) with X uint8 (rows, n_symptoms) and y int64 (rows,).
+    """
+    rng = np.random.default_rng(seed)
+    profiles = np.asarray(profiles, dtype=np.uint8)
+    labels = np.asarray(labels, dtype=np.int64)
+    n_classes = n_classes or int(labels.max()) + 1
+
+    freq = class_symptom_frequencies(profiles, labels, n_classes)
+
+    per_batch = max(1, batch_size // max(recipe.rows_per_profile(), 1))
+    for start in range(0, len(profiles), per_batch):
+        base = profiles[start:start + per_batch]
+        base_labels = labels[start:start + per_batch]
+        if recipe.variants_per_profile:
+            X = np.repeat(base, recipe.variants_per_profile, axis=0)
+            y = np.repeat(base_labels, recipe.variants_per_profile)
+            present = X.astype(bool)
+            # Addition probabilities over the absent symptoms only, so ~add_rate are added per row
+            add_prob = freq[y] * ~present
+            add_prob *= recipe.add_rate / np.maximum(add_prob.sum(axis=1, keepdims=True), 1e-9)
+            np.clip(add_prob, 0.0, 1.0, out=add_prob)
+            drop = present & (rng.random(X.shape, dtype=np.float32) < recipe.dropout_rate)
+            add = ~present & (rng.random(X.shape, dtype=np.float32) < add_prob)
+            X = ((present & ~drop) | add).astype(np.uint8)
+
+            # Restore one original symptom in rows that ended up empty
+            empty = np.flatnonzero(~X.any(axis=1) & present.any(axis=1))
+            if len(empty):
+                scores = rng.random((len(empty), X.shape[1]), dtype=np.float32) * present[empty]
+                X[empty, np.argmax(scores, axis=1)] = 1
+        else:
+            X = np.empty((0, profiles.shape[1]), dtype=np.uint8)
+            y = np.empty(0, dtype=np.int64)
+
+        if recipe.keep_original:
+            X = np.concatenate([base, X])
+            y = np.concatenate([base_labels, y])
+        yield X, y
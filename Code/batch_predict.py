@@ -0,0 +1,110 @@
+import argparse
+import csv
+import json
+import sys
+import time
+
+import pandas as pd
+
+from inference import DATA_PATH, MODEL_PATH, load_resources, predict_top_k, sparse_feature_rows
+from symptom_parser import SymptomMatcher
+
+
+# --- Input ---
+def iter_note_batches(path, text_column=None, batch_size=1024):
+    """
+    Yields lists of free-text notes from a text file (one note per line) or a CSV column.
+
+    Args:
+        path: Input file path, or "-" for stdin.
+        text_column: Name of the CSV column holding the notes; plain text when omitted.
+        batch_size: Number of notes per yielded batch.
+    """
+    if text_column:
+        for chunk in pd.read_csv(path, usecols=[text_column], chunksize=batch_size):
+            yield chunk[text_column].fillna("").astype(str).tolist()
+        return
+
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        batch = []
+        for line in handle:
+            batch.append(line.rstrip("\n"))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+# --- Batch Prediction ---
+def predict_notes(notes, matcher, model, label_encoder, k=5):
+    """
+    Parses a batch of notes and predicts the top-k diseases for each.
+
+    Returns:
+        A list of dicts with the extracted symptoms and predictions per note.
+    """
+    indptr, indices, negated = matcher.parse_many(notes)
+    rows = []
+    has_symptoms = indptr[1:] > indptr[:-1]
+    results = [None] * len(notes)
+    if has_symptoms.any():
+        X = sparse_feature_rows(indptr, indices, matcher.n_features)[has_symptoms]
+        predicted, _ = predict_top_k(model, label_encoder, X, k)
+        for r, top in zip(has_symptoms.nonzero()[0], predicted):
+            results[r] = top
+
+    for r in range(len(notes)):
+        top = results[r] or []
+        rows.append({
+            "symptoms": matcher.names(indices[indptr[r]:indptr[r + 1]]),
+            "negated": matcher.names(negated[r]),
+            "predicted_disease": top[0][0] if top else "",
+            "confidence": round(top[0][1], 2) if top else "",
+            "top5": [[d, round(c, 2)] for d, c in top],
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict diseases for a batch of free-text symptom notes.")
+    parser.add_argument("input", help="Text file with one note per line, a CSV (with --text-column), or '-' for stdin.")
+    parser.add_argument("-o", "--output", default="-", help="Output CSV path (default: stdout).")
+    parser.add_argument("--text-column", help="CSV column containing the notes.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("-k", "--top-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    model, label_encoder, symptom_names = load_resources(args.model, args.data)
+    matcher = SymptomMatcher(symptom_names)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    writer = csv.writer(out)
+    writer.writerow(["note_id", "predicted_disease", "confidence", "symptoms", "negated", "top5"])
+
+    note_id = 0
+    start = time.perf_counter()
+    try:
+        for notes in iter_note_batches(args.input, args.text_column, args.batch_size):
+            for row in predict_notes(notes, matcher, model, label_encoder, args.top_k):
+                writer.writerow([note_id, row["predicted_disease"], row["confidence"],
+                                 "; ".join(row["symptoms"]), "; ".join(row["negated"]),
+                                 json.dumps(row["top5"])])
+                note_id += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Processed {note_id} notes in {elapsed:.2f}s ({note_id / max(elapsed, 1e-9):.0f} notes/s).",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,17 @@
 import tkinter as tk
 from tkinter import ttk
 import random
-import pandas as pd
-import joblib
 import numpy as np
+from daemon_client import DAEMON_ERRORS, connect_daemon
 import google.generativeai as genai
 import os
+# Same artifacts as server.py and inference_daemon.py (DISEASE_DATA_PATH / DISEASE_MODEL_PATH override them)
+from paths import DATA_PATH, MODEL_PATH
 # from google.colab import userdata
-from sklearn.preprocessing import LabelEncoder
 
 # --- Configuration ---
-DATA_PATH = "E:\Project\Dataset\Disease symptom Dataset\cleaned_diseases_and_symptoms.csv"  # Update path if needed
-MODEL_PATH = "E:\Project\Dataset\Disease symptom Dataset\Models\best_disease_model.joblib"    # Update path if needed
+# Diseases requested from the daemon per prediction
+TOP_K = 5
 # Ensure you have a GOOGLE_API_KEY set up in your environment variables
 # or replace userdata.get('GOOGLE_API_KEY') with your actual API key (not recommended for security)
 
@@ -20,18 +20,48 @@ model = None
 label_encoder = None
 symptom_names = []
 
-try:
-    model = joblib.load(MODEL_PATH)
-    df_full = pd.read_csv(DATA_PATH)
-    df_full.fillna(0, inplace=True)
-    label_encoder = LabelEncoder()
-    label_encoder.fit(df_full['diseases'])
-    symptom_names = df_full.drop('diseases', axis=1).columns.tolist()
-    print("Model, label encoder, and symptom names loaded successfully.")
-except FileNotFoundError:
-    print(f"Error: File not found. Ensure '{DATA_PATH}' and '{MODEL_PATH}' exist in the same directory or provide correct paths.")
-except Exception as e:
-    print(f"An unexpected error occurred while loading resources: {e}")
+def load_in_process_resources(expected_symptoms=None):
+    """
+    Loads the model, label encoder and symptom names into this process.
+
+    With ``expected_symptoms`` (the vocabulary the checkboxes were built
+    from) nothing is replaced unless the model takes exactly those symptoms.
+    """
+    global model, label_encoder, symptom_names
+    from inference import load_gui_resources
+
+    try:
+        model, label_encoder, symptom_names = load_gui_resources(expected_symptoms)
+        print("Model, label encoder, and symptom names loaded successfully.")
+    except FileNotFoundError:
+        print(f"Error: File not found. Ensure '{DATA_PATH}' and '{MODEL_PATH}' exist or set DISEASE_DATA_PATH / DISEASE_MODEL_PATH.")
+    except Exception as e:
+        print(f"An unexpected error occurred while loading resources: {e}")
+
+
+def fall_back_to_in_process(error):
+    """
+    Drops a daemon that stopped answering (reconnecting failed) and loads the model in-process.
+
+    Returns:
+        The (model, label_encoder, symptom_names) now in use.
+    """
+    global daemon
+    print(f"Inference daemon unavailable ({error}); loading the model in-process.")
+    daemon.close()
+    daemon = None
+    load_in_process_resources(expected_symptoms=symptom_names)
+    return model, label_encoder, symptom_names
+
+
+# A running inference_daemon.py already holds the model warm; use it when present
+# and only import pandas/scikit-learn and load everything in-process otherwise
+daemon = connect_daemon()
+if daemon is not None:
+    symptom_names = daemon.symptom_names
+    print(f"Connected to the inference daemon (model {daemon.model_version}).")
+else:
+    load_in_process_resources()
 
 # --- Configure Gemini API ---
 try:
@@ -92,35 +122,19 @@ def predict_disease_with_precautions(symptoms, model, label_encoder, symptom_nam
         A tuple containing the predicted disease name, a dictionary of confidence percentages for all diseases,
         and the precautions from the Gemini API.
     """
+    if daemon is not None:
+        predicted_disease, confidence_percentages = daemon.predict_disease(symptoms, top_k=TOP_K)
+        return predicted_disease, confidence_percentages, get_precautions_from_gemini(predicted_disease)
+
     if model is None or label_encoder is None or not symptom_names:
         return "Error: Model, label encoder, or symptom names not loaded.", None, "Error: Cannot fetch precautions."
 
     if len(symptoms) != len(symptom_names):
          return f"Error: Input symptoms length ({len(symptoms)}) does not match expected number of features ({len(symptom_names)}).", None, "Error: Cannot fetch precautions."
 
-    symptoms_reshaped = np.array(symptoms).reshape(1, -1)
-
-    if model is None:
-         return "Error: Model not loaded.", None, "Error: Cannot fetch precautions."
-
-    predicted_encoded_label = model.predict(symptoms_reshaped)[0]
-
-    confidence_percentages = {}
-    try:
-        if hasattr(model, 'predict_proba'):
-            confidence_scores = model.predict_proba(symptoms_reshaped)[0]
-            for i, score in enumerate(confidence_scores):
-                 disease_name = label_encoder.inverse_transform([i])[0]
-                 confidence_percentages[disease_name] = score * 100
-        else:
-            predicted_disease = label_encoder.inverse_transform([predicted_encoded_label])[0]
-            confidence_percentages[predicted_disease] = 100.0
-
-    except Exception as e:
-        print(f"Could not get confidence scores: {e}")
-        confidence_percentages = {"Error fetching confidence": None}
+    from inference import predict_symptom_values
 
-    predicted_disease = label_encoder.inverse_transform([predicted_encoded_label])[0]
+    predicted_disease, confidence_percentages = predict_symptom_values(model, label_encoder, symptoms, TOP_K)
 
     precautions = get_precautions_from_gemini(predicted_disease)
 
@@ -142,9 +156,18 @@ def predict_disease_from_checkboxes(symptom_vars, symptom_names, model, label_en
         precautions_text: Tkinter Text widget to display precautions.
         health_tips_label: Tkinter Label to display health tips.
     """
-    predicted_disease, confidence_scores_dict, precautions = predict_disease_with_precautions(
-        [var.get() for var in symptom_vars], symptom_names, model, label_encoder
-    )
+    try:
+        predicted_disease, confidence_scores_dict, precautions = predict_disease_with_precautions(
+            [var.get() for var in symptom_vars], model, label_encoder, symptom_names
+        )
+    except DAEMON_ERRORS as e:
+        if daemon is None:
+            raise
+        # The daemon died mid-session; carry on with the model in this process
+        model, label_encoder, symptom_names = fall_back_to_in_process(e)
+        predicted_disease, confidence_scores_dict, precautions = predict_disease_with_precautions(
+            [var.get() for var in symptom_vars], model, label_encoder, symptom_names
+        )
 
     predicted_disease_label.config(text=f"Predicted Disease: {predicted_disease}")
 
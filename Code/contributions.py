@@ -0,0 +1,196 @@
+import numpy as np
+
+# --- Symptom Contribution Engines ---
+# Each engine decomposes a prediction into a bias term plus one contribution per
+# symptom, so the GUIs and the server can show *which* selected symptoms drove
+# the predicted disease. Everything that depends only on the model is computed
+# once in the constructor; explaining a batch is a single vectorized pass.
+
+
+class TreeContributionEngine:
+    """
+    Decision-path contributions for RandomForest / ExtraTrees / DecisionTree models.
+
+    For every node the class-probability change relative to its parent is
+    precomputed and attributed to the feature the parent splits on. Walking a
+    sample's decision paths and summing those deltas per feature reproduces the
+    forest's ``predict_proba`` exactly (bias + sum of contributions).
+    """
+
+    units = "probability"
+
+    def __init__(self, model):
+        self.model = model
+        estimators = getattr(model, "estimators_", [model])
+        self.n_features = int(model.n_features_in_)
+        self.n_trees = len(estimators)
+
+        deltas, features, biases = [], [], []
+        for est in estimators:
+            tree = est.tree_
+            value = tree.value[:, 0, :].astype(np.float64)
+            value /= np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+
+            parent = np.full(tree.node_count, -1, dtype=np.intp)
+            internal = np.flatnonzero(tree.children_left >= 0)
+            parent[tree.children_left[internal]] = internal
+            parent[tree.children_right[internal]] = internal
+
+            delta = np.zeros_like(value)
+            feature = np.full(tree.node_count, -1, dtype=np.intp)
+            child = parent >= 0
+            delta[child] = value[child] - value[parent[child]]
+            feature[child] = tree.feature[parent[child]]
+
+            deltas.append(delta)
+            features.append(feature)
+            biases.append(value[0])
+
+        # Node order matches the column order of ``model.decision_path``.
+        self.node_delta = np.vstack(deltas) / self.n_trees
+        self.node_feature = np.concatenate(features)
+        self.bias = np.mean(biases, axis=0)
+
+    def contributions(self, X, class_indices=None):
+        """
+        Computes per-symptom contributions towards one class per row.
+
+        Args:
+            X: A 2D feature array.
+            class_indices: Column of ``predict_proba`` to explain for each row
+                (defaults to the most likely class).
+
+        Returns:
+            A tuple (contrib, bias, class_indices) where contrib has shape
+            (n_samples, n_features).
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if class_indices is None:
+            class_indices = np.argmax(self.model.predict_proba(X), axis=1)
+        class_indices = np.asarray(class_indices, dtype=np.intp)
+
+        # Forests return (indicator, n_nodes_ptr); a single tree returns the indicator alone
+        path = self.model.decision_path(X)
+        indicator = (path[0] if isinstance(path, tuple) else path).tocsr()
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(indicator.indptr))
+        nodes = indicator.indices
+        feats = self.node_feature[nodes]
+        keep = feats >= 0
+        rows, nodes, feats = rows[keep], nodes[keep], feats[keep]
+
+        weights = self.node_delta[nodes, class_indices[rows]]
+        flat = np.bincount(rows * self.n_features + feats, weights=weights,
+                           minlength=X.shape[0] * self.n_features)
+        contrib = flat.reshape(X.shape[0], self.n_features)
+        return contrib, self.bias[class_indices], class_indices
+
+
+class LinearContributionEngine:
+    """
+    Exact log-odds contributions for linear models such as LogisticRegression.
+
+    The contribution of a symptom is its coefficient for the explained class
+    times its input value.
+    """
+
+    units = "log-odds"
+
+    def __init__(self, model):
+        self.model = model
+        self.coef = np.atleast_2d(model.coef_).astype(np.float64)
+        self.intercept = np.atleast_1d(model.intercept_).astype(np.float64)
+        self.n_features = self.coef.shape[1]
+
+    def contributions(self, X, class_indices=None):
+        X = np.asarray(X, dtype=np.float64)
+        if class_indices is None:
+            class_indices = np.argmax(self.model.predict_proba(X), axis=1)
+        class_indices = np.asarray(class_indices, dtype=np.intp)
+        # Binary models store a single coefficient row for the positive class.
+        rows = class_indices if self.coef.shape[0] > 1 else np.zeros_like(class_indices)
+        sign = np.where((self.coef.shape[0] == 1) & (class_indices == 0), -1.0, 1.0)
+        contrib = X * self.coef[rows] * sign[:, None]
+        return contrib, self.intercept[rows] * sign, class_indices
+
+
+class XGBoostContributionEngine:
+    """
+    Log-odds contributions for XGBoost models using the booster's native
+    tree-path attribution (``pred_contribs``).
+    """
+
+    units = "log-odds"
+
+    def __init__(self, model):
+        self.model = model
+        self.booster = model.get_booster()
+        self.n_features = int(model.n_features_in_)
+
+    def contributions(self, X, class_indices=None):
+        import xgboost as xgb
+
+        X = np.asarray(X, dtype=np.float32)
+        if class_indices is None:
+            class_indices = np.argmax(self.model.predict_proba(X), axis=1)
+        class_indices = np.asarray(class_indices, dtype=np.intp)
+
+        # Boosters fitted on a DataFrame reject a matrix without their feature names
+        dmatrix = xgb.DMatrix(X, feature_names=self.booster.feature_names)
+        raw = self.booster.predict(dmatrix, pred_contribs=True)
+        if raw.ndim == 2:  # binary: a single output
+            raw = raw[:, None, :]
+            class_indices = np.zeros_like(class_indices)
+        picked = raw[np.arange(X.shape[0]), class_indices]
+        return picked[:, :-1], picked[:, -1], class_indices
+
+
+def build_contribution_engine(model):
+    """
+    Creates the contribution engine matching the model type.
+
+    Returns:
+        An engine instance, or None when the model type is not supported.
+    """
+    if model is None:
+        return None
+    if type(model).__name__.startswith("XGB"):
+        return XGBoostContributionEngine(model)
+    if hasattr(model, "decision_path") and (hasattr(model, "estimators_") or hasattr(model, "tree_")):
+        return TreeContributionEngine(model)
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        return LinearContributionEngine(model)
+    return None
+
+
+def top_symptom_contributions(engine, X, symptom_names, top_n=5, class_indices=None):
+    """
+    Lists the selected symptoms that pushed each prediction the most.
+
+    Only symptoms that are present in the input (non-zero) are reported,
+    ordered by the size of their contribution.
+
+    Args:
+        engine: An engine from ``build_contribution_engine``.
+        X: A 2D feature array.
+        symptom_names: The ordered symptom vocabulary.
+        top_n: Maximum number of symptoms per row.
+        class_indices: Optional class column to explain per row.
+
+    Returns:
+        A list (one per row) of (symptom, contribution) tuples.
+    """
+    X = np.asarray(X)
+    contrib, _, _ = engine.contributions(X, class_indices)
+    results = []
+    for r in range(X.shape[0]):
+        present = np.flatnonzero(X[r])
+        order = present[np.argsort(-np.abs(contrib[r, present]))][:top_n]
+        results.append([(symptom_names[i], float(contrib[r, i])) for i in order])
+    return results
+
+
+def format_contribution(value, units):
+    """Formats a contribution for display (percentage points or log-odds)."""
+    if units == "probability":
+        return f"{value * 100:+.2f}%"
+    return f"{value:+.2f}"
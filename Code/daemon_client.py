@@ -0,0 +1,227 @@
+import json
+import os
+import socket
+import struct
+import tempfile
+
+# --- Protocol ---
+# Every message is a frame: a 4-byte big-endian payload length, then the payload.
+# A request payload starts with an opcode byte, a response payload with a
+# status byte (0 = ok, otherwise the rest is a UTF-8 error message).
+#
+#   HELLO    request:  op
+#            response: status, protocol version (u8), JSON metadata
+#                      {"model_version", "symptoms", "diseases", "contribution_units"}
+#   PREDICT  request:  op, top_k (u8, 0 = all diseases), top_contributions (u8),
+#                      n (u16), n symptom indices (u16)
+#            response: status, n (u16), n x (disease index u16, confidence % f32), best first,
+#                      m (u8), m x (symptom index u16, contribution f32)
+#
+# Indices refer to the symptom and disease lists sent with HELLO, so after the
+# handshake no names travel over the socket.
+PROTOCOL_VERSION = 1
+OP_HELLO = 1
+OP_PREDICT = 2
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+FRAME_HEADER = struct.Struct(">I")
+PREDICT_HEADER = struct.Struct(">BBBH")
+COUNT16 = struct.Struct(">H")
+ITEM = struct.Struct(">Hf")
+MAX_FRAME = 16 * 1024 * 1024
+
+SOCKET_PATH = os.environ.get("INFERENCE_SOCKET", os.path.join(tempfile.gettempdir(), "disease-inference.sock"))
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 10.0
+# What a client call raises when the daemon is gone (and a reconnect failed)
+# or answers with an error; GUIs catch these to fall back to an in-process model
+DAEMON_ERRORS = (OSError, ConnectionError, RuntimeError, ValueError)
+
+
+def send_frame(sock, payload):
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer.")
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_frame(sock):
+    (length,) = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    if length > MAX_FRAME:
+        raise ConnectionError(f"Frame of {length} bytes exceeds the limit.")
+    return _recv_exact(sock, length)
+
+
+def encode_predict(indices, top_k=0, top_contributions=0):
+    indices = list(indices)
+    return (PREDICT_HEADER.pack(OP_PREDICT, top_k, top_contributions, len(indices))
+            + struct.pack(f">{len(indices)}H", *indices))
+
+
+def decode_predict(payload):
+    """Parses a PREDICT request payload into (indices, top_k, top_contributions)."""
+    _, top_k, top_contributions, n = PREDICT_HEADER.unpack_from(payload)
+    indices = struct.unpack_from(f">{n}H", payload, PREDICT_HEADER.size)
+    return list(indices), top_k, top_contributions
+
+
+def _pack_items(items):
+    return struct.pack(">" + "Hf" * len(items), *[x for item in items for x in item])
+
+
+def _unpack_items(buf, offset, n):
+    flat = struct.unpack_from(">" + "Hf" * n, buf, offset)
+    return list(zip(flat[::2], flat[1::2])), offset + n * ITEM.size
+
+
+def encode_prediction(ranked, contributions):
+    """Builds a PREDICT response from [(disease_index, pct)] and [(symptom_index, value)]."""
+    return b"".join([bytes([STATUS_OK]), COUNT16.pack(len(ranked)), _pack_items(ranked),
+                     bytes([len(contributions)]), _pack_items(contributions)])
+
+
+def encode_error(message):
+    return bytes([STATUS_ERROR]) + str(message).encode("utf-8")
+
+
+# --- Client ---
+class DaemonClient:
+    """
+    Connection to a running inference daemon.
+
+    Only the standard library is used, so a GUI can connect and predict
+    without importing pandas, scikit-learn or the model.
+    """
+
+    def __init__(self, path=SOCKET_PATH, timeout=CONNECT_TIMEOUT):
+        self.path = path
+        self._sock = None
+        self._connect(timeout)
+        metadata = self._hello()
+        self.symptom_names = metadata["symptoms"]
+        self.disease_names = metadata["diseases"]
+        self._set_metadata(metadata)
+        self._last = None
+
+    def _set_metadata(self, metadata):
+        self.model_version = metadata["model_version"]
+        self.contribution_units = metadata.get("contribution_units")
+
+    def _connect(self, timeout):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        sock.settimeout(REQUEST_TIMEOUT)
+        self._sock = sock
+
+    def _reconnect(self):
+        """
+        Connects again and repeats the HELLO handshake.
+
+        Requests carry symptom indices and replies disease indices, so a
+        restarted daemon is only used if it serves the same symptom and
+        disease lists; its model version is taken over.
+
+        Raises:
+            ConnectionError: If the daemon's symptom or disease list changed.
+        """
+        self.close()
+        self._connect(CONNECT_TIMEOUT)
+        metadata = self._hello()
+        if metadata["symptoms"] != self.symptom_names or metadata["diseases"] != self.disease_names:
+            self.close()
+            raise ConnectionError("The restarted inference daemon serves a different symptom or disease list.")
+        self._set_metadata(metadata)
+
+    def _exchange(self, payload):
+        if self._sock is None:
+            raise ConnectionError("Not connected to the inference daemon.")
+        send_frame(self._sock, payload)
+        response = recv_frame(self._sock)
+        if response[0] != STATUS_OK:
+            raise RuntimeError(f"Inference daemon error: {response[1:].decode('utf-8', 'replace')}")
+        return response[1:]
+
+    def _request(self, payload):
+        try:
+            return self._exchange(payload)
+        except (OSError, ConnectionError):
+            # The daemon may have restarted; reconnect once and retry
+            self._reconnect()
+            return self._exchange(payload)
+
+    def _hello(self):
+        body = self._exchange(bytes([OP_HELLO]))
+        if body[0] != PROTOCOL_VERSION:
+            raise ConnectionError(f"Daemon speaks protocol {body[0]}, expected {PROTOCOL_VERSION}.")
+        return json.loads(body[1:].decode("utf-8"))
+
+    def predict_indices(self, indices, top_k=0, top_contributions=0):
+        """
+        Predicts from symptom indices.
+
+        Returns:
+            A tuple (ranked, contributions): ranked is [(disease_name, confidence_pct)]
+            best first (all diseases when top_k is 0), contributions is
+            [(symptom_name, value)] for the strongest drivers.
+        """
+        body = self._request(encode_predict(indices, top_k, top_contributions))
+        (n,) = COUNT16.unpack_from(body)
+        ranked, offset = _unpack_items(body, COUNT16.size, n)
+        contributions, _ = _unpack_items(body, offset + 1, body[offset])
+        return ([(self.disease_names[i], pct) for i, pct in ranked],
+                [(self.symptom_names[i], value) for i, value in contributions])
+
+    def predict_disease(self, symptoms, top_k=0, top_contributions=5):
+        """
+        Same contract as the GUIs' ``predict_disease``: takes a 0/1 value per
+        symptom (in ``symptom_names`` order) and returns (predicted_disease,
+        {disease: confidence_pct}) over the ``top_k`` most likely diseases
+        (all when 0). The strongest symptom contributions of this call are
+        kept for ``last_contributions``.
+        """
+        indices = [i for i, value in enumerate(symptoms) if value]
+        ranked, contributions = self.predict_indices(indices, top_k, top_contributions)
+        self._last = (tuple(indices), contributions)
+        return ranked[0][0], dict(ranked)
+
+    def last_contributions(self, symptoms):
+        """Returns the contributions fetched by the last ``predict_disease`` if it had the same input."""
+        indices = tuple(i for i, value in enumerate(symptoms) if value)
+        if self._last is not None and self._last[0] == indices:
+            return self._last[1]
+        return self.predict_indices(indices, 1, 5)[1]
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def connect_daemon(path=SOCKET_PATH, timeout=CONNECT_TIMEOUT):
+    """
+    Connects to the inference daemon if one is running.
+
+    Returns:
+        A DaemonClient, or None when Unix sockets are unavailable or no daemon
+        answers at ``path`` (callers then load the model in-process).
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    try:
+        return DaemonClient(path, timeout)
+    except DAEMON_ERRORS as e:
+        print(f"Inference daemon at {path} not usable ({e}); loading the model in-process.")
+        return None
@@ -0,0 +1,308 @@
+import hashlib
+import os
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from inference import BASE_DIR, class_names
+
+# --- Configuration ---
+BASELINE_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "drift")
+# Confidence (top-1 probability, %) histogram edges
+CONFIDENCE_EDGES = np.linspace(0.0, 100.0, 11)
+# Weight of a request halves after this many newer requests
+DEFAULT_HALF_LIFE = 2000
+BASELINE_SAMPLE_ROWS = 20000
+TOP_SHIFTS = 10
+EPS = 1e-6
+
+
+# --- Divergences ---
+def js_divergence(p, q):
+    """Jensen-Shannon divergence (base 2, in [0, 1]) between two distributions."""
+    p = np.asarray(p, dtype=np.float64)
+    q = np.asarray(q, dtype=np.float64)
+    p = p / max(p.sum(), EPS)
+    q = q / max(q.sum(), EPS)
+    m = 0.5 * (p + q)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kl_pm = np.where(p > 0, p * np.log2(p / m), 0.0).sum()
+        kl_qm = np.where(q > 0, q * np.log2(q / m), 0.0).sum()
+    return float(0.5 * (kl_pm + kl_qm))
+
+
+def psi(expected, actual):
+    """Population stability index of ``actual`` against ``expected`` (histogram shares)."""
+    e = np.maximum(np.asarray(expected, dtype=np.float64) / max(np.sum(expected), EPS), EPS)
+    a = np.maximum(np.asarray(actual, dtype=np.float64) / max(np.sum(actual), EPS), EPS)
+    return float(((a - e) * np.log(a / e)).sum())
+
+
+# --- Baseline ---
+class DriftBaseline:
+    """
+    Reference distributions from the training data.
+
+    Attributes:
+        symptom_rate: Share of dataset rows listing each symptom.
+        label_share: Share of rows per disease (true labels).
+        predicted_share: Share of a scored sample predicted as each disease.
+        confidence_hist: Top-1 confidence histogram of that sample (CONFIDENCE_EDGES bins).
+    """
+
+    def __init__(self, symptom_rate, label_share, predicted_share, confidence_hist, model_version=None):
+        self.symptom_rate = np.asarray(symptom_rate, dtype=np.float64)
+        self.label_share = np.asarray(label_share, dtype=np.float64)
+        self.predicted_share = np.asarray(predicted_share, dtype=np.float64)
+        self.confidence_hist = np.asarray(confidence_hist, dtype=np.float64)
+        self.model_version = model_version
+
+    def save(self, path):
+        np.savez(path, symptom_rate=self.symptom_rate, label_share=self.label_share,
+                 predicted_share=self.predicted_share, confidence_hist=self.confidence_hist,
+                 model_version=np.array(str(self.model_version)))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["symptom_rate"], data["label_share"], data["predicted_share"],
+                   data["confidence_hist"], str(data["model_version"]))
+
+
+def compute_baseline(model, label_encoder, symptom_names, data_path, model_version=None,
+                     sample_rows=BASELINE_SAMPLE_ROWS, chunksize=20000, seed=42):
+    """
+    Streams the dataset once for symptom and label frequencies and scores a
+    random sample of rows with the model for the predicted-disease mix and
+    the confidence histogram.
+
+    Returns:
+        A DriftBaseline.
+    """
+    known = {name: i for i, name in enumerate(label_encoder.classes_)}
+    n_classes = len(label_encoder.classes_)
+    symptom_counts = np.zeros(len(symptom_names), dtype=np.int64)
+    label_counts = np.zeros(n_classes, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    sample = np.zeros((0, len(symptom_names)), dtype=np.float32)
+    sample_keys = np.zeros(0)
+    n_rows = 0
+
+    dtypes = dict.fromkeys(symptom_names, np.float32)
+    for chunk in pd.read_csv(data_path, usecols=list(symptom_names) + ["diseases"], dtype=dtypes,
+                             chunksize=chunksize):
+        X = chunk[symptom_names].fillna(0).to_numpy(dtype=np.float32)
+        symptom_counts += (X > 0).sum(axis=0)
+        labels = chunk["diseases"].map(known).dropna().to_numpy(dtype=np.int64)
+        label_counts += np.bincount(labels, minlength=n_classes)
+        n_rows += len(X)
+        # Uniform sample of the whole file: keep the rows with the smallest random keys
+        sample = np.concatenate([sample, X])
+        sample_keys = np.concatenate([sample_keys, rng.random(len(X))])
+        if len(sample) > sample_rows:
+            keep = np.argpartition(sample_keys, sample_rows)[:sample_rows]
+            sample, sample_keys = sample[keep], sample_keys[keep]
+
+    X_sample = sample
+    predicted_counts = np.zeros(n_classes, dtype=np.int64)
+    confidence_hist = np.zeros(len(CONFIDENCE_EDGES) - 1, dtype=np.int64)
+    if len(X_sample):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            proba = model.predict_proba(X_sample)
+        columns = np.asarray([known[name] for name in class_names(model, label_encoder)])
+        top = np.argmax(proba, axis=1)
+        predicted_counts += np.bincount(columns[top], minlength=n_classes)
+        confidence_hist += np.histogram(proba[np.arange(len(top)), top] * 100.0, CONFIDENCE_EDGES)[0]
+
+    return DriftBaseline(symptom_counts / max(n_rows, 1), label_counts / max(label_counts.sum(), 1),
+                         predicted_counts / max(predicted_counts.sum(), 1),
+                         confidence_hist / max(confidence_hist.sum(), 1), model_version)
+
+
+def load_or_compute_baseline(model, label_encoder, symptom_names, data_path, model_version,
+                             cache_dir=BASELINE_CACHE_DIR):
+    """Returns the baseline for this dataset and model version, computing and caching it on first use."""
+    st = os.stat(data_path)
+    key = hashlib.sha1(f"{os.path.abspath(data_path)}|{st.st_mtime_ns}|{st.st_size}|{model_version}".encode())
+    path = os.path.join(cache_dir, key.hexdigest()[:12] + ".npz")
+    if os.path.exists(path):
+        return DriftBaseline.load(path)
+    baseline = compute_baseline(model, label_encoder, symptom_names, data_path, model_version)
+    os.makedirs(cache_dir, exist_ok=True)
+    baseline.save(path)
+    return baseline
+
+
+# --- Live Monitor ---
+class DriftMonitor:
+    """
+    Exponentially decayed counters of live traffic, compared to a baseline.
+
+    Instead of decaying every counter on each request, each new request is
+    added with a weight that grows by a constant factor; older requests thus
+    shrink relative to newer ones. The counters are renormalized only when
+    the weight gets large. An observation touches one slot per symptom plus
+    one class and one histogram bin, and memory is fixed by the vocabulary
+    size.
+
+    Args:
+        symptom_names: The ordered symptom vocabulary.
+        disease_names: All disease names (the label encoder's classes).
+        baseline: A DriftBaseline over the same vocabulary and diseases.
+        half_life: Number of requests after which an observation counts half.
+        data_path: Dataset used to rebuild the baseline when the model is swapped.
+    """
+
+    def __init__(self, symptom_names, disease_names, baseline, half_life=DEFAULT_HALF_LIFE, data_path=None):
+        self.symptom_index = {name: i for i, name in enumerate(symptom_names)}
+        self.disease_names = [str(d) for d in disease_names]
+        self.disease_index = {name: i for i, name in enumerate(self.disease_names)}
+        self.symptom_names = list(symptom_names)
+        self.baseline = baseline
+        self.half_life = half_life
+        self.data_path = data_path
+        self._growth = 2.0 ** (1.0 / half_life)
+        self._lock = threading.Lock()
+        # Version of a swapped-in model whose baseline is not ready yet; while
+        # set, the monitor is suspended
+        self.pending_version = None
+        self.reset()
+
+    def _clear(self):
+        self._weight = 1.0
+        self._total = 0.0
+        self._symptoms = np.zeros(len(self.symptom_names), dtype=np.float64)
+        self._classes = np.zeros(len(self.disease_names), dtype=np.float64)
+        self._confidence = np.zeros(len(CONFIDENCE_EDGES) - 1, dtype=np.float64)
+        self.observed = 0
+
+    def reset(self):
+        with self._lock:
+            self._clear()
+
+    def set_baseline(self, baseline):
+        """Switches to a new baseline (e.g. after a model swap) and starts counting afresh."""
+        with self._lock:
+            self.baseline = baseline
+            self.pending_version = None
+            self._clear()
+
+    def on_model_swap(self, old_bundle, new_bundle):
+        """
+        Registry listener: suspends the monitor and rebuilds the baseline for
+        the new model in the background.
+
+        Until the new baseline is ready, observations are ignored and
+        ``scores`` only reports the pending version, so the new model's
+        predictions are never compared with the old model's baseline. A
+        rebuild overtaken by a later swap is discarded.
+        """
+        with self._lock:
+            self.pending_version = new_bundle.version
+            self._clear()
+        if not self.data_path:
+            return
+
+        def rebuild():
+            try:
+                baseline = load_or_compute_baseline(new_bundle.model, new_bundle.label_encoder,
+                                                    new_bundle.symptom_names, self.data_path, new_bundle.version)
+            except Exception as e:
+                print(f"Error rebuilding the drift baseline: {e}")
+                return
+            with self._lock:
+                if self.pending_version != new_bundle.version:
+                    return
+                self.baseline = baseline
+                self.pending_version = None
+                self._clear()
+
+        threading.Thread(target=rebuild, name="drift-baseline", daemon=True).start()
+
+    def observe(self, symptoms, predicted_disease, confidence):
+        """
+        Adds one prediction.
+
+        Args:
+            symptoms: The input symptom names (unknown names are ignored).
+            predicted_disease: The top-1 disease name.
+            confidence: Its probability in percent.
+        """
+        indices = [i for i in map(self.symptom_index.get, symptoms) if i is not None]
+        cls = self.disease_index.get(str(predicted_disease))
+        bin_ = min(int(confidence // (100.0 / (len(CONFIDENCE_EDGES) - 1))), len(CONFIDENCE_EDGES) - 2)
+        with self._lock:
+            if self.pending_version is not None:
+                return
+            w = self._weight
+            self._symptoms[indices] += w
+            if cls is not None:
+                self._classes[cls] += w
+            self._confidence[max(bin_, 0)] += w
+            self._total += w
+            self.observed += 1
+            self._weight = w * self._growth
+            if self._weight > 1e100:
+                scale = 1.0 / self._weight
+                for counts in (self._symptoms, self._classes, self._confidence):
+                    counts *= scale
+                self._total *= scale
+                self._weight = 1.0
+
+    def scores(self):
+        """
+        Returns divergence scores of the decayed live traffic against the baseline.
+
+        "predicted_class_js" compares the predicted-disease mix with the mix the
+        same model predicts on training data; "label_prior_js" compares it with
+        the training labels. "symptom_js" compares the symptom frequency
+        profiles, "confidence_psi" the confidence histograms. "top_symptom_shifts"
+        lists the symptoms whose request rate moved most. While the baseline of
+        a newly swapped-in model is being rebuilt, only "baseline_pending" is
+        reported.
+        """
+        with self._lock:
+            if self.pending_version is not None:
+                return {"observed": 0, "effective_requests": 0.0,
+                        "baseline_pending": str(self.pending_version)}
+            total = self._total
+            symptoms = self._symptoms.copy()
+            classes = self._classes.copy()
+            confidence = self._confidence.copy()
+            observed = self.observed
+            weight = self._weight
+        if not total:
+            return {"observed": observed, "effective_requests": 0.0}
+
+        rate = symptoms / total
+        shift = rate - self.baseline.symptom_rate
+        top = np.argsort(-np.abs(shift))[:TOP_SHIFTS]
+        return {
+            "observed": observed,
+            # Sum of weights in units of the newest request's weight
+            "effective_requests": float(total * self._growth / weight),
+            "baseline_model_version": self.baseline.model_version,
+            "symptom_js": js_divergence(symptoms, self.baseline.symptom_rate),
+            "predicted_class_js": js_divergence(classes, self.baseline.predicted_share),
+            "label_prior_js": js_divergence(classes, self.baseline.label_share),
+            "confidence_psi": psi(self.baseline.confidence_hist, confidence),
+            "confidence_hist": (confidence / total).round(4).tolist(),
+            "top_symptom_shifts": [
+                {"symptom": self.symptom_names[i], "live_rate": float(rate[i]),
+                 "baseline_rate": float(self.baseline.symptom_rate[i])}
+                for i in top
+            ],
+        }
+
+
+def drift_monitor_for(bundle, data_path, half_life=DEFAULT_HALF_LIFE):
+    """Builds a DriftMonitor for a model bundle, or returns None when the dataset is unavailable."""
+    if not data_path or not os.path.exists(data_path):
+        print("Drift monitoring disabled: the training dataset is not available.")
+        return None
+    baseline = load_or_compute_baseline(bundle.model, bundle.label_encoder, bundle.symptom_names,
+                                        data_path, bundle.version)
+    return DriftMonitor(bundle.symptom_names, bundle.label_encoder.classes_, baseline, half_life, data_path)
@@ -0,0 +1,296 @@
+import json
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import joblib
+import numpy as np
+
+# Every member is scored on its own thread pool, sized for the number of
+# requests expected to be in flight at once. A slow member then only queues
+# behind its own earlier calls and cannot delay the other members, and the
+# members of one request run side by side even on a single CPU. Threads (not
+# processes) keep the members in shared memory; sklearn and XGBoost release
+# the GIL inside their heavy prediction loops.
+DEFAULT_DEADLINE_MS = 250.0
+DEFAULT_CONCURRENCY = 4
+# Overall budget of one prediction. When every member misses its own
+# deadline, the first one to answer within this budget is used instead.
+DEFAULT_TIMEOUT_MS = 1000.0
+
+
+class EnsembleMember:
+    """One model of the ensemble with its vote weight and latency budget."""
+
+    def __init__(self, name, model, weight=1.0, deadline_ms=DEFAULT_DEADLINE_MS):
+        self.name = name
+        self.model = model
+        self.weight = float(weight)
+        self.deadline_ms = float(deadline_ms)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self, max_workers):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                                    thread_name_prefix=f"ensemble-{self.name}")
+            return self._executor
+
+    # Executors and locks cannot be pickled; drop them for joblib.dump
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+# --- Ensemble ---
+class EnsembleModel:
+    """
+    Weighted soft-vote over several classifiers sharing one label space.
+
+    Each member's ``predict_proba`` columns are mapped onto the union of all
+    members' classes, so members trained on slightly different class subsets
+    still vote on the same disease. With ``label_names`` (the label encoder's
+    diseases) every member's classes are first translated to encoder indices:
+    integer classes are taken as indices and disease-name classes are looked
+    up, so models trained with either kind of label can be combined, and
+    ``classes_`` holds encoder indices. Members are scored in parallel; a member
+    that errors or misses its deadline is left out of the vote instead of
+    failing the prediction, and its call is cancelled if it has not started.
+    Only when every member misses its deadline does the prediction wait
+    longer, for the first member to answer within ``timeout_ms``.
+    Exposes ``predict_proba``/``predict``/``classes_`` so it can be served
+    anywhere a single model can.
+
+    Args:
+        members: The EnsembleMember list.
+        concurrency: Expected number of concurrent requests; each member's
+            thread pool gets this many workers.
+        label_names: The disease names of the label encoder, in encoder order.
+        timeout_ms: Overall budget of one prediction (at least the largest
+            member deadline).
+
+    Raises:
+        ValueError: If a member predicts labels outside ``label_names``, or if
+            members mix integer and disease-name labels without ``label_names``.
+    """
+
+    def __init__(self, members, concurrency=DEFAULT_CONCURRENCY, label_names=None, timeout_ms=DEFAULT_TIMEOUT_MS):
+        if not members:
+            raise ValueError("An ensemble needs at least one member.")
+        self.members = list(members)
+        self.concurrency = max(int(concurrency), 1)
+        self.timeout_ms = max(float(timeout_ms), max(m.deadline_ms for m in self.members))
+        self.label_names = None if label_names is None else [str(name) for name in label_names]
+        labels = [self._member_labels(m) for m in self.members]
+        self.classes_ = np.unique(np.concatenate(labels))
+        self._columns = [np.searchsorted(self.classes_, member_labels) for member_labels in labels]
+
+        n_features = {getattr(m.model, "n_features_in_", None) for m in self.members} - {None}
+        if len(n_features) > 1:
+            raise ValueError(f"Ensemble members expect different feature counts: {sorted(n_features)}.")
+        if n_features:
+            self.n_features_in_ = n_features.pop()
+        names = [getattr(m.model, "feature_names_in_", None) for m in self.members]
+        names = [list(n) for n in names if n is not None]
+        if names:
+            if any(n != names[0] for n in names):
+                raise ValueError("Ensemble members were trained with different feature orders.")
+            self.feature_names_in_ = np.asarray(names[0], dtype=object)
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {m.name: {"calls": 0, "timeouts": 0, "errors": 0, "total_ms": 0.0} for m in self.members}
+
+    def _member_labels(self, member):
+        """Returns the member's classes, as encoder indices when ``label_names`` is known."""
+        classes = np.asarray(member.model.classes_)
+        is_index = np.issubdtype(classes.dtype, np.integer)
+        if self.label_names is None:
+            kinds = {np.issubdtype(np.asarray(m.model.classes_).dtype, np.integer) for m in self.members}
+            if len(kinds) > 1:
+                raise ValueError("Ensemble members mix encoded and disease-name labels; "
+                                 "pass the label encoder's diseases as label_names.")
+            return classes
+        if is_index:
+            unknown = classes[(classes < 0) | (classes >= len(self.label_names))]
+        else:
+            index = {name: i for i, name in enumerate(self.label_names)}
+            unknown = [c for c in classes if str(c) not in index]
+        if len(unknown):
+            raise ValueError(f"Ensemble member '{member.name}' predicts labels unknown to the label encoder: "
+                             f"{[str(c) for c in unknown[:5]]}")
+        if is_index:
+            return classes.astype(np.int64)
+        return np.asarray([index[str(c)] for c in classes], dtype=np.int64)
+
+    # Locks and thread-locals cannot be pickled; drop them for joblib.dump
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"], state["_stats_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+    def _score(self, member, X):
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            proba = member.model.predict_proba(X)
+        return proba, (time.perf_counter() - start) * 1000.0
+
+    def predict_proba_with_report(self, X):
+        """
+        Scores all members in parallel and combines the ones that answered in time.
+
+        Returns:
+            A tuple (proba, report) where report maps each member name to
+            {"status": "ok" | "timeout" | "error" | "late", "latency_ms": float, "weight": float};
+            "late" marks the fallback member used when nobody met their deadline.
+
+        Raises:
+            RuntimeError: If every member failed, or none answered within ``timeout_ms``.
+        """
+        start = time.perf_counter()
+        futures = [(m, cols, m.executor(self.concurrency).submit(self._score, m, X))
+                   for m, cols in zip(self.members, self._columns)]
+
+        combined = None
+        total_weight = 0.0
+        report = {}
+        timed_out = []
+        for member, cols, future in sorted(futures, key=lambda f: f[0].deadline_ms):
+            remaining = member.deadline_ms / 1000.0 - (time.perf_counter() - start)
+            try:
+                proba, latency_ms = future.result(timeout=max(remaining, 0.0))
+            except FutureTimeout:
+                report[member.name] = {"status": "timeout", "weight": member.weight,
+                                       "latency_ms": (time.perf_counter() - start) * 1000.0}
+                timed_out.append(future)
+                continue
+            except Exception as e:
+                print(f"Ensemble member '{member.name}' failed: {e}")
+                report[member.name] = {"status": "error", "weight": member.weight,
+                                       "latency_ms": (time.perf_counter() - start) * 1000.0}
+                continue
+            if combined is None:
+                combined = np.zeros((proba.shape[0], len(self.classes_)))
+            combined[:, cols] += member.weight * proba
+            total_weight += member.weight
+            report[member.name] = {"status": "ok", "weight": member.weight, "latency_ms": latency_ms}
+
+        error = None
+        if combined is None:
+            # Every member missed its deadline: use the first one that finishes within the overall budget
+            by_future = {future: (member, cols) for member, cols, future in futures}
+            remaining = self.timeout_ms / 1000.0 - (time.perf_counter() - start)
+            try:
+                for future in as_completed(by_future, timeout=max(remaining, 0.0)):
+                    if future.exception() is not None:
+                        continue
+                    member, cols = by_future[future]
+                    proba, latency_ms = future.result()
+                    combined = np.zeros((proba.shape[0], len(self.classes_)))
+                    combined[:, cols] = proba
+                    total_weight = 1.0
+                    report[member.name] = {"status": "late", "weight": member.weight, "latency_ms": latency_ms}
+                    break
+                else:
+                    error = "All ensemble members failed."
+            except FutureTimeout:
+                error = f"No ensemble member answered within {self.timeout_ms:.0f} ms."
+
+        # Nobody waits for late members any more; free their workers if their call has not started
+        for future in timed_out:
+            future.cancel()
+
+        self._record(report)
+        if error is not None:
+            raise RuntimeError(error)
+        self._local.last_report = report
+        return combined / total_weight, report
+
+    def _record(self, report):
+        with self._stats_lock:
+            for name, entry in report.items():
+                stats = self._stats[name]
+                stats["calls"] += 1
+                stats["total_ms"] += entry["latency_ms"]
+                if entry["status"] in ("timeout", "late"):
+                    stats["timeouts"] += 1
+                elif entry["status"] == "error":
+                    stats["errors"] += 1
+
+    @property
+    def last_report(self):
+        """Per-member report of the most recent prediction made on this thread."""
+        return getattr(self._local, "last_report", None)
+
+    def stats(self):
+        """Cumulative per-member call counts, timeouts, errors and mean latency."""
+        with self._stats_lock:
+            return {
+                name: dict(s, mean_ms=s["total_ms"] / s["calls"] if s["calls"] else 0.0)
+                for name, s in self._stats.items()
+            }
+
+    def predict_proba(self, X):
+        return self.predict_proba_with_report(X)[0]
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# --- Manifest ---
+def load_ensemble(manifest_path, label_names=None):
+    """
+    Builds an EnsembleModel from a JSON manifest such as::
+
+        {"deadline_ms": 250, "concurrency": 4, "timeout_ms": 1000,
+         "members": [{"name": "random_forest", "path": "best_disease_model.joblib", "weight": 1.0},
+                     {"name": "xgboost", "path": "disease_prediction_model_xgb.joblib", "weight": 2.0,
+                      "deadline_ms": 150}]}
+
+    Member paths are relative to the manifest's directory. "concurrency" is
+    the number of requests expected in flight at once and "timeout_ms" the
+    overall budget of a prediction (see EnsembleModel).
+    Models/ensemble.example.json combines the shipped model with a random
+    forest trained by ``train.py -o Models/random_forest_model.joblib``.
+    ``label_names`` (the label encoder's diseases) aligns members trained
+    on encoded and on disease-name labels.
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    default_deadline = manifest.get("deadline_ms", DEFAULT_DEADLINE_MS)
+
+    members = []
+    for i, spec in enumerate(manifest["members"]):
+        path = os.path.join(base, spec["path"])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model = joblib.load(path)
+        members.append(EnsembleMember(spec.get("name", f"member_{i}"), model,
+                                      spec.get("weight", 1.0), spec.get("deadline_ms", default_deadline)))
+    return EnsembleModel(members, manifest.get("concurrency", DEFAULT_CONCURRENCY), label_names,
+                         manifest.get("timeout_ms", DEFAULT_TIMEOUT_MS))
+
+
+def manifest_member_paths(manifest_path):
+    """Lists the member artifact paths referenced by a manifest."""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    return [os.path.join(base, spec["path"]) for spec in manifest["members"]]
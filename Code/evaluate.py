@@ -0,0 +1,395 @@
+import argparse
+import json
+import os
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from inference import DATA_PATH, MODEL_PATH, class_names, load_resources
+
+TOP_K_VALUES = (1, 3, 5)
+# Above this many classes the confusion matrix is accumulated sparsely
+DENSE_CONFUSION_MAX_CLASSES = 2048
+
+
+# --- Incremental Metrics ---
+class StreamingEvaluator:
+    """
+    Accumulates confusion-matrix counts and top-k hits chunk by chunk.
+
+    Only the (n_classes x n_classes) counts and a few integers are kept, so
+    memory does not grow with the size of the evaluated data. With very many
+    classes the confusion matrix is kept as a sparse matrix instead, since
+    most (true, predicted) pairs never occur.
+    """
+
+    def __init__(self, n_classes, top_k=TOP_K_VALUES):
+        self.n_classes = n_classes
+        self.top_k = tuple(top_k)
+        self.sparse = n_classes > DENSE_CONFUSION_MAX_CLASSES
+        if self.sparse:
+            self.confusion = sparse.csr_matrix((n_classes, n_classes), dtype=np.int64)
+        else:
+            self.confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+        self.top_k_hits = dict.fromkeys(self.top_k, 0)
+        self.n_samples = 0
+
+    def update(self, y_true, y_pred, true_rank=None):
+        """
+        Adds one chunk of results.
+
+        Args:
+            y_true: True class indices.
+            y_pred: Predicted class indices.
+            true_rank: Optional rank (0 = best) of the true class in each row's
+                probabilities, used for top-k accuracy.
+        """
+        if self.sparse:
+            ones = np.ones(len(y_true), dtype=np.int64)
+            self.confusion = self.confusion + sparse.csr_matrix(
+                (ones, (y_true, y_pred)), shape=(self.n_classes, self.n_classes))
+        else:
+            np.add.at(self.confusion, (y_true, y_pred), 1)
+        if true_rank is not None:
+            for k in self.top_k:
+                self.top_k_hits[k] += int(np.count_nonzero(true_rank < k))
+        self.n_samples += len(y_true)
+
+    def merge(self, other):
+        self.confusion = self.confusion + other.confusion
+        for k in self.top_k:
+            self.top_k_hits[k] += other.top_k_hits[k]
+        self.n_samples += other.n_samples
+
+    def report(self, class_names):
+        """
+        Computes per-class precision/recall/F1 and overall metrics from the counts.
+
+        Returns:
+            A dict with "accuracy", "top_k_accuracy", "macro_avg", "weighted_avg"
+            and "per_class" (only classes that occur or are predicted).
+        """
+        if self.sparse:
+            tp = self.confusion.diagonal().astype(np.float64)
+            support = np.asarray(self.confusion.sum(axis=1)).ravel().astype(np.float64)
+            predicted = np.asarray(self.confusion.sum(axis=0)).ravel().astype(np.float64)
+        else:
+            tp = np.diag(self.confusion).astype(np.float64)
+            support = self.confusion.sum(axis=1).astype(np.float64)
+            predicted = self.confusion.sum(axis=0).astype(np.float64)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(predicted > 0, tp / predicted, 0.0)
+            recall = np.where(support > 0, tp / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+        present = (support > 0) | (predicted > 0)
+        n = max(self.n_samples, 1)
+        weights = support[present] / max(support[present].sum(), 1)
+        return {
+            "samples": self.n_samples,
+            "accuracy": float(tp.sum() / n),
+            "top_k_accuracy": {f"top_{k}": self.top_k_hits[k] / n for k in self.top_k},
+            "macro_avg": {
+                "precision": float(precision[present].mean()) if present.any() else 0.0,
+                "recall": float(recall[present].mean()) if present.any() else 0.0,
+                "f1": float(f1[present].mean()) if present.any() else 0.0,
+            },
+            "weighted_avg": {
+                "precision": float((precision[present] * weights).sum()),
+                "recall": float((recall[present] * weights).sum()),
+                "f1": float((f1[present] * weights).sum()),
+            },
+            "per_class": {
+                class_names[i]: {"precision": float(precision[i]), "recall": float(recall[i]),
+                                 "f1": float(f1[i]), "support": int(support[i])}
+                for i in np.flatnonzero(present)
+            },
+        }
+
+
+# --- Chunked Scoring ---
+def class_columns(model, label_encoder):
+    """
+    Returns the label-encoder index of every column of ``model.predict_proba``.
+
+    Works for models fitted on encoder indices and on disease names alike.
+
+    Raises:
+        ValueError: If the model predicts a class the encoder does not know.
+    """
+    known = {name: i for i, name in enumerate(label_encoder.classes_)}
+    names = class_names(model, label_encoder)
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Model predicts classes unknown to the label encoder: {unknown[:5]}")
+    return np.asarray([known[name] for name in names], dtype=np.int64)
+
+
+def iter_labeled_chunks(data_path, symptom_names, label_encoder, chunksize=5000):
+    """
+    Streams (X, y) chunks from the dataset CSV as compact float32 features and
+    encoded labels. Rows with diseases unknown to the encoder are skipped.
+    """
+    known = {name: i for i, name in enumerate(label_encoder.classes_)}
+    for chunk in pd.read_csv(data_path, chunksize=chunksize):
+        y = chunk["diseases"].map(known)
+        keep = y.notna().to_numpy()
+        X = chunk.loc[keep, symptom_names].fillna(0).to_numpy(dtype=np.float32)
+        yield X, y[keep].to_numpy(dtype=np.int64)
+
+
+def store_labels(store, label_encoder):
+    """Maps a FeatureStore's label codes onto the label encoder's indices."""
+    known = {name: i for i, name in enumerate(label_encoder.classes_)}
+    missing = [name for name in store.classes if name not in known]
+    if missing:
+        raise ValueError(f"Feature store has diseases unknown to the label encoder: {missing[:5]}")
+    return np.asarray([known[name] for name in store.classes], dtype=np.int64)
+
+
+def feature_columns(store, symptom_names):
+    """Store columns in the model's symptom order, or None when they already match."""
+    if list(store.symptom_names) == list(symptom_names):
+        return None
+    position = {name: i for i, name in enumerate(store.symptom_names)}
+    return np.asarray([position[name] for name in symptom_names], dtype=np.int64)
+
+
+def iter_store_chunks(store, symptom_names, label_encoder, chunksize=5000):
+    """
+    Streams (X, y) chunks of a FeatureStore's held-out split.
+
+    Rows are sliced from the memory map one chunk at a time and labels are
+    mapped onto the label encoder, so the split is never loaded as a whole.
+    """
+    to_encoder = store_labels(store, label_encoder)
+    cols = feature_columns(store, symptom_names)
+    for start in range(0, len(store.y_test), chunksize):
+        X = store.X_test[start:start + chunksize]
+        yield (X if cols is None else X[:, cols]), to_encoder[store.y_test[start:start + chunksize]]
+
+
+def score_chunk(model, columns, X, y, n_classes, top_k=TOP_K_VALUES):
+    """
+    Scores one chunk and returns its partial StreamingEvaluator.
+
+    Args:
+        model: A fitted classifier exposing ``predict_proba``.
+        columns: Label-encoder index of every probability column, from
+            ``class_columns``, so every chunk (and fold) shares one class space.
+        X: The chunk's features.
+        y: The chunk's true label-encoder indices.
+        n_classes: Number of classes of the label encoder.
+        top_k: The k values to count top-k hits for.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        proba = model.predict_proba(X)
+    y_pred = columns[np.argmax(proba, axis=1)]
+
+    # Rank of the true class = number of classes scored strictly higher
+    col_of = np.full(n_classes, -1, dtype=np.int64)
+    col_of[columns] = np.arange(len(columns))
+    col = col_of[y]
+    has_col = col >= 0
+    true_score = np.where(has_col, proba[np.arange(len(y)), np.maximum(col, 0)], -1.0)
+    true_rank = np.where(has_col, (proba > true_score[:, None]).sum(axis=1), len(columns))
+
+    partial = StreamingEvaluator(n_classes, top_k)
+    partial.update(y, y_pred, true_rank)
+    return partial
+
+
+def evaluate_chunks(model, label_encoder, chunks, workers=None):
+    """
+    Evaluates a model on an iterable of labeled (X, y) chunks.
+
+    Chunks are scored on a thread pool; at most two chunks per worker are in
+    flight, so peak memory is bounded by the chunk size rather than the data.
+
+    Returns:
+        The report dict from ``StreamingEvaluator.report``.
+    """
+    workers = workers or os.cpu_count() or 1
+    n_classes = len(label_encoder.classes_)
+    columns = class_columns(model, label_encoder)
+    total = StreamingEvaluator(n_classes)
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for X, y in chunks:
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+            pending.add(pool.submit(score_chunk, model, columns, X, y, n_classes))
+        for future in pending:
+            total.merge(future.result())
+    return total.report([str(c) for c in label_encoder.classes_])
+
+
+def evaluate_streaming(model, label_encoder, symptom_names, data_path, chunksize=5000, workers=None):
+    """Evaluates a model on a held-out CSV without materializing it."""
+    return evaluate_chunks(model, label_encoder,
+                           iter_labeled_chunks(data_path, symptom_names, label_encoder, chunksize), workers)
+
+
+def evaluate_held_out(model, label_encoder, symptom_names, data_path=DATA_PATH, cache_dir=None,
+                      chunksize=5000, workers=None):
+    """
+    Evaluates a model on the test split ``train.py`` holds out of the dataset.
+
+    The split comes from the memory-mapped feature store (built once and
+    cached), which draws it with the training notebook's stratified 80/20
+    split and seed, so the model is scored on rows it was not trained on.
+    """
+    from train import CACHE_DIR, build_feature_store
+
+    store = build_feature_store(data_path, cache_dir or CACHE_DIR)
+    return evaluate_chunks(model, label_encoder,
+                           iter_store_chunks(store, symptom_names, label_encoder, chunksize), workers)
+
+
+# --- Cross-validation ---
+def fit_copy(estimator, X, y):
+    """
+    Fits an unfitted copy of ``estimator`` on (X, y).
+
+    An EnsembleModel is copied member by member, keeping each member's
+    weight and deadline and the ensemble's concurrency, label names and timeout.
+    """
+    from sklearn.base import clone
+
+    from ensemble import EnsembleMember, EnsembleModel
+
+    if isinstance(estimator, EnsembleModel):
+        members = [EnsembleMember(m.name, fit_copy(m.model, X, y), m.weight, m.deadline_ms)
+                   for m in estimator.members]
+        return EnsembleModel(members, estimator.concurrency, estimator.label_names, estimator.timeout_ms)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return clone(estimator).fit(X, y)
+
+
+def _run_fold(estimator, label_encoder, X, y, cols, train_idx, test_idx, chunksize, tmp_dir):
+    # The fold's training rows are gathered chunk by chunk into their own
+    # memory map: sklearn fits on it in place, and the pages stay shared
+    # cache rather than a private copy in every worker.
+    fold_path = os.path.join(tmp_dir, f"fold-{os.getpid()}-{train_idx[0]}-{test_idx[0]}.npy")
+    n_features = X.shape[1] if cols is None else len(cols)
+    X_fold = np.lib.format.open_memmap(fold_path, "w+", X.dtype, (len(train_idx), n_features))
+    for start in range(0, len(train_idx), chunksize):
+        rows = X[train_idx[start:start + chunksize]]
+        X_fold[start:start + len(rows)] = rows if cols is None else rows[:, cols]
+    X_fold.flush()
+    try:
+        model = fit_copy(estimator, X_fold, y[train_idx])
+    finally:
+        del X_fold
+        os.remove(fold_path)
+
+    n_classes = len(label_encoder.classes_)
+    columns = class_columns(model, label_encoder)
+    fold = StreamingEvaluator(n_classes)
+    for start in range(0, len(test_idx), chunksize):
+        idx = test_idx[start:start + chunksize]
+        rows = X[idx]
+        fold.merge(score_chunk(model, columns, rows if cols is None else rows[:, cols], y[idx], n_classes))
+    return fold
+
+
+def cross_validate(estimator, label_encoder, symptom_names, data_path, folds=5, n_jobs=None,
+                   chunksize=5000, seed=42, cache_dir=None):
+    """
+    Runs stratified k-fold CV on the training split, folds trained and scored concurrently.
+
+    The folds are drawn from the training split of the memory-mapped feature
+    store, leaving its test split untouched for ``evaluate_held_out``. The
+    workers share the store's memory map rather than copies of the matrix,
+    and fit on per-fold memory maps written next to it.
+
+    Returns:
+        A dict with the per-fold reports and the pooled report over all folds.
+    """
+    import tempfile
+
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import StratifiedKFold
+
+    from train import CACHE_DIR, build_feature_store
+
+    cache_dir = cache_dir or CACHE_DIR
+    store = build_feature_store(data_path, cache_dir)
+    y = store_labels(store, label_encoder)[store.y_train]
+    cols = feature_columns(store, symptom_names)
+
+    # Stratification needs at least ``folds`` samples per class
+    counts = np.bincount(y, minlength=len(label_encoder.classes_))
+    keep = counts[y] >= folds
+    rows = np.flatnonzero(keep)
+
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    with tempfile.TemporaryDirectory(prefix="cv-", dir=cache_dir) as tmp_dir:
+        results = Parallel(n_jobs=n_jobs or min(folds, os.cpu_count() or 1))(
+            delayed(_run_fold)(estimator, label_encoder, store.X_train, y, cols,
+                               rows[train_idx], rows[test_idx], chunksize, tmp_dir)
+            for train_idx, test_idx in splitter.split(rows, y[rows])
+        )
+
+    names = [str(c) for c in label_encoder.classes_]
+    n_classes = len(label_encoder.classes_)
+    pooled = StreamingEvaluator(n_classes)
+    for fold in results:
+        pooled.merge(fold)
+    fold_reports = [fold.report(names) for fold in results]
+    for report in fold_reports:
+        del report["per_class"]
+    return {"folds": fold_reports, "pooled": pooled.report(names),
+            "dropped_rare_rows": int((~keep).sum())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming evaluation and k-fold CV for the disease model.")
+    parser.add_argument("data", nargs="?",
+                        help="Held-out CSV to evaluate on. Default: the test split train.py holds out of --labels-data.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--labels-data", default=DATA_PATH,
+                        help="Full dataset the label encoder is fitted on (so a held-out split maps to the same codes).")
+    parser.add_argument("--chunksize", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None, help="Scoring threads / concurrent CV folds.")
+    parser.add_argument("--cv", type=int, default=0,
+                        help="Run k-fold CV with fresh copies of the model on the dataset's training split.")
+    parser.add_argument("--cache-dir", default=None, help="Feature store directory (default: train.py's).")
+    parser.add_argument("-o", "--output", default="evaluation_report.json")
+    args = parser.parse_args(argv)
+
+    labels_data = args.labels_data if os.path.exists(args.labels_data) or not args.data else args.data
+    model, label_encoder, symptom_names = load_resources(args.model, labels_data)
+    if args.cv:
+        report = cross_validate(model, label_encoder, symptom_names, args.data or labels_data, args.cv,
+                                args.workers, args.chunksize, cache_dir=args.cache_dir)
+        summary = report["pooled"]
+    elif args.data:
+        report = evaluate_streaming(model, label_encoder, symptom_names, args.data, args.chunksize, args.workers)
+        summary = report
+    else:
+        report = evaluate_held_out(model, label_encoder, symptom_names, labels_data, args.cache_dir,
+                                   args.chunksize, args.workers)
+        summary = report
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Samples: {summary['samples']}")
+    print(f"Accuracy: {summary['accuracy']:.4f}")
+    for name, value in summary["top_k_accuracy"].items():
+        print(f"{name.replace('_', '-').capitalize()} accuracy: {value:.4f}")
+    print(f"Macro F1: {summary['macro_avg']['f1']:.4f}  Weighted F1: {summary['weighted_avg']['f1']:.4f}")
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
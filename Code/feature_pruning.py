@@ -0,0 +1,346 @@
+import argparse
+import copy
+import json
+import os
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from inference import DATA_PATH, MODEL_PATH, build_feature_vector, load_resources
+
+# Linear coefficients at or below this magnitude count as unused
+COEF_TOLERANCE = 1e-12
+DEFAULT_MIN_COUNT = 0
+
+
+# --- Feature Usage ---
+def used_features(model, n_features):
+    """
+    Returns a boolean mask of the features the model actually reads.
+
+    Tree models use a feature only if some split tests it; linear models only
+    if one of its coefficients is nonzero; XGBoost models only if it appears
+    in the booster's split statistics. Ensembles use the union of their
+    members. For unknown model types every feature counts as used.
+    """
+    if hasattr(model, "members"):
+        mask = np.zeros(n_features, dtype=bool)
+        for member in model.members:
+            mask |= used_features(member.model, n_features)
+        return mask
+
+    mask = np.zeros(n_features, dtype=bool)
+    estimators = getattr(model, "estimators_", None)
+    if hasattr(model, "tree_"):
+        estimators = [model]
+    if estimators is not None:
+        for tree in np.ravel(estimators):
+            features = tree.tree_.feature
+            mask[features[features >= 0]] = True
+        return mask
+
+    if hasattr(model, "coef_"):
+        return np.any(np.abs(np.atleast_2d(model.coef_)) > COEF_TOLERANCE, axis=0)
+
+    if hasattr(model, "get_booster"):
+        booster = model.get_booster()
+        names = booster.feature_names or [f"f{i}" for i in range(n_features)]
+        position = {name: i for i, name in enumerate(names)}
+        for name in booster.get_score(importance_type="weight"):
+            mask[position[name]] = True
+        return mask
+
+    return np.ones(n_features, dtype=bool)
+
+
+def symptom_counts(data_path, symptom_names, chunksize=20000):
+    """Counts the rows of the dataset in which each symptom is present, streaming the CSV."""
+    counts = np.zeros(len(symptom_names), dtype=np.int64)
+    dtypes = dict.fromkeys(symptom_names, np.uint8)
+    for chunk in pd.read_csv(data_path, usecols=symptom_names, dtype=dtypes, chunksize=chunksize):
+        counts += (chunk[symptom_names].to_numpy() > 0).sum(axis=0)
+    return counts
+
+
+# --- Feature Map ---
+class FeatureMap:
+    """
+    Maps the full symptom vocabulary onto the compacted one.
+
+    Args:
+        full_names: The original ordered symptom names.
+        keep: Indices (into full_names) of the symptoms that are kept.
+        reasons: Optional dict of pruned symptom name -> why it was pruned.
+    """
+
+    def __init__(self, full_names, keep, reasons=None):
+        self.full_names = list(full_names)
+        self.keep = np.asarray(keep, dtype=np.int64)
+        self.names = [self.full_names[i] for i in self.keep]
+        self.reasons = dict(reasons or {})
+
+    @property
+    def pruned(self):
+        return sorted(self.reasons)
+
+    def transform(self, X):
+        """Selects the kept columns of a full-width dense or sparse feature matrix."""
+        return X[:, self.keep]
+
+    def to_dict(self):
+        return {"full_features": len(self.full_names), "kept_features": len(self.names),
+                "kept": self.names, "pruned": self.reasons}
+
+
+def select_features(model, symptom_names, counts=None, min_count=DEFAULT_MIN_COUNT):
+    """
+    Decides which symptoms to keep.
+
+    A symptom is pruned when the model never reads it, or when it appears in
+    fewer than ``min_count`` dataset rows (if counts are given).
+
+    Returns:
+        A FeatureMap.
+    """
+    used = used_features(model, len(symptom_names))
+    reasons = {}
+    for i, name in enumerate(symptom_names):
+        if not used[i]:
+            reasons[name] = "unused by model"
+        elif counts is not None and counts[i] < min_count:
+            reasons[name] = f"present in {int(counts[i])} rows (< {min_count})"
+    keep = [i for i, name in enumerate(symptom_names) if name not in reasons]
+    return FeatureMap(symptom_names, keep, reasons)
+
+
+# --- Compaction ---
+def _compact_tree(tree, new_index, n_kept):
+    """Rebuilds a fitted sklearn Tree whose split features are renumbered into the reduced space."""
+    cls, args, state = tree.__reduce__()
+    nodes = state["nodes"].copy()
+    internal = nodes["feature"] >= 0
+    nodes["feature"][internal] = new_index[nodes["feature"][internal]]
+    compact = cls(n_kept, *args[1:])
+    compact.__setstate__(dict(state, nodes=nodes))
+    return compact
+
+
+def _set_feature_attrs(model, feature_map):
+    # The kept names travel with the model, so every loader (server, GUIs,
+    # daemon) builds its input vectors in the compact vocabulary
+    model.n_features_in_ = len(feature_map.names)
+    model.feature_names_in_ = np.asarray(feature_map.names, dtype=object)
+
+
+def compact_model(model, feature_map):
+    """
+    Returns a copy of a fitted model that takes only the kept features.
+
+    Linear models keep the matching coefficient columns. Tree models have
+    their split features renumbered, which is exact as long as no pruned
+    feature is used by a split. Ensembles compact every member.
+
+    Raises:
+        ValueError: If the model type cannot be compacted in place, or a
+            pruned feature is still used by a tree; refit it instead.
+    """
+    keep = feature_map.keep
+    if hasattr(model, "members"):
+        from ensemble import EnsembleMember, EnsembleModel
+
+        return EnsembleModel([EnsembleMember(m.name, compact_model(m.model, feature_map), m.weight, m.deadline_ms)
+                              for m in model.members], model.concurrency, model.label_names, model.timeout_ms)
+
+    estimators = getattr(model, "estimators_", None)
+    if hasattr(model, "tree_") or estimators is not None:
+        if used_features(model, len(feature_map.full_names))[np.setdiff1d(
+                np.arange(len(feature_map.full_names)), keep)].any():
+            raise ValueError("Pruned symptoms are used by the tree splits; refit on the kept symptoms instead.")
+        new_index = np.full(len(feature_map.full_names), -1, dtype=np.int64)
+        new_index[keep] = np.arange(len(keep))
+        compact = copy.deepcopy(model)
+        trees = [compact] if hasattr(compact, "tree_") else list(np.ravel(compact.estimators_))
+        for tree in trees:
+            tree.tree_ = _compact_tree(tree.tree_, new_index, len(keep))
+            _set_feature_attrs(tree, feature_map)
+        _set_feature_attrs(compact, feature_map)
+        return compact
+
+    if hasattr(model, "coef_"):
+        compact = copy.deepcopy(model)
+        compact.coef_ = np.ascontiguousarray(np.atleast_2d(model.coef_)[:, keep]).reshape(
+            model.coef_.shape[:-1] + (len(keep),))
+        _set_feature_attrs(compact, feature_map)
+        return compact
+
+    raise ValueError(f"Cannot compact a {type(model).__name__} in place; refit it on the kept symptoms.")
+
+
+def refit_compact(model, X, y, feature_names):
+    """
+    Fits a fresh copy of ``model`` (or of every ensemble member) on X.
+
+    X holds only the kept symptoms, in the order of ``feature_names``; it is
+    fitted as a DataFrame so the model records them in ``feature_names_in_``.
+    """
+    from evaluate import fit_copy
+
+    return fit_copy(model, pd.DataFrame(X, columns=list(feature_names), copy=False), y)
+
+
+# --- Report ---
+def _measure(model, label_encoder, symptom_names, X, y, samples, repeats=200):
+    from evaluate import class_columns
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        accuracy = None
+        if len(y):
+            predicted = class_columns(model, label_encoder)[np.argmax(model.predict_proba(X), axis=1)]
+            accuracy = float((predicted == y).mean())
+
+        # Single-request latency: build the vector from names, then score it
+        timings = []
+        for i in range(repeats):
+            selected = samples[i % len(samples)]
+            start = time.perf_counter()
+            row, _ = build_feature_vector(selected, symptom_names)
+            model.predict_proba(row)
+            timings.append((time.perf_counter() - start) * 1000.0)
+
+        start = time.perf_counter()
+        model.predict_proba(X)
+        batch_s = time.perf_counter() - start
+
+    return {
+        "features": len(symptom_names),
+        "accuracy": accuracy,
+        "single_latency_ms": {"p50": float(np.percentile(timings, 50)), "p99": float(np.percentile(timings, 99))},
+        "batch_rows_per_s": len(X) / batch_s if batch_s else None,
+    }
+
+
+def compare(model, compact, feature_map, label_encoder, X, y, repeats=200):
+    """
+    Measures accuracy, single-row latency and batch throughput of the full
+    and the compacted model on the same held-out rows (y are label-encoder
+    indices; predictions are mapped through each model's ``classes_``).
+
+    Returns:
+        A dict with "before" and "after" measurements.
+    """
+    full_names = feature_map.full_names
+    samples = [[full_names[j] for j in np.flatnonzero(row)] for row in X[:repeats]] or [[]]
+    return {
+        "before": _measure(model, label_encoder, full_names, X, y, samples, repeats),
+        # Requests still name symptoms from the full vocabulary; pruned ones are simply ignored
+        "after": _measure(compact, label_encoder, feature_map.names, feature_map.transform(X), y, samples, repeats),
+    }
+
+
+def load_eval_rows(data_path, symptom_names, label_encoder, max_rows=20000, seed=42, chunksize=20000):
+    """
+    Draws a uniform random sample of up to ``max_rows`` labelled rows as float32 features.
+
+    The CSV is streamed in chunks; every row gets a random key and only the
+    ``max_rows`` smallest keys are kept, so at most the sample plus one
+    chunk is ever in memory.
+    """
+    from evaluate import iter_labeled_chunks
+
+    rng = np.random.default_rng(seed)
+    keys = np.empty(0)
+    X = np.empty((0, len(symptom_names)), dtype=np.float32)
+    y = np.empty(0, dtype=np.int64)
+    for X_chunk, y_chunk in iter_labeled_chunks(data_path, symptom_names, label_encoder, chunksize):
+        keys = np.concatenate([keys, rng.random(len(y_chunk))])
+        X = np.concatenate([X, X_chunk])
+        y = np.concatenate([y, y_chunk])
+        if len(keys) > max_rows:
+            sample = np.argpartition(keys, max_rows)[:max_rows]
+            keys, X, y = keys[sample], X[sample], y[sample]
+    order = np.argsort(keys)
+    return X[order], y[order]
+
+
+def store_rows(store, symptom_names, label_encoder, split="train", max_rows=None, seed=42):
+    """
+    Reads a split of the training FeatureStore in the order of ``symptom_names``.
+
+    Only the requested columns (and, with ``max_rows``, a random sample of
+    rows) are read from the memory map.
+
+    Returns:
+        A tuple (X, y) with float32 features and label-encoder indices.
+    """
+    from evaluate import store_labels
+
+    X = store.X_train if split == "train" else store.X_test
+    y = store.y_train if split == "train" else store.y_test
+    rows = np.arange(len(y))
+    if max_rows is not None and len(y) > max_rows:
+        rows = np.sort(np.random.default_rng(seed).choice(len(y), max_rows, replace=False))
+    position = {name: i for i, name in enumerate(store.symptom_names)}
+    cols = [position[name] for name in symptom_names]
+    return X[np.ix_(rows, cols)], store_labels(store, label_encoder)[y[rows]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prune symptoms the model never uses and export a compact model.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--min-count", type=int, default=DEFAULT_MIN_COUNT,
+                        help="Also prune symptoms present in fewer dataset rows than this.")
+    parser.add_argument("--refit", action="store_true",
+                        help="Refit on the kept symptoms of train.py's training split instead of compacting "
+                             "the fitted model; the comparison then uses the held-out split.")
+    parser.add_argument("--eval-rows", type=int, default=20000)
+    parser.add_argument("--cache-dir", default=None, help="Feature store directory for --refit (default: train.py's).")
+    parser.add_argument("-o", "--output", help="Compact model path (default: <model>_compact.joblib).")
+    parser.add_argument("--report", default="pruning_report.json")
+    args = parser.parse_args(argv)
+
+    model, label_encoder, symptom_names = load_resources(args.model, args.data)
+    has_data = args.data and os.path.exists(args.data)
+    counts = symptom_counts(args.data, symptom_names) if has_data and args.min_count else None
+    feature_map = select_features(model, symptom_names, counts, args.min_count)
+    print(f"Keeping {len(feature_map.names)} of {len(symptom_names)} symptoms "
+          f"({len(feature_map.pruned)} pruned).")
+
+    if args.refit:
+        if not has_data:
+            parser.error("--refit needs the dataset.")
+        from train import CACHE_DIR, build_feature_store
+
+        store = build_feature_store(args.data, args.cache_dir or CACHE_DIR)
+        X_train, y_train = store_rows(store, feature_map.names, label_encoder)
+        compact = refit_compact(model, X_train, y_train, feature_map.names)
+        del X_train, y_train
+        X, y = store_rows(store, symptom_names, label_encoder, "test", args.eval_rows)
+    else:
+        compact = compact_model(model, feature_map)
+        X, y = load_eval_rows(args.data, symptom_names, label_encoder, args.eval_rows) if has_data \
+            else (np.zeros((0, len(symptom_names)), dtype=np.float32), np.zeros(0, dtype=np.int64))
+
+    output = args.output or os.path.splitext(args.model)[0] + "_compact.joblib"
+    joblib.dump(compact, output)
+
+    report = {"model": args.model, "output": output, "method": "refit" if args.refit else "compact",
+              "min_count": args.min_count, "feature_map": feature_map.to_dict()}
+    if len(y):
+        report.update(compare(model, compact, feature_map, label_encoder, X, y))
+        for stage in ("before", "after"):
+            r = report[stage]
+            acc = f"{r['accuracy']:.4f}" if r["accuracy"] is not None else "n/a"
+            print(f"{stage:<7} {r['features']:4d} symptoms  accuracy {acc}  "
+                  f"p50 {r['single_latency_ms']['p50']:.3f} ms  {r['batch_rows_per_s']:.0f} rows/s")
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Compact model written to {output}; report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import LabelEncoder
+
+# The artifact paths are shared with the GUIs and the daemon; kept importable from here too
+from paths import BASE_DIR, DATA_PATH, MODEL_PATH, PRECAUTIONS_PATH
+
+# --- Configuration ---
+TOP_K = 5
+
+
+# --- Loading ---
+def load_model(model_path, label_names=None):
+    """
+    Loads a model artifact: a joblib file, or a JSON ensemble manifest
+    (see ``ensemble.load_ensemble``) combining several models. An ensemble's
+    members are aligned on ``label_names``, the label encoder's diseases.
+    """
+    if model_path.lower().endswith(".json"):
+        from ensemble import load_ensemble
+        return load_ensemble(model_path, label_names)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return joblib.load(model_path)
+
+
+def model_artifact_paths(model_path):
+    """Lists every file a model artifact consists of (the manifest plus its members)."""
+    if model_path.lower().endswith(".json"):
+        from ensemble import manifest_member_paths
+        return [model_path] + manifest_member_paths(model_path)
+    return [model_path]
+
+
+def fit_label_encoder(data_path=DATA_PATH):
+    """
+    Fits the disease LabelEncoder on the dataset's ``diseases`` column.
+
+    This encoder defines the label space of every model: training scripts fit
+    on its indices and the server, GUIs and daemon map predictions back
+    through it. It is cheap to rebuild, so no encoder artifact is saved.
+    """
+    return LabelEncoder().fit(pd.read_csv(data_path, usecols=["diseases"])["diseases"])
+
+
+def load_resources(model_path=MODEL_PATH, data_path=DATA_PATH):
+    """
+    Loads the trained model, the disease label encoder and the ordered symptom names.
+
+    The symptom order is taken from the model itself when it was fitted on a
+    DataFrame (``feature_names_in_``), otherwise from the dataset columns. The
+    label encoder is fitted on the dataset's ``diseases`` column; models are
+    trained on its indices (see ``fit_label_encoder``). Without the dataset it
+    falls back to the model's own classes.
+
+    Args:
+        model_path: Path to the joblib model artifact or ensemble manifest.
+        data_path: Path to the cleaned symptoms/diseases CSV.
+
+    Returns:
+        A tuple (model, label_encoder, symptom_names).
+    """
+    label_encoder = LabelEncoder()
+    symptom_names = []
+    if data_path and os.path.exists(data_path):
+        header = pd.read_csv(data_path, nrows=0).columns.tolist()
+        symptom_names = [c for c in header if c != "diseases"]
+        label_encoder = fit_label_encoder(data_path)
+        model = load_model(model_path, label_encoder.classes_)
+    else:
+        model = load_model(model_path)
+        label_encoder.fit(model.classes_)
+
+    if hasattr(model, "feature_names_in_"):
+        symptom_names = [str(name) for name in model.feature_names_in_]
+
+    return model, label_encoder, symptom_names
+
+
+def load_precautions(path=PRECAUTIONS_PATH):
+    """
+    Loads the local precaution table keyed by lower-cased disease name.
+
+    Returns:
+        A dict mapping disease name to its precaution text (empty if the file is missing).
+    """
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path)
+    return {str(name).strip().lower(): str(text) for name, text in zip(df.iloc[:, 0], df.iloc[:, 1])}
+
+
+# --- Feature Vectors ---
+def build_feature_vector(selected_symptoms, symptom_names):
+    """
+    Builds a single binary feature row from a list of symptom names.
+
+    Args:
+        selected_symptoms: Iterable of symptom names (unknown names are ignored).
+        symptom_names: The ordered symptom vocabulary of the model.
+
+    Returns:
+        A tuple (row, unknown) where row is a (1, n_features) array and unknown
+        lists the names that are not part of the vocabulary.
+    """
+    index = {name: i for i, name in enumerate(symptom_names)}
+    row = np.zeros((1, len(symptom_names)), dtype=np.float32)
+    unknown = []
+    for symptom in selected_symptoms:
+        i = index.get(symptom)
+        if i is None:
+            unknown.append(symptom)
+        else:
+            row[0, i] = 1
+    return row, unknown
+
+
+def sparse_feature_rows(indptr, indices, n_features):
+    """
+    Builds a binary CSR feature matrix from per-row symptom indices.
+
+    Most patients report a handful of symptoms out of hundreds, so the sparse
+    layout avoids materializing mostly-zero dense rows for batch prediction.
+
+    Args:
+        indptr: Row pointer array of length n_rows + 1.
+        indices: Symptom indices of all rows, concatenated.
+        n_features: Size of the symptom vocabulary.
+
+    Returns:
+        A scipy.sparse CSR matrix of shape (n_rows, n_features).
+    """
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, n_features))
+
+
+def class_names(model, label_encoder):
+    """Returns the disease name of every column of ``model.predict_proba``."""
+    classes = np.asarray(model.classes_)
+    if np.issubdtype(classes.dtype, np.integer):
+        return [str(name) for name in label_encoder.inverse_transform(classes)]
+    return [str(c) for c in classes]
+
+
+# --- Prediction ---
+def predict_top_k(model, label_encoder, X, k=TOP_K):
+    """
+    Predicts the k most likely diseases for each row of X.
+
+    Args:
+        model: A fitted classifier exposing ``predict_proba``.
+        label_encoder: The LabelEncoder fitted on the disease names.
+        X: A 2D feature array (one row per patient).
+        k: Number of diseases to return per row.
+
+    Returns:
+        A tuple (results, proba) where results holds, for every row, a list of
+        (disease, confidence_percentage) sorted from most to least likely.
+    """
+    proba = model.predict_proba(X)
+    names = class_names(model, label_encoder)
+    k = min(k, proba.shape[1])
+    top = np.argpartition(-proba, k - 1, axis=1)[:, :k]
+    results = []
+    for r, cols in enumerate(top):
+        cols = cols[np.argsort(-proba[r, cols])]
+        results.append([(names[c], float(proba[r, c]) * 100.0) for c in cols])
+    return results, proba
+
+
+# --- GUI Support ---
+def load_gui_resources(expected_symptoms=None, model_path=MODEL_PATH, data_path=DATA_PATH):
+    """
+    Loads what a GUI needs to predict in-process (see ``load_resources``).
+
+    Args:
+        expected_symptoms: The symptoms the GUI's checkboxes were built from,
+            when it falls back from the inference daemon mid-session.
+
+    Returns:
+        A tuple (model, label_encoder, symptom_names).
+
+    Raises:
+        ValueError: If the model takes other symptoms than ``expected_symptoms``.
+    """
+    model, label_encoder, symptom_names = load_resources(model_path, data_path)
+    if expected_symptoms is not None and symptom_names != list(expected_symptoms):
+        raise ValueError(f"{model_path} takes different symptoms than the inference daemon's model.")
+    return model, label_encoder, symptom_names
+
+
+def predict_symptom_values(model, label_encoder, symptoms, k=TOP_K):
+    """
+    Predicts from a GUI's 0/1 value per symptom.
+
+    A model without ``predict_proba`` reports its prediction at 100%. If the
+    probabilities cannot be computed the prediction is still returned, with
+    no confidences.
+
+    Returns:
+        A tuple (predicted_disease, {disease: confidence_pct} over the k most
+        likely diseases, or None).
+    """
+    X = np.asarray(symptoms, dtype=np.float32).reshape(1, -1)
+    has_proba = hasattr(model, "predict_proba")
+    if has_proba:
+        try:
+            results, _ = predict_top_k(model, label_encoder, X, k)
+            return results[0][0][0], dict(results[0])
+        except Exception as e:
+            print(f"Could not get confidence scores: {e}")
+    label = np.asarray(model.predict(X))[:1]
+    if np.issubdtype(label.dtype, np.integer):
+        label = label_encoder.inverse_transform(label)
+    predicted = str(label[0])
+    return predicted, None if has_proba else {predicted: 100.0}
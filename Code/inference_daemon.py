@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from audit_log import audit_log_from_env
+from contributions import top_symptom_contributions
+from daemon_client import (OP_HELLO, OP_PREDICT, PROTOCOL_VERSION, SOCKET_PATH, STATUS_OK, decode_predict,
+                           encode_error, encode_predict, encode_prediction, recv_frame, send_frame)
+from inference import class_names
+from model_registry import ModelRegistry
+from paths import AUDIT_LOG_DIR, DATA_PATH, MODEL_PATH
+
+
+# --- Prediction ---
+class WarmPredictor:
+    """
+    Answers daemon requests from the registry's current model bundle.
+
+    Probabilities are reported in label-encoder order, which stays fixed
+    across hot reloads, so clients can keep the disease list from HELLO.
+    """
+
+    def __init__(self, registry, audit_log=None):
+        self.registry = registry
+        self.audit_log = audit_log
+        self._lookups = {}
+
+    def hello(self):
+        bundle = self.registry.current
+        engine = bundle.contribution_engine
+        metadata = {"model_version": bundle.version, "symptoms": bundle.symptom_names,
+                    "diseases": [str(d) for d in bundle.label_encoder.classes_],
+                    "contribution_units": getattr(engine, "units", None)}
+        return bytes([STATUS_OK, PROTOCOL_VERSION]) + json.dumps(metadata).encode("utf-8")
+
+    def _lookup(self, bundle):
+        # Per model version: label-encoder index of every predict_proba column, and symptom name -> index
+        lookup = self._lookups.get(bundle.version)
+        if lookup is None:
+            known = {name: i for i, name in enumerate(str(d) for d in bundle.label_encoder.classes_)}
+            columns = np.asarray([known[name] for name in class_names(bundle.model, bundle.label_encoder)])
+            lookup = (columns, {name: i for i, name in enumerate(bundle.symptom_names)})
+            self._lookups = {bundle.version: lookup}
+        return lookup
+
+    def predict(self, payload):
+        indices, top_k, top_contributions = decode_predict(payload)
+        bundle = self.registry.current
+        X = np.zeros((1, len(bundle.symptom_names)), dtype=np.float32)
+        X[0, [i for i in indices if i < X.shape[1]]] = 1
+
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            proba = bundle.model.predict_proba(X)[0]
+        latency_ms = (time.perf_counter() - start) * 1000.0
+
+        order = np.argsort(-proba)
+        if top_k:
+            order = order[:top_k]
+        columns, symptom_index = self._lookup(bundle)
+        ranked = [(int(columns[c]), float(proba[c]) * 100.0) for c in order]
+
+        contributions = []
+        if top_contributions and bundle.contribution_engine is not None and indices:
+            # Explain the top class from the probabilities above instead of predicting again
+            drivers = top_symptom_contributions(bundle.contribution_engine, X, bundle.symptom_names,
+                                                top_contributions, class_indices=[int(order[0])])[0]
+            contributions = [(symptom_index[name], float(value)) for name, value in drivers]
+
+        if self.audit_log is not None:
+            names = bundle.label_encoder.classes_
+            self.audit_log.record([bundle.symptom_names[i] for i in indices if i < X.shape[1]],
+                                  [(names[i], pct) for i, pct in ranked[:5]], bundle.version, latency_ms,
+                                  source="daemon")
+        return encode_prediction(ranked, contributions)
+
+
+# --- Server ---
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        predictor = self.server.predictor
+        while True:
+            try:
+                payload = recv_frame(self.request)
+            except (OSError, ConnectionError):
+                return
+            try:
+                if payload[0] == OP_PREDICT:
+                    response = predictor.predict(payload)
+                elif payload[0] == OP_HELLO:
+                    response = predictor.hello()
+                else:
+                    response = encode_error(f"unknown opcode {payload[0]}")
+            except Exception as e:
+                response = encode_error(e)
+            try:
+                send_frame(self.request, response)
+            except OSError:
+                return
+
+
+class InferenceDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix-socket server; one thread per connected GUI."""
+
+    daemon_threads = True
+
+    def __init__(self, path, predictor):
+        self.predictor = predictor
+        _remove_stale_socket(path)
+        # Only the current user may talk to the daemon. The socket file is
+        # created owner-only by bind itself; a chmod afterwards would leave a
+        # window in which other users could connect.
+        old_umask = os.umask(0o077)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+
+def _remove_stale_socket(path):
+    """Deletes a socket file left by a daemon that is no longer running."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"Another inference daemon is already listening on {path}.")
+    finally:
+        probe.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the disease model warm behind a local Unix socket.")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between model file checks.")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry.from_path(args.model, args.data, args.poll_interval)
+    registry.start_watching()
+    predictor = WarmPredictor(registry)
+    # Warm up the prediction path before accepting connections (and before auditing)
+    predictor.predict(encode_predict([], 0, 5))
+    audit_log = audit_log_from_env(AUDIT_LOG_DIR)
+    predictor.audit_log = audit_log
+
+    server = InferenceDaemon(args.socket, predictor)
+    # Shut down cleanly (removing the socket file) on SIGTERM as well as Ctrl+C;
+    # signal handlers can only be installed from the main thread
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"Inference daemon (model {registry.current.version}) listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        registry.stop_watching()
+        if audit_log is not None:
+            audit_log.close()
+
+
+if __name__ == "__main__":
+    main()
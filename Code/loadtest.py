@@ -0,0 +1,307 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from inference import DATA_PATH, MODEL_PATH, load_resources
+
+# --- Workload Mix ---
+# Share of requests per endpoint; the rest of the workload is deterministic
+# for a given seed so runs can be compared across code or host changes.
+DEFAULT_MIX = {"predict": 0.8, "catalog": 0.1, "typeahead": 0.1}
+MIN_SYMPTOMS = 2
+MAX_SYMPTOMS = 6
+
+
+def stub_precaution_provider(latency_ms=0.0):
+    """
+    Returns a local stand-in for the remote precaution provider so load tests
+    never call out to external APIs; an optional fixed delay mimics its latency.
+    """
+    def provider(disease_name):
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+        return f"Precautions for {disease_name} (stubbed for load testing)."
+    return provider
+
+
+def realistic_symptom_sets(symptom_names, data_path=None, n_profiles=2000, seed=42):
+    """
+    Builds a pool of symptom sets to send to ``/predict``.
+
+    When the dataset is available, sets are taken from real rows (randomly
+    thinned to MAX_SYMPTOMS) and named by the dataset's own columns, which
+    need not match the server's vocabulary order or size (e.g. a pruned
+    model); otherwise they are drawn from ``symptom_names``.
+    """
+    rng = random.Random(seed)
+    if data_path and os.path.exists(data_path):
+        df = pd.read_csv(data_path, nrows=50000)
+        columns = [c for c in df.columns if c != "diseases"]
+        X = df[columns].to_numpy() > 0
+        rows = [row for row in X[np.any(X, axis=1)]]
+        profiles = []
+        for _ in range(n_profiles):
+            present = np.flatnonzero(rng.choice(rows))
+            k = min(len(present), rng.randint(MIN_SYMPTOMS, MAX_SYMPTOMS))
+            profiles.append([columns[i] for i in rng.sample(list(present), k)])
+        return profiles
+    return [rng.sample(symptom_names, rng.randint(MIN_SYMPTOMS, MAX_SYMPTOMS)) for _ in range(n_profiles)]
+
+
+def build_workload(symptom_names, n_requests, mix=DEFAULT_MIX, data_path=None, seed=42):
+    """
+    Creates the ordered list of requests to replay.
+
+    Returns:
+        A list of (endpoint_label, method, path, body_bytes_or_None).
+    """
+    rng = random.Random(seed)
+    profiles = realistic_symptom_sets(symptom_names, data_path, seed=seed)
+    kinds, weights = zip(*mix.items())
+    workload = []
+    for _ in range(n_requests):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "predict":
+            body = json.dumps({"symptoms": rng.choice(profiles)}).encode("utf-8")
+            workload.append(("POST /predict", "POST", "/predict", body))
+        elif kind == "catalog":
+            workload.append(("GET /symptoms", "GET", "/symptoms", None))
+        else:
+            name = rng.choice(symptom_names)
+            # Typeahead prefixes of 2-6 characters, or the whole name when it is shorter
+            prefix = name[:rng.randint(min(2, len(name)), min(6, len(name)))]
+            workload.append(("GET /symptoms?q=", "GET", f"/symptoms?q={quote(prefix)}", None))
+    return workload
+
+
+# --- Client ---
+class _Client(threading.local):
+    """One keep-alive HTTP connection per worker thread."""
+
+    def __init__(self, host, port):
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+
+
+def _send(client, method, path, body, bust_cache=False):
+    headers = {"Accept-Encoding": "gzip"}
+    if body is not None:
+        headers["Content-Type"] = "application/json"
+    if bust_cache and method == "POST":
+        # Ask the server to skip its prediction cache so every request runs inference
+        headers["Cache-Control"] = "no-cache"
+    try:
+        client.conn.request(method, path, body=body, headers=headers)
+        response = client.conn.getresponse()
+        response.read()
+        return response.status < 400
+    except (OSError, http.client.HTTPException):
+        client.conn.close()
+        return False
+
+
+def run_load(base_url, workload, concurrency=8, mode="closed", rate=100.0, seed=42, bust_cache=False):
+    """
+    Replays the workload against a running server.
+
+    In closed-loop mode each of ``concurrency`` workers sends its next request
+    as soon as the previous one returns. In open-loop mode requests arrive as
+    a Poisson process at ``rate`` per second regardless of how fast the server
+    answers; latency is measured from the scheduled arrival time so queueing
+    delay is not hidden. With ``bust_cache`` prediction requests carry
+    ``Cache-Control: no-cache`` so repeated profiles measure inference rather
+    than prediction-cache hits.
+
+    Returns:
+        A tuple (samples, elapsed) with (endpoint_label, latency_s, ok) per request.
+    """
+    parts = urlsplit(base_url)
+    client = _Client(parts.hostname, parts.port or 80)
+    samples = [None] * len(workload)
+
+    def fire(i, scheduled=None):
+        label, method, path, body = workload[i]
+        start = time.perf_counter() if scheduled is None else scheduled
+        ok = _send(client, method, path, body, bust_cache)
+        samples[i] = (label, time.perf_counter() - start, ok)
+
+    begin = time.perf_counter()
+    if mode == "closed":
+        counter = iter(range(len(workload)))
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                fire(i)
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        rng = random.Random(seed)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            arrival = begin
+            for i in range(len(workload)):
+                arrival += rng.expovariate(rate)
+                delay = arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(fire, i, arrival)
+    return samples, time.perf_counter() - begin
+
+
+def summarize(samples, elapsed):
+    """Aggregates throughput, latency percentiles and error rate per endpoint."""
+    report = {}
+    labels = sorted({s[0] for s in samples})
+    for label in labels + ["all"]:
+        subset = [s for s in samples if label == "all" or s[0] == label]
+        lat_ms = np.array([s[1] for s in subset]) * 1000.0
+        errors = sum(1 for s in subset if not s[2])
+        report[label] = {
+            "requests": len(subset),
+            "errors": errors,
+            "error_rate": errors / len(subset),
+            "throughput_rps": len(subset) / elapsed,
+            "latency_ms": {
+                "mean": float(lat_ms.mean()),
+                "p50": float(np.percentile(lat_ms, 50)),
+                "p90": float(np.percentile(lat_ms, 90)),
+                "p99": float(np.percentile(lat_ms, 99)),
+                "max": float(lat_ms.max()),
+            },
+        }
+    return report
+
+
+# --- In-process Server ---
+def limit_workers(app, workers):
+    """
+    Wraps a WSGI app so at most ``workers`` requests are handled at once,
+    modelling a pool of synchronous server workers.
+    """
+    slots = threading.BoundedSemaphore(workers)
+
+    def wrapped(environ, start_response):
+        with slots:
+            return list(app(environ, start_response))
+
+    return wrapped
+
+
+def start_local_server(model_path, data_path, workers=4, precaution_latency_ms=0.0, prediction_cache_size=0):
+    """
+    Starts the prediction server on an ephemeral localhost port with the
+    precaution provider stubbed out and ``workers`` request-handling slots.
+    The prediction cache is off unless ``prediction_cache_size`` is set.
+
+    Returns:
+        A tuple (base_url, server) where ``server.shutdown()`` stops it.
+    """
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    from server import create_app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    model, label_encoder, symptom_names = load_resources(model_path, data_path)
+    app = create_app(model, label_encoder, symptom_names,
+                     precaution_provider=stub_precaution_provider(precaution_latency_ms),
+                     prediction_cache_size=prediction_cache_size)
+    server = make_server("127.0.0.1", 0, limit_workers(app, workers), threaded=True,
+                         request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def fetch_symptom_names(base_url):
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    conn.request("GET", "/symptoms")
+    return json.loads(conn.getresponse().read())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local load test for the disease prediction server.")
+    parser.add_argument("--url", help="Target an already running local server instead of starting one in-process.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Client-side concurrent connections.")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Request-handling workers of the in-process server.")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--rate", type=float, default=200.0, help="Arrival rate (req/s) for open-loop mode.")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--precaution-latency-ms", type=float, default=0.0)
+    parser.add_argument("--prediction-cache", type=int, default=0,
+                        help="Prediction cache size of the in-process server (default: off).")
+    parser.add_argument("--bust-cache", action="store_true",
+                        help="Send Cache-Control: no-cache so /predict bypasses the server's prediction cache.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", default="loadtest_report.json")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        base_url = args.url
+    else:
+        base_url, server = start_local_server(args.model, args.data, args.workers, args.precaution_latency_ms,
+                                              args.prediction_cache)
+
+    try:
+        symptom_names = fetch_symptom_names(base_url)
+        workload = build_workload(symptom_names, args.requests, data_path=args.data, seed=args.seed)
+        if args.warmup:
+            run_load(base_url, workload[:args.warmup], concurrency=args.concurrency, bust_cache=args.bust_cache)
+        samples, elapsed = run_load(base_url, workload, args.concurrency, args.mode, args.rate, args.seed,
+                                    args.bust_cache)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    report = {
+        "config": {
+            "url": args.url or "in-process",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "server_workers": None if args.url else args.workers,
+            "prediction_cache": None if args.url else args.prediction_cache,
+            "mode": args.mode,
+            "rate": args.rate if args.mode == "open" else None,
+            "seed": args.seed,
+            "precaution_latency_ms": args.precaution_latency_ms,
+            "bust_cache": args.bust_cache,
+            "cpu_count": os.cpu_count(),
+        },
+        "elapsed_s": elapsed,
+        "endpoints": summarize(samples, elapsed),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for label, stats in report["endpoints"].items():
+        lat = stats["latency_ms"]
+        print(f"{label:<18} {stats['throughput_rps']:8.1f} req/s  p50 {lat['p50']:7.2f} ms  "
+              f"p99 {lat['p99']:7.2f} ms  errors {stats['error_rate']:.2%}")
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
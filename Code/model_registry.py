@@ -0,0 +1,188 @@
+import hashlib
+import os
+import threading
+import warnings
+
+import numpy as np
+
+from contributions import build_contribution_engine
+from inference import load_model, load_resources, model_artifact_paths
+from symptom_index import SymptomCatalog
+
+
+# --- Model Bundle ---
+class ModelBundle:
+    """
+    An immutable snapshot of everything one model version needs to serve a
+    request. Handlers read ``registry.current`` once and use that bundle until
+    they finish, so a swap never changes the model under an in-flight request.
+    """
+
+    def __init__(self, version, model, label_encoder, symptom_names, path=None):
+        self.version = version
+        self.model = model
+        self.label_encoder = label_encoder
+        self.symptom_names = list(symptom_names)
+        self.path = path
+        # Derived per-version state is built here, before the bundle is published
+        self.contribution_engine = build_contribution_engine(model)
+        self.catalog = SymptomCatalog(self.symptom_names)
+
+
+def file_version(path):
+    """Returns a short content hash of a model artifact (all its files), used as its version."""
+    digest = hashlib.sha1()
+    for part in model_artifact_paths(path):
+        with open(part, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def validate_model(model, label_encoder, symptom_names):
+    """
+    Checks that a candidate model can serve the current symptom vocabulary.
+
+    The feature order must match the vocabulary exactly, its classes must be
+    known to the label encoder, and a smoke prediction must return a finite
+    probability distribution.
+
+    Raises:
+        ValueError: If any check fails.
+    """
+    features = getattr(model, "feature_names_in_", None)
+    if features is not None:
+        if [str(f) for f in features] != list(symptom_names):
+            raise ValueError("Feature order of the new model does not match the symptom vocabulary.")
+    elif getattr(model, "n_features_in_", len(symptom_names)) != len(symptom_names):
+        raise ValueError(f"New model expects {model.n_features_in_} features, "
+                         f"the vocabulary has {len(symptom_names)}.")
+
+    classes = np.asarray(model.classes_)
+    known = np.asarray(label_encoder.classes_)
+    if np.issubdtype(classes.dtype, np.integer):
+        if classes.min() < 0 or classes.max() >= len(known):
+            raise ValueError("New model predicts classes unknown to the label encoder.")
+    elif not np.isin(classes, known).all():
+        raise ValueError("New model predicts diseases unknown to the label encoder.")
+
+    smoke = np.zeros((2, len(symptom_names)), dtype=np.float32)
+    smoke[1, :min(3, len(symptom_names))] = 1
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        proba = model.predict_proba(smoke)
+    if proba.shape != (2, len(classes)) or not np.isfinite(proba).all() \
+            or not np.allclose(proba.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("Smoke prediction of the new model returned an invalid distribution.")
+
+
+# --- Registry ---
+class ModelRegistry:
+    """
+    Holds the live ModelBundle and hot-swaps it when the artifact on disk changes.
+
+    A background thread polls the artifact; a changed file is loaded,
+    validated and fully warmed up off the request path, then published with
+    a single reference assignment. Listeners are notified after each swap so
+    caches keyed by the old version can be dropped.
+    """
+
+    def __init__(self, bundle, data_path=None, poll_interval=2.0):
+        self._bundle = bundle
+        self.data_path = data_path
+        self.poll_interval = poll_interval
+        self._listeners = []
+        self._stat = self._stat_of(bundle.path)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_path(cls, model_path, data_path=None, poll_interval=2.0):
+        model, label_encoder, symptom_names = load_resources(model_path, data_path)
+        bundle = ModelBundle(file_version(model_path), model, label_encoder, symptom_names, model_path)
+        return cls(bundle, data_path, poll_interval)
+
+    @classmethod
+    def from_objects(cls, model, label_encoder, symptom_names, version="static"):
+        return cls(ModelBundle(version, model, label_encoder, symptom_names))
+
+    @property
+    def current(self):
+        """The bundle to use for the next request."""
+        return self._bundle
+
+    def add_listener(self, callback):
+        """Registers ``callback(old_bundle, new_bundle)`` to run after every swap."""
+        self._listeners.append(callback)
+
+    @staticmethod
+    def _stat_of(path):
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            parts = model_artifact_paths(path)
+        except (OSError, ValueError, KeyError):
+            return None  # manifest is being rewritten
+        stats = [os.stat(p) for p in parts if os.path.exists(p)]
+        return tuple((st.st_mtime_ns, st.st_size) for st in stats)
+
+    def reload(self, path=None):
+        """
+        Loads, validates and publishes the artifact at ``path`` (default: the current one).
+
+        Returns:
+            True if a new version was swapped in, False if the content is unchanged.
+
+        Raises:
+            Exception: Whatever loading or validation raised; the live bundle is kept.
+        """
+        with self._lock:
+            old = self._bundle
+            path = path or old.path
+            version = file_version(path)
+            if version == old.version:
+                return False
+            model = load_model(path, old.label_encoder.classes_)
+            validate_model(model, old.label_encoder, old.symptom_names)
+            new = ModelBundle(version, model, old.label_encoder, old.symptom_names, path)
+            self._bundle = new
+
+        for callback in self._listeners:
+            try:
+                callback(old, new)
+            except Exception as e:
+                print(f"Error in model swap listener: {e}")
+        print(f"Model reloaded: version {old.version} -> {new.version}")
+        return True
+
+    def check_for_update(self):
+        """Reloads when the artifact's mtime or size changed since the last check."""
+        path = self._bundle.path
+        stat = self._stat_of(path)
+        if stat is None or stat == self._stat:
+            return False
+        try:
+            swapped = self.reload(path)
+        except Exception as e:
+            # Keep serving the old version; a half-written file is retried on the next change
+            print(f"Rejected new model at {path}: {e}")
+            swapped = False
+        self._stat = stat
+        return swapped
+
+    def start_watching(self):
+        """Starts the background thread that polls the model artifact."""
+        if self._thread is None and self._bundle.path:
+            self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._thread.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check_for_update()
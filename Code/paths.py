@@ -0,0 +1,20 @@
+import os
+
+# --- Configuration ---
+# Artifact locations shared by the server, the inference daemon, the GUIs and
+# the training scripts. Paths can be overridden with environment variables so
+# the same code runs on every machine; the defaults point at the artifacts
+# shipped with the repo. Only the standard library is imported here, so a GUI
+# talking to the daemon can read them without loading pandas or scikit-learn.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.environ.get(
+    "DISEASE_DATA_PATH", os.path.join(BASE_DIR, "Dataset", "cleaned_diseases_and_symptoms.csv")
+)
+MODEL_PATH = os.environ.get(
+    "DISEASE_MODEL_PATH", os.path.join(BASE_DIR, "Models", "best_disease_model.joblib")
+)
+PRECAUTIONS_PATH = os.environ.get(
+    "DISEASE_PRECAUTIONS_PATH", os.path.join(BASE_DIR, "Precaution expanded.csv")
+)
+# Default audit log directory (AUDIT_LOG_DIR overrides it, see audit_log.audit_log_from_env)
+AUDIT_LOG_DIR = os.path.join(BASE_DIR, "audit")
@@ -1,14 +1,22 @@
 import tkinter as tk
 import random
-import pandas as pd
-import joblib
 import numpy as np
-from sklearn.preprocessing import LabelEncoder
 import os
+import time
+from contributions import build_contribution_engine, top_symptom_contributions, format_contribution
+from shadow import DEFAULT_SAMPLE_RATE, load_shadow_scorer
+from audit_log import audit_log_from_env
+from daemon_client import DAEMON_ERRORS, connect_daemon
+# Same artifacts as server.py and inference_daemon.py (DISEASE_DATA_PATH / DISEASE_MODEL_PATH override them)
+from paths import AUDIT_LOG_DIR, MODEL_PATH
 
 # --- Configuration ---
-DATA_PATH = r"E:\Project\Dataset\Disease symptom Dataset\cleaned_diseases_and_symptoms.csv"
-MODEL_PATH = r"E:\Project\Dataset\Disease symptom Dataset\Models\best_disease_model.joblib"
+# Diseases shown (and requested from the daemon) per prediction
+TOP_K = 5
+
+# Optional candidate model compared in the background on sampled predictions
+SHADOW_MODEL_PATH = os.environ.get("SHADOW_MODEL_PATH")
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", DEFAULT_SAMPLE_RATE))
 
 # Toggle search behavior
 # True = hide non-matching symptoms when typing; False = only highlight matches
@@ -18,17 +26,63 @@ FILTER_MODE = True
 model = None
 label_encoder = None
 symptom_names = []
-
-try:
-    model = joblib.load(MODEL_PATH)
-    df_full = pd.read_csv(DATA_PATH)
-    df_full.fillna(0, inplace=True)
-    label_encoder = LabelEncoder()
-    label_encoder.fit(df_full['diseases'])
-    symptom_names = df_full.drop('diseases', axis=1).columns.tolist()
-    print("Model, label encoder, and symptom names loaded successfully.")
-except Exception as e:
-    print(f"Error loading resources: {e}")
+contribution_engine = None
+shadow_scorer = None
+model_version = None
+audit_log = None
+# Time the primary model's predict_proba took in the last in-process prediction
+last_model_latency_ms = None
+
+def load_in_process_resources(expected_symptoms=None):
+    """
+    Loads the model, label encoder and symptom names (plus the contribution
+    engine, shadow scorer and audit log) into this process.
+
+    With ``expected_symptoms`` (the vocabulary the checkboxes were built
+    from) nothing is replaced unless the model takes exactly those symptoms.
+
+    Returns:
+        True if the resources were loaded.
+    """
+    global model, label_encoder, symptom_names, contribution_engine, shadow_scorer, model_version, audit_log
+    from inference import load_gui_resources
+    from model_registry import file_version
+
+    try:
+        model, label_encoder, symptom_names = load_gui_resources(expected_symptoms)
+        print("Model, label encoder, and symptom names loaded successfully.")
+        # Precompute the per-node/per-coefficient tables once so explaining a prediction is cheap
+        contribution_engine = build_contribution_engine(model)
+        if SHADOW_MODEL_PATH:
+            shadow_scorer = load_shadow_scorer(SHADOW_MODEL_PATH, label_encoder, symptom_names, SHADOW_SAMPLE_RATE)
+            print(f"Shadow model loaded from {SHADOW_MODEL_PATH}.")
+        model_version = file_version(MODEL_PATH)
+        if audit_log is None:
+            audit_log = audit_log_from_env(AUDIT_LOG_DIR)
+        return True
+    except Exception as e:
+        print(f"Error loading resources: {e}")
+        return False
+
+
+def fall_back_to_in_process(error):
+    """Drops a daemon that stopped answering (reconnecting failed) and loads the model in-process."""
+    global daemon
+    print(f"Inference daemon unavailable ({error}); loading the model in-process.")
+    daemon.close()
+    daemon = None
+    load_in_process_resources(expected_symptoms=symptom_names)
+
+
+# A running inference_daemon.py already holds the model warm; use it when present
+# and only import pandas/scikit-learn and load everything in-process otherwise
+daemon = connect_daemon()
+if daemon is not None:
+    symptom_names = daemon.symptom_names
+    model_version = daemon.model_version
+    print(f"Connected to the inference daemon (model {model_version}).")
+else:
+    load_in_process_resources()
 
 # --- Disease-specific Health Tips ---
 disease_health_tips = {
@@ -41,20 +95,17 @@ disease_health_tips = {
 
 # --- Prediction Logic ---
 def predict_disease(symptoms, model, label_encoder, symptom_names):
+    global last_model_latency_ms
+    if daemon is not None:
+        return daemon.predict_disease(symptoms, top_k=TOP_K)
     if model is None:
         return "Error: Model not loaded.", None
-    symptoms_reshaped = np.array(symptoms).reshape(1, -1)
-    predicted_encoded_label = model.predict(symptoms_reshaped)[0]
+    from inference import predict_symptom_values
 
-    confidence_percentages = {}
-    if hasattr(model, 'predict_proba'):
-        confidence_scores = model.predict_proba(symptoms_reshaped)[0]
-        for i, score in enumerate(confidence_scores):
-            disease_name = label_encoder.inverse_transform([i])[0]
-            confidence_percentages[disease_name] = float(score) * 100.0
-
-    predicted_disease = label_encoder.inverse_transform([predicted_encoded_label])[0]
-    return predicted_disease, confidence_percentages
+    start = time.perf_counter()
+    result = predict_symptom_values(model, label_encoder, symptoms, TOP_K)
+    last_model_latency_ms = (time.perf_counter() - start) * 1000.0
+    return result
 
 # --- GUI Colors ---
 BG_COLOR = "#1e1e1e"
@@ -201,9 +252,31 @@ if __name__ == "__main__":
     button_frame.pack(pady=10)
 
     def predict_disease_from_checkboxes():
-        predicted_disease, confidence_scores_dict = predict_disease(
-            [var.get() for var in symptom_vars], model, label_encoder, symptom_names
-        )
+        start = time.perf_counter()
+        try:
+            predicted_disease, confidence_scores_dict = predict_disease(
+                [var.get() for var in symptom_vars], model, label_encoder, symptom_names
+            )
+        except DAEMON_ERRORS as e:
+            if daemon is None:
+                raise
+            # The daemon died mid-session; carry on with the model in this process
+            fall_back_to_in_process(e)
+            predicted_disease, confidence_scores_dict = predict_disease(
+                [var.get() for var in symptom_vars], model, label_encoder, symptom_names
+            )
+        latency_ms = (time.perf_counter() - start) * 1000.0
+
+        # Hand the input to the shadow model and the audit log without waiting for either
+        top5 = sorted(confidence_scores_dict.items(), key=lambda x: x[1], reverse=True)[:5] \
+            if confidence_scores_dict else []
+        # The shadow compares model time only, not the GUI's name lookups around it
+        if shadow_scorer is not None and top5 and last_model_latency_ms is not None:
+            shadow_scorer.submit(np.array([[var.get() for var in symptom_vars]]), [d for d, _ in top5],
+                                 last_model_latency_ms)
+        if audit_log is not None and top5:
+            selected = [name for name, var in zip(symptom_names, symptom_vars) if var.get()]
+            audit_log.record(selected, top5, model_version, latency_ms, source="gui")
 
         predicted_disease_label.config(text=f"🩺 Predicted Disease: {predicted_disease}")
 
@@ -225,6 +298,24 @@ if __name__ == "__main__":
             top5_label.configure(font=("Helvetica", 11))
             top5_label.config(text="Top 5 Predicted Diseases: (no probabilities available)")
 
+        # Which selected symptoms drove the top prediction
+        selected = np.array([[var.get() for var in symptom_vars]])
+        drivers, units = [], None
+        if daemon is not None and selected.any():
+            # Already fetched with the prediction above
+            drivers, units = daemon.last_contributions(selected[0]), daemon.contribution_units
+        elif contribution_engine is not None and selected.any():
+            drivers = top_symptom_contributions(contribution_engine, selected, symptom_names)[0]
+            units = contribution_engine.units
+        if drivers:
+            name_w = max((len(s) for s, _ in drivers), default=10)
+            lines = ["🧬 Symptoms driving this prediction:"]
+            for symptom, value in drivers:
+                lines.append(f"{symptom:<{name_w}}  :  {format_contribution(value, units)}")
+            contributions_label.config(text="\n".join(lines))
+        else:
+            contributions_label.config(text="")
+
         # ALWAYS refresh health tips for the current disease
         tips = disease_health_tips.get(predicted_disease, disease_health_tips["default"])
         health_tips_label.config(text="💡 Health Tips:\n- " + "\n- ".join(tips))
@@ -268,6 +359,10 @@ if __name__ == "__main__":
                           bg=BG_COLOR, fg="#ffcc00", font=("Helvetica", 11), justify="left")
     top5_label.pack(anchor="w", pady=5)
 
+    contributions_label = tk.Label(results_frame, text="",
+                                   bg=BG_COLOR, fg="#ff88cc", font=("Courier New", 11), justify="left")
+    contributions_label.pack(anchor="w", pady=5)
+
     health_tips_label = tk.Label(results_frame, text="Health Tips will appear here after prediction.",
                                  bg=BG_COLOR, fg="#ffa500", font=("Helvetica", 11),
                                  wraplength=1000, justify="left")
@@ -282,3 +377,8 @@ if __name__ == "__main__":
     disclaimer_label.pack(pady=5)
 
     root.mainloop()
+
+    if shadow_scorer is not None:
+        print(f"Shadow model comparison: {shadow_scorer.stats()}")
+    if audit_log is not None:
+        audit_log.close()
@@ -0,0 +1,301 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Flask, Response, jsonify, render_template, request
+
+from audit_log import audit_log_from_env
+from contributions import top_symptom_contributions
+from drift import drift_monitor_for
+from inference import (BASE_DIR, DATA_PATH, MODEL_PATH, build_feature_vector,
+                       load_precautions, predict_top_k)
+from model_registry import ModelRegistry
+from paths import AUDIT_LOG_DIR
+from shadow import DEFAULT_SAMPLE_RATE, load_shadow_scorer
+
+CATALOG_MAX_AGE = 3600
+TYPEAHEAD_LIMIT = 20
+MAX_PAGE_SIZE = 200
+# Prediction cache entries; 0 disables the cache (the default)
+PREDICTION_CACHE_SIZE = 0
+
+
+# --- Precaution Providers ---
+def csv_precaution_provider(precautions=None):
+    """
+    Returns a provider that looks precautions up in the local precaution table.
+    """
+    table = load_precautions() if precautions is None else precautions
+
+    def provider(disease_name):
+        return table.get(str(disease_name).strip().lower(),
+                         f"Could not find precautions for {disease_name}.")
+
+    return provider
+
+
+def gemini_precaution_provider(api_key, fallback=None):
+    """
+    Returns a provider that asks the Gemini API for precautions, falling back
+    to ``fallback`` (e.g. the local table) when the call fails.
+    """
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    model_gemini = genai.GenerativeModel('gemini-1.5-flash-latest')
+
+    def provider(disease_name):
+        try:
+            response = model_gemini.generate_content(f"What are the precautions for {disease_name}?")
+            if response and response.text:
+                return response.text
+        except Exception as e:
+            print(f"An error occurred while fetching precautions: {e}")
+        if fallback is not None:
+            return fallback(disease_name)
+        return f"Could not find precautions for {disease_name}."
+
+    return provider
+
+
+def default_precaution_provider():
+    """Uses Gemini when GOOGLE_API_KEY is set, otherwise the local precaution table."""
+    local = csv_precaution_provider()
+    api_key = os.environ.get('GOOGLE_API_KEY')
+    if api_key:
+        try:
+            return gemini_precaution_provider(api_key, fallback=local)
+        except ImportError:
+            print("Warning: google-generativeai is not installed. Using local precautions.")
+    return local
+
+
+# --- Prediction Cache ---
+class PredictionCache:
+    """
+    Small thread-safe LRU of prediction results keyed by (model version, symptom set).
+
+    Entries of an old model version can never be returned because the version
+    is part of the key; ``clear`` is also registered as a swap listener so they
+    do not linger in memory. Only results that depend on nothing but the model
+    and the input belong here, not per-request timings.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self, *_):
+        with self._lock:
+            self._data.clear()
+
+
+# --- Application ---
+def create_app(model=None, label_encoder=None, symptom_names=None, precaution_provider=None,
+               registry=None, shadow=None, audit_log=None, drift=None,
+               prediction_cache_size=PREDICTION_CACHE_SIZE):
+    """
+    Creates the Flask application serving the web frontend and the JSON API.
+
+    Args:
+        model: The trained model (loaded from MODEL_PATH when omitted).
+        label_encoder: The LabelEncoder fitted on the disease names.
+        symptom_names: The ordered symptom vocabulary of the model.
+        precaution_provider: Callable mapping a disease name to precaution text.
+        registry: A ModelRegistry to serve from; takes precedence over model/label_encoder/symptom_names
+            and allows hot reloads.
+        shadow: Optional ShadowScorer that compares a candidate model on sampled live traffic.
+        audit_log: Optional AuditLog that records every prediction off the request path.
+        drift: Optional DriftMonitor comparing live traffic with the training distribution.
+        prediction_cache_size: Number of predictions to keep in an LRU cache keyed by model
+            version and symptom set; 0 (the default) disables caching.
+
+    Returns:
+        The configured Flask app.
+    """
+    if registry is None:
+        if model is None:
+            registry = ModelRegistry.from_path(MODEL_PATH, DATA_PATH)
+        else:
+            registry = ModelRegistry.from_objects(model, label_encoder, symptom_names)
+    if precaution_provider is None:
+        precaution_provider = default_precaution_provider()
+    prediction_cache = None
+    if prediction_cache_size > 0:
+        prediction_cache = PredictionCache(prediction_cache_size)
+        registry.add_listener(prediction_cache.clear)
+    if drift is not None:
+        registry.add_listener(drift.on_model_swap)
+
+    app = Flask(__name__,
+                template_folder=os.path.join(BASE_DIR, "templates"),
+                static_folder=os.path.join(BASE_DIR, "static"))
+
+    @app.route("/")
+    def index():
+        return render_template("index.html")
+
+    @app.route("/symptoms")
+    def symptoms():
+        catalog = registry.current.catalog
+        query = request.args.get("q")
+        if query is not None or "offset" in request.args or "limit" in request.args:
+            return symptoms_page(catalog, query)
+
+        # Full catalog: precomputed bytes, gzip when accepted, revalidated by the ETag of that encoding
+        gzipped = "gzip" in request.accept_encodings
+        body, etag = (catalog.gzip_body, catalog.gzip_etag) if gzipped else (catalog.body, catalog.etag)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype="application/json")
+            if gzipped:
+                response.headers["Content-Encoding"] = "gzip"
+        response.set_etag(etag)
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = f"public, max-age={CATALOG_MAX_AGE}"
+        return response
+
+    def symptoms_page(catalog, query):
+        offset = max(request.args.get("offset", 0, type=int), 0)
+        default_limit = TYPEAHEAD_LIMIT if query is not None else MAX_PAGE_SIZE
+        limit = min(max(request.args.get("limit", default_limit, type=int), 0), MAX_PAGE_SIZE)
+        if query is not None:
+            total, results = catalog.index.search(query, offset, limit)
+        else:
+            total, results = catalog.page(offset, limit)
+        return jsonify({"query": query, "total": total, "offset": offset,
+                        "limit": limit, "results": results})
+
+    @app.route("/predict", methods=["POST"])
+    def predict():
+        payload = request.get_json(silent=True)
+        selected = (payload.get("symptoms") if isinstance(payload, dict) else None) or []
+        if not isinstance(selected, list) or not selected:
+            return jsonify({"error": "Please select at least one symptom."}), 400
+        if not all(isinstance(symptom, str) for symptom in selected):
+            return jsonify({"error": "Symptoms must be a list of symptom names."}), 400
+
+        # One snapshot for the whole request: a concurrent reload cannot mix versions
+        start = time.perf_counter()
+        bundle = registry.current
+        key = (bundle.version, frozenset(selected))
+        result = None
+        # The shadow sample is drawn before the cache so it follows real traffic; sampled
+        # requests, like "Cache-Control: no-cache" ones (e.g. from load tests), are computed fresh
+        sampled = shadow is not None and shadow.sample()
+        if prediction_cache is not None and not sampled and not request.cache_control.no_cache:
+            result = prediction_cache.get(key)
+            if result is not None:
+                # Per-request timings belong to the request that computed the entry
+                result = dict(result, ensemble_members=None)
+        if result is None:
+            try:
+                result, X, latency_ms = predict_with_bundle(bundle, selected)
+            except RuntimeError as e:
+                # An ensemble none of whose members answered in time
+                return jsonify({"error": str(e)}), 503
+            if prediction_cache is not None:
+                prediction_cache.put(key, dict(result, ensemble_members=None))
+            if sampled:
+                shadow.submit(X, [d["disease"] for d in result["top5"]], latency_ms, sampled=True)
+        if drift is not None:
+            drift.observe(selected, result["predicted_disease"], result["confidence"])
+        if audit_log is not None:
+            audit_log.record(selected, [(d["disease"], d["confidence"]) for d in result["top5"]],
+                             bundle.version, (time.perf_counter() - start) * 1000.0, source="server")
+
+        response = dict(result)
+        response["precautions"] = precaution_provider(result["predicted_disease"])
+        return jsonify(response)
+
+    @app.route("/metrics")
+    def metrics():
+        bundle = registry.current
+        report = {"model_version": bundle.version}
+        if hasattr(bundle.model, "stats"):
+            report["ensemble"] = bundle.model.stats()
+        if shadow is not None:
+            report["shadow"] = shadow.stats()
+        if audit_log is not None:
+            report["audit_log"] = audit_log.stats()
+        if drift is not None:
+            report["drift"] = drift.scores()
+        return jsonify(report)
+
+    app.registry = registry
+    return app
+
+
+def predict_with_bundle(bundle, selected):
+    """
+    Predicts the top-5 diseases and the driving symptoms with one model bundle.
+
+    Returns:
+        A tuple (result, X, latency_ms) with the JSON-serializable result
+        (without precautions), the feature row and the model latency.
+    """
+    X, unknown = build_feature_vector(selected, bundle.symptom_names)
+    start = time.perf_counter()
+    top5 = predict_top_k(bundle.model, bundle.label_encoder, X)[0][0]
+    latency_ms = (time.perf_counter() - start) * 1000.0
+    predicted_disease, confidence = top5[0]
+    # Ensembles report per-member latency and whether each member made its deadline
+    members = getattr(bundle.model, "last_report", None)
+
+    engine = bundle.contribution_engine
+    contributions = []
+    if engine is not None:
+        contributions = [
+            {"symptom": name, "contribution": value}
+            for name, value in top_symptom_contributions(engine, X, bundle.symptom_names)[0]
+        ]
+
+    result = {
+        "predicted_disease": predicted_disease,
+        "confidence": confidence,
+        "top5": [{"disease": d, "confidence": c} for d, c in top5],
+        "contributions": contributions,
+        "contribution_units": getattr(engine, "units", None),
+        "unknown_symptoms": unknown,
+        "model_version": bundle.version,
+        "ensemble_members": members,
+    }
+    return result, X, latency_ms
+
+
+if __name__ == "__main__":
+    registry = ModelRegistry.from_path(MODEL_PATH, DATA_PATH,
+                                       poll_interval=float(os.environ.get("MODEL_POLL_INTERVAL", 2.0)))
+    registry.start_watching()
+    shadow = None
+    if os.environ.get("SHADOW_MODEL_PATH"):
+        shadow = load_shadow_scorer(os.environ["SHADOW_MODEL_PATH"], registry.current.label_encoder,
+                                    registry.current.symptom_names,
+                                    sample_rate=float(os.environ.get("SHADOW_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)))
+    audit_log = audit_log_from_env(AUDIT_LOG_DIR)
+    drift = drift_monitor_for(registry.current, DATA_PATH,
+                              half_life=int(os.environ.get("DRIFT_HALF_LIFE", 2000)))
+    app = create_app(registry=registry, shadow=shadow, audit_log=audit_log, drift=drift,
+                     prediction_cache_size=int(os.environ.get("PREDICTION_CACHE_SIZE", PREDICTION_CACHE_SIZE)))
+    try:
+        app.run(host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", 5000)))
+    finally:
+        if audit_log is not None:
+            audit_log.close()
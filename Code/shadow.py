@@ -0,0 +1,160 @@
+import math
+import queue
+import random
+import threading
+import time
+import warnings
+
+import numpy as np
+
+# Bucket edges (ms) for the candidate-minus-primary latency histogram
+LATENCY_DELTA_EDGES_MS = [-50, -20, -10, -5, -2, -1, 0, 1, 2, 5, 10, 20, 50]
+TOP_K = 5
+# Share of live predictions also scored by the candidate (server and GUI alike)
+DEFAULT_SAMPLE_RATE = 0.1
+
+
+# --- Shadow Scoring ---
+class ShadowScorer:
+    """
+    Scores a sampled fraction of live inputs with a candidate model off the request path.
+
+    ``submit`` only draws a random number and does a non-blocking put on a
+    bounded queue; when the queue is full the sample is dropped (and counted)
+    so the primary path never waits. A single background worker scores the
+    candidate and folds the comparison into fixed-size counters, so memory
+    stays constant however long the shadow runs.
+    """
+
+    def __init__(self, candidate_model, candidate_class_names, sample_rate=DEFAULT_SAMPLE_RATE, max_queue=256,
+                 seed=None):
+        self.candidate_model = candidate_model
+        self.candidate_class_names = list(candidate_class_names)
+        self.sample_rate = float(sample_rate)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.shed = 0
+        self.scored = 0
+        self.errors = 0
+        self.top1_agree = 0
+        self.top1_in_top5 = 0
+        self.top5_overlap_sum = 0.0
+        # Welford running mean/variance of candidate - primary latency
+        self._delta_mean = 0.0
+        self._delta_m2 = 0.0
+        self._delta_hist = [0] * (len(LATENCY_DELTA_EDGES_MS) + 1)
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._work, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def sample(self):
+        """Draws whether an input is shadow-scored, with probability ``sample_rate``."""
+        return self._rng.random() < self.sample_rate
+
+    def submit(self, X, primary_top_names, primary_latency_ms, sampled=None):
+        """
+        Offers one primary prediction for shadow comparison; never blocks.
+
+        Args:
+            X: The feature row(s) the primary model scored.
+            primary_top_names: The primary's top-5 disease names, best first.
+            primary_latency_ms: How long the primary model took to score X.
+            sampled: The result of an earlier ``sample()`` draw for this input,
+                for callers that decide before predicting; drawn here when None.
+
+        Returns:
+            True if the input was queued for shadow scoring.
+        """
+        if not (self.sample() if sampled is None else sampled):
+            return False
+        try:
+            self._queue.put_nowait((X, list(primary_top_names), primary_latency_ms))
+        except queue.Full:
+            with self._lock:
+                self.shed += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                X, primary_top, primary_latency_ms = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                start = time.perf_counter()
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    proba = self.candidate_model.predict_proba(X)[0]
+                latency_ms = (time.perf_counter() - start) * 1000.0
+                k = min(TOP_K, len(proba))
+                top = np.argpartition(-proba, k - 1)[:k]
+                top = top[np.argsort(-proba[top])]
+                candidate_top = [self.candidate_class_names[i] for i in top]
+                self._record(primary_top, candidate_top, latency_ms - primary_latency_ms)
+            except Exception as e:
+                print(f"Shadow scoring failed: {e}")
+                with self._lock:
+                    self.errors += 1
+
+    def _record(self, primary_top, candidate_top, delta_ms):
+        bucket = sum(1 for edge in LATENCY_DELTA_EDGES_MS if delta_ms >= edge)
+        with self._lock:
+            self.scored += 1
+            self.top1_agree += primary_top[0] == candidate_top[0]
+            self.top1_in_top5 += primary_top[0] in candidate_top
+            self.top5_overlap_sum += len(set(primary_top) & set(candidate_top)) / max(len(primary_top), 1)
+            diff = delta_ms - self._delta_mean
+            self._delta_mean += diff / self.scored
+            self._delta_m2 += diff * (delta_ms - self._delta_mean)
+            self._delta_hist[bucket] += 1
+
+    def stats(self):
+        """Returns agreement rates, latency deltas and queue counters as a dict."""
+        with self._lock:
+            n = self.scored
+            labels = ([f"<{LATENCY_DELTA_EDGES_MS[0]}"]
+                      + [f"[{a},{b})" for a, b in zip(LATENCY_DELTA_EDGES_MS, LATENCY_DELTA_EDGES_MS[1:])]
+                      + [f">={LATENCY_DELTA_EDGES_MS[-1]}"])
+            return {
+                "sample_rate": self.sample_rate,
+                "submitted": self.submitted,
+                "shed": self.shed,
+                "scored": n,
+                "errors": self.errors,
+                "queue_depth": self._queue.qsize(),
+                "top1_agreement": self.top1_agree / n if n else None,
+                "top1_in_candidate_top5": self.top1_in_top5 / n if n else None,
+                "top5_overlap": self.top5_overlap_sum / n if n else None,
+                "latency_delta_ms": {
+                    "mean": self._delta_mean if n else None,
+                    "std": math.sqrt(self._delta_m2 / (n - 1)) if n > 1 else None,
+                    "histogram": dict(zip(labels, self._delta_hist)),
+                },
+            }
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def load_shadow_scorer(model_path, label_encoder, symptom_names, sample_rate=DEFAULT_SAMPLE_RATE, max_queue=256):
+    """
+    Loads a candidate model artifact and wraps it in a ShadowScorer.
+
+    Raises:
+        ValueError: If the candidate cannot serve the primary's symptom
+            vocabulary and diseases (same checks as a hot reload).
+    """
+    from inference import class_names, load_model
+    from model_registry import validate_model
+
+    candidate = load_model(model_path, label_encoder.classes_)
+    validate_model(candidate, label_encoder, symptom_names)
+    return ShadowScorer(candidate, class_names(candidate, label_encoder), sample_rate, max_queue)
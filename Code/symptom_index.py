@@ -0,0 +1,96 @@
+import gzip
+import hashlib
+import json
+import re
+from bisect import bisect_left
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# --- Typeahead Index ---
+class SymptomIndex:
+    """
+    In-memory prefix/token index over the symptom vocabulary.
+
+    Every word of every symptom name is stored in one sorted list, so a query
+    word is resolved with two binary searches instead of scanning all names.
+    Multi-word queries ("chest pa") keep the symptoms matching every word.
+    """
+
+    def __init__(self, symptom_names):
+        self.symptom_names = list(symptom_names)
+        self._lower = [name.lower() for name in self.symptom_names]
+        pairs = sorted(
+            (word, sid)
+            for sid, name in enumerate(self._lower)
+            for word in set(_WORD_RE.findall(name))
+        )
+        self._words = [w for w, _ in pairs]
+        self._ids = [sid for _, sid in pairs]
+
+    def _prefix_ids(self, prefix):
+        lo = bisect_left(self._words, prefix)
+        hi = bisect_left(self._words, prefix + "\uffff", lo)
+        return set(self._ids[lo:hi])
+
+    def search(self, query, offset=0, limit=20):
+        """
+        Finds symptoms whose words start with every word of the query.
+
+        Results are ranked: names starting with the query first, then names
+        containing it as a phrase, then the rest; ties are broken by length
+        and name.
+
+        Args:
+            query: The user's partial input.
+            offset: Number of ranked results to skip.
+            limit: Maximum number of results to return.
+
+        Returns:
+            A tuple (total, names) with the total number of matches and one page of names.
+        """
+        q = query.lower().strip()
+        words = _WORD_RE.findall(q)
+        if not words:
+            return 0, []
+        ids = self._prefix_ids(words[0])
+        for word in words[1:]:
+            if not ids:
+                break
+            ids &= self._prefix_ids(word)
+
+        def rank(sid):
+            name = self._lower[sid]
+            if name.startswith(q):
+                tier = 0
+            elif q in name:
+                tier = 1
+            else:
+                tier = 2
+            return tier, len(name), name
+
+        ranked = sorted(ids, key=rank)
+        return len(ranked), [self.symptom_names[sid] for sid in ranked[offset:offset + limit]]
+
+
+# --- Precomputed Catalog ---
+class SymptomCatalog:
+    """
+    The full symptom list serialized once: JSON bytes, a gzip-compressed copy
+    and a strong ETag for each, so repeated ``/symptoms`` requests cost a
+    header compare. The two encodings are different representations and
+    therefore get different ETags. The ETags depend on the catalog bytes
+    only, so a model reload with the same vocabulary keeps cached copies valid.
+    """
+
+    def __init__(self, symptom_names):
+        self.symptom_names = list(symptom_names)
+        self.index = SymptomIndex(self.symptom_names)
+        self.body = json.dumps(self.symptom_names, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha1(self.body).hexdigest()[:16]
+        self.gzip_etag = f"{self.etag}-gzip"
+
+    def page(self, offset=0, limit=100):
+        """Returns one page of the catalog, in vocabulary order, as (total, names)."""
+        return len(self.symptom_names), self.symptom_names[offset:offset + limit]
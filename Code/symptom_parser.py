@@ -0,0 +1,389 @@
+import re
+
+import numpy as np
+
+# --- Lay-term Synonyms ---
+# Maps everyday phrasing to the symptom column names used by the dataset.
+# Entries whose target is not part of the loaded vocabulary are ignored, so the
+# table can stay generous without breaking smaller/compacted feature sets.
+SYMPTOM_SYNONYMS = {
+    "chest pain": "sharp chest pain",
+    "pain in my chest": "sharp chest pain",
+    "pain in the chest": "sharp chest pain",
+    "tight chest": "chest tightness",
+    "breathlessness": "shortness of breath",
+    "short of breath": "shortness of breath",
+    "out of breath": "shortness of breath",
+    "trouble breathing": "difficulty breathing",
+    "hard to breathe": "difficulty breathing",
+    "racing heart": "increased heart rate",
+    "heart racing": "palpitations",
+    "fast heartbeat": "increased heart rate",
+    "slow heartbeat": "decreased heart rate",
+    "anxiety": "anxiety and nervousness",
+    "anxious": "anxiety and nervousness",
+    "nervous": "anxiety and nervousness",
+    "depressed": "depression",
+    "can't sleep": "insomnia",
+    "cannot sleep": "insomnia",
+    "trouble sleeping": "insomnia",
+    "dizzy": "dizziness",
+    "lightheaded": "dizziness",
+    "light headed": "dizziness",
+    "vertigo": "dizziness",
+    "passed out": "fainting",
+    "fainted": "fainting",
+    "throat pain": "sore throat",
+    "scratchy throat": "throat irritation",
+    "hoarseness": "hoarse voice",
+    "lost my voice": "hoarse voice",
+    "trouble swallowing": "difficulty in swallowing",
+    "difficulty swallowing": "difficulty in swallowing",
+    "painful swallowing": "difficulty in swallowing",
+    "coughing": "cough",
+    "coughing up blood": "hemoptysis",
+    "coughing up phlegm": "coughing up sputum",
+    "phlegm": "coughing up sputum",
+    "blocked nose": "nasal congestion",
+    "stuffy nose": "nasal congestion",
+    "runny nose": "coryza",
+    "sneezes": "sneezing",
+    "nose bleed": "nosebleed",
+    "nose bleeding": "nosebleed",
+    "high temperature": "fever",
+    "temperature": "fever",
+    "feverish": "fever",
+    "shivering": "chills",
+    "shivers": "chills",
+    "tired": "fatigue",
+    "tiredness": "fatigue",
+    "exhausted": "fatigue",
+    "exhaustion": "fatigue",
+    "weak": "weakness",
+    "sleepy": "sleepiness",
+    "drowsy": "sleepiness",
+    "body aches": "ache all over",
+    "body ache": "ache all over",
+    "aching all over": "ache all over",
+    "muscle aches": "muscle pain",
+    "muscle ache": "muscle pain",
+    "sore muscles": "muscle pain",
+    "joint aches": "joint pain",
+    "aching joints": "joint pain",
+    "stiff neck": "neck stiffness or tightness",
+    "headaches": "headache",
+    "migraine": "headache",
+    "head ache": "headache",
+    "stomach ache": "sharp abdominal pain",
+    "stomachache": "sharp abdominal pain",
+    "stomach pain": "sharp abdominal pain",
+    "tummy ache": "sharp abdominal pain",
+    "abdominal pain": "sharp abdominal pain",
+    "belly pain": "sharp abdominal pain",
+    "bloated": "stomach bloating",
+    "bloating": "stomach bloating",
+    "gas": "flatulence",
+    "nauseous": "nausea",
+    "nauseated": "nausea",
+    "feel sick": "nausea",
+    "feeling sick": "nausea",
+    "throwing up": "vomiting",
+    "threw up": "vomiting",
+    "vomited": "vomiting",
+    "puking": "vomiting",
+    "vomiting blood": "vomiting blood",
+    "loose stools": "diarrhea",
+    "diarrhoea": "diarrhea",
+    "the runs": "diarrhea",
+    "constipated": "constipation",
+    "black stools": "melena",
+    "blood in my stool": "blood in stool",
+    "acid reflux": "heartburn",
+    "reflux": "regurgitation",
+    "loss of appetite": "decreased appetite",
+    "no appetite": "decreased appetite",
+    "not hungry": "decreased appetite",
+    "always hungry": "excessive appetite",
+    "weight loss": "recent weight loss",
+    "losing weight": "recent weight loss",
+    "lost weight": "recent weight loss",
+    "gaining weight": "weight gain",
+    "thirsty": "thirst",
+    "sweats": "sweating",
+    "night sweats": "sweating",
+    "sweaty": "sweating",
+    "hot flushes": "hot flashes",
+    "yellow skin": "jaundice",
+    "yellow eyes": "jaundice",
+    "pale": "pallor",
+    "rash": "skin rash",
+    "itchy skin": "itching of skin",
+    "itching": "itching of skin",
+    "itchy": "itching of skin",
+    "dry skin": "skin dryness, peeling, scaliness, or roughness",
+    "pimples": "acne or pimples",
+    "acne": "acne or pimples",
+    "hives": "allergic reaction",
+    "swollen glands": "swollen lymph nodes",
+    "swollen legs": "leg swelling",
+    "swollen ankles": "ankle swelling",
+    "swollen feet": "foot or toe swelling",
+    "edema": "peripheral edema",
+    "back ache": "back pain",
+    "backache": "back pain",
+    "lower back pain": "low back pain",
+    "sore back": "back pain",
+    "earache": "ear pain",
+    "ear ache": "ear pain",
+    "ringing ears": "ringing in ear",
+    "tinnitus": "ringing in ear",
+    "hard of hearing": "diminished hearing",
+    "hearing loss": "diminished hearing",
+    "blurry vision": "diminished vision",
+    "blurred vision": "diminished vision",
+    "red eyes": "eye redness",
+    "red eye": "eye redness",
+    "watery eyes": "lacrimation",
+    "itchy eyes": "itchiness of eye",
+    "eye pain": "pain in eye",
+    "toothache": "toothache",
+    "tooth pain": "toothache",
+    "dry mouth": "mouth dryness",
+    "mouth sores": "mouth ulcer",
+    "canker sore": "mouth ulcer",
+    "bleeding gums": "bleeding gums",
+    "pins and needles": "paresthesia",
+    "tingling": "paresthesia",
+    "numbness": "loss of sensation",
+    "numb": "loss of sensation",
+    "fits": "seizures",
+    "seizure": "seizures",
+    "convulsions": "seizures",
+    "slurred speech": "slurring words",
+    "memory loss": "disturbance of memory",
+    "forgetful": "disturbance of memory",
+    "hallucinations": "delusions or hallucinations",
+    "confused": "delusions or hallucinations",
+    "restless": "restlessness",
+    "angry": "excessive anger",
+    "burning urination": "painful urination",
+    "burning when peeing": "painful urination",
+    "painful peeing": "painful urination",
+    "peeing a lot": "frequent urination",
+    "frequent peeing": "frequent urination",
+    "blood in urine": "blood in urine",
+    "blood in my urine": "blood in urine",
+    "bed wetting": "bedwetting",
+    "period pain": "painful menstruation",
+    "painful periods": "painful menstruation",
+    "cramps": "cramps and spasms",
+    "muscle cramps": "muscle cramps, contractures, or spasms",
+    "spasms": "cramps and spasms",
+    "missed period": "absence of menstruation",
+    "heavy periods": "heavy menstrual flow",
+    "irregular periods": "unpredictable menstruation",
+    "wheeze": "wheezing",
+    "wheezy": "wheezing",
+    "snoring": "abnormal breathing sounds",
+    "flu": "flu-like syndrome",
+    "flu like symptoms": "flu-like syndrome",
+    "sinus pain": "painful sinuses",
+    "blocked sinuses": "sinus congestion",
+    "feeling hot": "feeling hot",
+    "feeling cold": "feeling cold",
+    "cold hands": "poor circulation",
+    "unwell": "feeling ill",
+    "feeling unwell": "feeling ill",
+    "heart pounding": "palpitations",
+    "irregular heart beat": "irregular heartbeat",
+}
+
+# --- Negation Handling ---
+# A cue negates every mention that starts within NEGATION_WINDOW tokens after
+# it, unless a clause break comes first: punctuation (including commas), a
+# conjunction such as "and" or "but", or a new subject such as "I'm". So
+# "no fever or chills" negates both, while in "no fever, headache" and
+# "no fever and headache" the headache is present. Cue and break words that
+# are part of a matched phrase ("no appetite", "not hungry", "pins and
+# needles") are just words of that mention and do not open or end a scope.
+NEGATION_CUES = {
+    "no", "not", "without", "denies", "deny", "denied", "never", "negative",
+    "none", "nor", "neither", "free", "don't", "doesn't", "didn't", "haven't",
+    "hasn't", "hadn't", "isn't", "wasn't", "aren't", "dont", "doesnt", "didnt",
+    "havent", "hasnt", "isnt", "wasnt",
+}
+NEGATION_TERMINATORS = {
+    ".", ";", "!", "?", ",", "and", "but", "however", "although", "though", "yet", "except", "apart",
+    "i", "i'm", "im", "i've", "ive", "he", "she", "they", "patient", "pt",
+}
+NEGATION_WINDOW = 6
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[.;!?,]")
+
+
+def tokenize(text):
+    """Lower-cases text and splits it into word and clause-punctuation tokens."""
+    return _TOKEN_RE.findall(text.lower().replace("’", "'"))
+
+
+# --- Aho-Corasick Automaton ---
+class SymptomMatcher:
+    """
+    Word-level Aho-Corasick automaton over symptom names and their synonyms.
+
+    All patterns are compiled once; extracting every symptom mention from a
+    note is a single left-to-right pass over its tokens, independent of the
+    vocabulary size. Overlapping mentions are resolved leftmost-longest, so
+    "sharp chest pain" wins over "chest pain".
+    """
+
+    def __init__(self, symptom_names, synonyms=SYMPTOM_SYNONYMS):
+        self.symptom_names = list(symptom_names)
+        self.n_features = len(self.symptom_names)
+        index = {name: i for i, name in enumerate(self.symptom_names)}
+
+        # Trie: goto[state] is a dict token -> state; out[state] holds
+        # (pattern_length, feature_index) for the pattern ending there.
+        self._goto = [{}]
+        self._out = [None]
+        for name, i in index.items():
+            self._add(tokenize(name), i)
+        for phrase, target in synonyms.items():
+            if target in index:
+                self._add(tokenize(phrase), index[target])
+        self._build_failure_links()
+
+    def _add(self, tokens, feature):
+        if not tokens:
+            return
+        state = 0
+        for tok in tokens:
+            nxt = self._goto[state].get(tok)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][tok] = nxt
+                self._goto.append({})
+                self._out.append(None)
+            state = nxt
+        if self._out[state] is None:  # exact column names are added first and win
+            self._out[state] = (len(tokens), feature)
+
+    def _build_failure_links(self):
+        self._fail = [0] * len(self._goto)
+        # dict_link[state]: nearest state on the failure chain that ends a pattern
+        self._dict_link = [-1] * len(self._goto)
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for tok, nxt in self._goto[state].items():
+                f = self._fail[state]
+                while f and tok not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(tok, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                fail = self._fail[nxt]
+                self._dict_link[nxt] = fail if self._out[fail] is not None else self._dict_link[fail]
+                queue.append(nxt)
+
+    def find(self, tokens):
+        """
+        Finds all symptom mentions in a token list.
+
+        Returns:
+            A list of (start, end, feature_index) with non-overlapping,
+            leftmost-longest mentions, ordered by position.
+        """
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        # best[start] keeps the longest mention beginning at that token
+        best = {}
+        state = 0
+        for pos, tok in enumerate(tokens):
+            while state and tok not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(tok, 0)
+            s = state if out[state] is not None else dict_link[state]
+            while s > 0:
+                length, feature = out[s]
+                start = pos - length + 1
+                if start not in best or best[start][0] < length:
+                    best[start] = (length, feature)
+                s = dict_link[s]
+
+        mentions = []
+        covered_until = 0
+        for start in sorted(best):
+            length, feature = best[start]
+            if start >= covered_until:
+                mentions.append((start, start + length, feature))
+                covered_until = start + length
+        return mentions
+
+    def parse(self, text):
+        """
+        Extracts present and negated symptoms from free text.
+
+        Args:
+            text: A free-text note such as "fever and sore throat, no cough".
+
+        Returns:
+            A tuple (present, negated) of sorted feature-index lists. A symptom
+            that is both mentioned and negated counts as present only if it has
+            at least one non-negated mention.
+        """
+        tokens = tokenize(text)
+        mentions = self.find(tokens)
+        negated_at = _negation_flags(tokens, mentions)
+        present, negated = set(), set()
+        for start, _, feature in mentions:
+            (negated if negated_at[start] else present).add(feature)
+        negated -= present
+        return sorted(present), sorted(negated)
+
+    def parse_many(self, texts):
+        """
+        Parses a batch of notes into a sparse CSR layout.
+
+        Returns:
+            A tuple (indptr, indices, negated) where row r's present symptoms
+            are ``indices[indptr[r]:indptr[r + 1]]`` and negated is a list of
+            negated feature-index lists per row.
+        """
+        indptr = [0]
+        indices = []
+        negated = []
+        for text in texts:
+            present, neg = self.parse(text)
+            indices.extend(present)
+            indptr.append(len(indices))
+            negated.append(neg)
+        return np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int32), negated
+
+    def names(self, feature_indices):
+        """Maps feature indices back to symptom names."""
+        return [self.symptom_names[i] for i in feature_indices]
+
+
+def _negation_flags(tokens, mentions=()):
+    """
+    Marks, for every token position, whether it lies inside a negation scope.
+
+    Tokens covered by one of ``mentions`` (as returned by ``SymptomMatcher.find``)
+    never act as cues or clause breaks.
+    """
+    in_mention = [False] * len(tokens)
+    for start, end, _ in mentions:
+        in_mention[start:end] = [True] * (end - start)
+
+    flags = [False] * len(tokens)
+    remaining = 0
+    for pos, tok in enumerate(tokens):
+        if not in_mention[pos] and tok in NEGATION_TERMINATORS:
+            remaining = 0
+        elif not in_mention[pos] and tok in NEGATION_CUES:
+            remaining = NEGATION_WINDOW
+        elif remaining:
+            flags[pos] = True
+            remaining -= 1
+    return flags
@@ -0,0 +1,365 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from augment import AugmentationRecipe, augment_batches, load_base_profiles, split_profiles
+from inference import BASE_DIR, DATA_PATH, MODEL_PATH, fit_label_encoder
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- Configuration ---
+CACHE_DIR = os.environ.get("DISEASE_FEATURE_CACHE", os.path.join(BASE_DIR, ".cache", "features"))
+# sklearn trees split on float32; storing the matrix in that dtype lets
+# ``fit`` use the memory map directly instead of converting it in RAM
+FEATURE_DTYPE = np.float32
+MIN_SAMPLES_PER_DISEASE = 2
+TEST_SIZE = 0.2
+SEED = 42
+
+# Settings of the "memory-optimized" forest in the training notebook
+BASELINE_PARAMS = {"n_estimators": 50, "max_depth": 20, "n_jobs": 1}
+
+
+# --- Feature Store ---
+class FeatureStore:
+    """
+    The train/test split of the dataset as memory-mapped ``.npy`` arrays.
+
+    The arrays are opened read-only, so every tree-building thread (and any
+    process that opens the same files) shares one copy through the OS page
+    cache instead of holding its own in RAM.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.symptom_names = self.meta["symptom_names"]
+        self.classes = np.asarray(self.meta["classes"], dtype=object)
+        self.X_train = np.load(os.path.join(path, "X_train.npy"), mmap_mode="r")
+        self.y_train = np.load(os.path.join(path, "y_train.npy"))
+        self.X_test = np.load(os.path.join(path, "X_test.npy"), mmap_mode="r")
+        self.y_test = np.load(os.path.join(path, "y_test.npy"))
+
+    def label_encoder(self):
+        """Returns a LabelEncoder over the diseases the store was built with."""
+        from sklearn.preprocessing import LabelEncoder
+
+        encoder = LabelEncoder()
+        encoder.classes_ = self.classes
+        return encoder
+
+
+def _store_key(data_path, *params):
+    st = os.stat(data_path)
+    key = "|".join([os.path.abspath(data_path), str(st.st_mtime_ns), str(st.st_size)] + [str(p) for p in params])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def _finish_store(path, y_train, y_test, meta):
+    np.save(os.path.join(path, "y_train.npy"), y_train)
+    np.save(os.path.join(path, "y_test.npy"), y_test)
+    # meta.json is written last; its presence marks the store as complete
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return FeatureStore(path)
+
+
+def build_feature_store(data_path=DATA_PATH, cache_dir=CACHE_DIR, test_size=TEST_SIZE, seed=SEED,
+                        min_samples=MIN_SAMPLES_PER_DISEASE, chunksize=20000):
+    """
+    Converts the dataset CSV into memory-mapped train/test feature matrices, once.
+
+    A first pass reads only the ``diseases`` column to drop rare diseases and
+    draw the stratified split. A second pass streams the symptom columns in
+    chunks and writes each row straight to its slot in the train or test
+    array, so the full int64 DataFrame is never materialized. The result is
+    cached by the CSV's path, size and mtime and reused on later runs.
+
+    Returns:
+        A FeatureStore.
+    """
+    from sklearn.model_selection import train_test_split
+
+    path = os.path.join(cache_dir, _store_key(data_path, test_size, seed, min_samples))
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return FeatureStore(path)
+    os.makedirs(path, exist_ok=True)
+
+    header = pd.read_csv(data_path, nrows=0).columns.tolist()
+    symptom_names = [c for c in header if c != "diseases"]
+    diseases = pd.read_csv(data_path, usecols=["diseases"])["diseases"]
+
+    counts = diseases.value_counts()
+    keep = diseases.isin(counts[counts >= min_samples].index).to_numpy()
+    classes, y = np.unique(diseases[keep].to_numpy(dtype=str), return_inverse=True)
+    rows = np.flatnonzero(keep)
+    train_rows, test_rows = train_test_split(rows, test_size=test_size, random_state=seed, stratify=y)
+    train_rows.sort()
+    test_rows.sort()
+
+    # For every source row: which array it goes to (0 = dropped, 1 = train, 2 = test) and where
+    target = np.zeros(len(diseases), dtype=np.int8)
+    slot = np.zeros(len(diseases), dtype=np.int64)
+    target[train_rows], slot[train_rows] = 1, np.arange(len(train_rows))
+    target[test_rows], slot[test_rows] = 2, np.arange(len(test_rows))
+    label_of = np.full(len(diseases), -1, dtype=np.int64)
+    label_of[rows] = y
+
+    shape = (len(train_rows), len(symptom_names)), (len(test_rows), len(symptom_names))
+    X_train = np.lib.format.open_memmap(os.path.join(path, "X_train.npy"), "w+", FEATURE_DTYPE, shape[0])
+    X_test = np.lib.format.open_memmap(os.path.join(path, "X_test.npy"), "w+", FEATURE_DTYPE, shape[1])
+
+    start = 0
+    dtypes = dict.fromkeys(symptom_names, np.uint8)
+    for chunk in pd.read_csv(data_path, usecols=symptom_names, dtype=dtypes, chunksize=chunksize):
+        values = chunk[symptom_names].to_numpy()
+        part = slice(start, start + len(values))
+        for which, X in ((1, X_train), (2, X_test)):
+            mask = target[part] == which
+            X[slot[part][mask]] = values[mask]
+        start += len(values)
+    X_train.flush()
+    X_test.flush()
+    del X_train, X_test
+
+    return _finish_store(path, label_of[train_rows], label_of[test_rows],
+                         {"source": os.path.abspath(data_path), "symptom_names": symptom_names,
+                          "classes": classes.tolist(), "dropped_rows": int((~keep).sum())})
+
+
+# --- Training ---
+def train_forest(X, y, n_estimators=100, max_depth=None, n_jobs=-1, seed=SEED, feature_names=None):
+    """
+    Fits a RandomForestClassifier on all cores.
+
+    The forest builds its trees on threads that all read the same ``X``; a
+    C-contiguous float32 memory map passes sklearn's input validation as is,
+    so no worker or conversion copy of the matrix is made. With
+    ``feature_names`` the map is wrapped in a DataFrame (a view, not a copy)
+    so the model records its symptom order in ``feature_names_in_``.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    if feature_names is not None:
+        X = pd.DataFrame(X, columns=list(feature_names), copy=False)
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth,
+                                   random_state=seed, n_jobs=n_jobs)
+    model.fit(X, y)
+    return model
+
+
+def train_augmented(data_path=DATA_PATH, recipe=None, test_size=TEST_SIZE, test_variants=2, epochs=5,
+                    seed=SEED, batch_size=4096, n_jobs=-1):
+    """
+    Trains an incremental logistic model on augmented variants of the dataset's base profiles.
+
+    The distinct (disease, symptom set) rows of ``data_path`` are split into
+    train and test profiles before augmenting, so no variant of a test
+    profile is trained on. ``augment.augment_batches`` streams the training
+    variants in uint8 batches straight into ``SGDClassifier.partial_fit``;
+    each epoch visits the profiles in a new order and draws fresh variants,
+    and nothing is written to disk. The test set is the held-out profiles
+    plus ``test_variants`` variants of each, scored batch by batch.
+
+    Returns:
+        A tuple (model, accuracy, info) where info counts profiles and rows.
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    recipe = recipe or AugmentationRecipe()
+    profiles, labels, classes, symptom_names = load_base_profiles(data_path)
+    train_idx, test_idx = split_profiles(labels, test_size, seed)
+
+    # Every disease has a base profile, so ``classes`` is the label encoder's
+    # disease list and the profile labels are already its indices
+    label_space = np.arange(len(classes))
+    rng = np.random.default_rng(seed)
+    model = SGDClassifier(loss="log_loss", random_state=seed, n_jobs=n_jobs)
+    train_rows = 0
+    for epoch in range(epochs):
+        order = rng.permutation(train_idx)
+        for X, y in augment_batches(profiles[order], labels[order], recipe, batch_size, seed + epoch, len(classes)):
+            model.partial_fit(pd.DataFrame(X, columns=symptom_names), y, classes=label_space)
+            train_rows += len(y)
+
+    test_recipe = AugmentationRecipe(test_variants, recipe.dropout_rate, recipe.add_rate, keep_original=True)
+    hits = test_rows = 0
+    for X, y in augment_batches(profiles[test_idx], labels[test_idx], test_recipe, batch_size, seed + epochs,
+                                len(classes)):
+        hits += int((model.predict(pd.DataFrame(X, columns=symptom_names)) == y).sum())
+        test_rows += len(y)
+
+    info = {"base_profiles": len(profiles), "train_profiles": len(train_idx), "test_profiles": len(test_idx),
+            "train_rows": train_rows, "test_rows": test_rows}
+    return model, hits / max(test_rows, 1), info
+
+
+def save_model(model, model_path):
+    """
+    Saves the model.
+
+    The file is written next to ``model_path`` and then renamed over it, so
+    a server watching the served artifact never loads a half-written model.
+    """
+    tmp_path = f"{model_path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path)
+
+
+def accuracy(model, X, y, chunksize=20000):
+    hits = 0
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for start in range(0, len(y), chunksize):
+            hits += int((model.predict(X[start:start + chunksize]) == y[start:start + chunksize]).sum())
+    return hits / max(len(y), 1)
+
+
+# --- Benchmark ---
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _baseline_run(data_path, params):
+    """The notebook's pipeline: the whole CSV as an int64 DataFrame, then a single-core forest."""
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+
+    df = pd.read_csv(data_path)
+    counts = df["diseases"].value_counts()
+    df = df[df["diseases"].isin(counts[counts >= MIN_SAMPLES_PER_DISEASE].index)]
+    y = LabelEncoder().fit_transform(df["diseases"])
+    X = df.drop("diseases", axis=1)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=SEED, stratify=y)
+    model = train_forest(X_train, y_train, **params)
+    return accuracy(model, X_test, y_test)
+
+
+def _memmap_run(data_path, cache_dir, params):
+    store = build_feature_store(data_path, cache_dir)
+    model = train_forest(store.X_train, store.y_train, **params)
+    return accuracy(model, store.X_test, store.y_test)
+
+
+def _benchmark_child(config):
+    start = time.perf_counter()
+    if config["pipeline"] == "baseline":
+        acc = _baseline_run(config["data_path"], config["params"])
+    else:
+        acc = _memmap_run(config["data_path"], config["cache_dir"], config["params"])
+    print(json.dumps({"wall_s": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb(), "accuracy": acc}))
+
+
+def run_benchmark(data_path, cache_dir, params):
+    """
+    Compares the notebook's training setup with the memory-mapped parallel one.
+
+    Each configuration runs in a fresh subprocess so its peak RSS is measured
+    on its own. The feature store is built before timing starts (it is a
+    one-off cost that later runs reuse) and reported separately.
+
+    Returns:
+        A dict with wall-clock seconds, peak RSS (MB) and test accuracy per configuration.
+    """
+    start = time.perf_counter()
+    build_feature_store(data_path, cache_dir)
+    report = {"feature_store_build_s": time.perf_counter() - start, "cpu_count": os.cpu_count()}
+
+    runs = {
+        "baseline": {"pipeline": "baseline", "params": BASELINE_PARAMS},
+        "memmap_parallel": {"pipeline": "memmap", "params": params},
+    }
+    for name, config in runs.items():
+        config = dict(config, data_path=data_path, cache_dir=cache_dir)
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--_benchmark-child", json.dumps(config)],
+                             capture_output=True, text=True, check=True)
+        report[name] = dict(json.loads(out.stdout.strip().splitlines()[-1]), params=config["params"])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the disease RandomForest on a shared memory-mapped feature matrix.")
+    parser.add_argument("data", nargs="?", default=DATA_PATH)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--n-estimators", type=int, default=BASELINE_PARAMS["n_estimators"])
+    parser.add_argument("--max-depth", type=int, default=BASELINE_PARAMS["max_depth"])
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--augment", action="store_true",
+                        help="Train an incremental logistic model (SGD) on augmented variants of the dataset's "
+                             "distinct profiles, streamed batch by batch instead of the forest.")
+    parser.add_argument("--epochs", type=int, default=5, help="Passes over freshly augmented variants.")
+    parser.add_argument("--variants", type=int, default=10, help="Augmented variants per base profile.")
+    parser.add_argument("--dropout", type=float, default=0.2, help="Probability of dropping each present symptom.")
+    parser.add_argument("--add-rate", type=float, default=1.0, help="Expected symptoms added per variant.")
+    parser.add_argument("--test-variants", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("-o", "--output", default=MODEL_PATH,
+                        help="Model path (default: the artifact the server and GUIs load, replaced atomically).")
+    parser.add_argument("--benchmark", metavar="REPORT", help="Compare against the notebook settings and write a JSON report.")
+    parser.add_argument("--_benchmark-child", dest="benchmark_child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.benchmark_child:
+        _benchmark_child(json.loads(args.benchmark_child))
+        return
+
+    params = {"n_estimators": args.n_estimators, "max_depth": args.max_depth, "n_jobs": args.n_jobs}
+    if args.benchmark:
+        report = run_benchmark(args.data, args.cache_dir, params)
+        with open(args.benchmark, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Feature store built in {report['feature_store_build_s']:.1f}s")
+        for name in ("baseline", "memmap_parallel"):
+            r = report[name]
+            rss = f"{r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] is not None else "n/a"
+            print(f"{name:<16} {r['wall_s']:7.1f}s  peak RSS {rss:>8}  accuracy {r['accuracy']:.4f}")
+        print(f"Report written to {args.benchmark}")
+        return
+
+    if args.augment:
+        recipe = AugmentationRecipe(args.variants, args.dropout, args.add_rate)
+        print("Training on augmented variants of the base profiles...")
+        start = time.perf_counter()
+        model, acc, info = train_augmented(args.data, recipe, test_variants=args.test_variants, epochs=args.epochs,
+                                           seed=args.seed, n_jobs=args.n_jobs)
+        print(f"Model training completed in {time.perf_counter() - start:.1f}s "
+              f"({info['train_rows']} rows from {info['train_profiles']} profiles)")
+        print(f"Accuracy on {info['test_rows']} rows of {info['test_profiles']} held-out profiles: {acc:.4f}")
+    else:
+        print("Building the memory-mapped feature store...")
+        store = build_feature_store(args.data, args.cache_dir, seed=args.seed)
+        print(f"Training on {store.X_train.shape[0]} rows x {store.X_train.shape[1]} symptoms "
+              f"({len(store.classes)} diseases)...")
+        # Fit on the label encoder's indices like the shipped model: the store
+        # drops rare diseases, so its own label codes differ from that encoder
+        from evaluate import store_labels
+
+        to_encoder = store_labels(store, fit_label_encoder(args.data))
+        start = time.perf_counter()
+        model = train_forest(store.X_train, to_encoder[store.y_train], feature_names=store.symptom_names, **params)
+        print(f"Model training completed in {time.perf_counter() - start:.1f}s")
+        print(f"Overall Accuracy: {accuracy(model, store.X_test, to_encoder[store.y_test]):.4f}")
+    save_model(model, args.output)
+    print(f"Model saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
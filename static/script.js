@@ -4,40 +4,158 @@ document.addEventListener('DOMContentLoaded', function() {
     const predictedDiseaseElement = document.getElementById('predicted-disease');
     const confidenceLevelElement = document.getElementById('confidence-level');
     const precautionsElement = document.getElementById('precautions');
+    const top5Element = document.getElementById('top5');
+    const contributionsElement = document.getElementById('contributions');
     const randomQuoteElement = document.getElementById('random-quote');
 
 
-    // Function to fetch and display symptoms
-    function fetchAndDisplaySymptoms() {
+    const symptomSearchInput = document.getElementById('symptom-search');
+    const selectedSymptomsDiv = document.getElementById('selected-symptoms');
+    const selectedSymptoms = new Set();
+    const TYPEAHEAD_LIMIT = 30;
+    let searchTimer = null;
+    let latestQuery = '';
+    let catalog = [];
+
+    // Function to build one checkbox row; keeps the shared selection in sync
+    function createSymptomCheckbox(symptom) {
+        const checkboxDiv = document.createElement('div');
+        const checkbox = document.createElement('input');
+        checkbox.type = 'checkbox';
+        checkbox.id = `symptom-${symptom}`;
+        checkbox.name = 'symptoms';
+        checkbox.value = symptom;
+        checkbox.checked = selectedSymptoms.has(symptom);
+        checkbox.addEventListener('change', () => {
+            if (checkbox.checked) {
+                selectedSymptoms.add(symptom);
+            } else {
+                selectedSymptoms.delete(symptom);
+            }
+            renderSelectedSymptoms();
+        });
+
+        const label = document.createElement('label');
+        label.htmlFor = checkbox.id;
+        label.textContent = symptom;
+
+        checkboxDiv.appendChild(checkbox);
+        checkboxDiv.appendChild(label);
+        return checkboxDiv;
+    }
+
+    // Function to show the currently selected symptoms as removable chips
+    function renderSelectedSymptoms() {
+        selectedSymptomsDiv.innerHTML = '';
+        selectedSymptoms.forEach(symptom => {
+            const chip = document.createElement('button');
+            chip.type = 'button';
+            chip.className = 'symptom-chip';
+            chip.textContent = `${symptom} ✕`;
+            chip.addEventListener('click', () => {
+                selectedSymptoms.delete(symptom);
+                renderSelectedSymptoms();
+                const checkbox = document.getElementById(`symptom-${symptom}`);
+                if (checkbox) {
+                    checkbox.checked = false;
+                }
+            });
+            selectedSymptomsDiv.appendChild(chip);
+        });
+    }
+
+    // Function to load the full symptom catalog once; the browser revalidates it by ETag
+    function loadCatalog() {
         fetch('/symptoms')
-            .then(response => response.json())
-            .then(symptoms => {
-                symptomCheckboxesDiv.innerHTML = ''; // Clear loading message
-
-                // Dynamically generate checkboxes
-                symptoms.forEach(symptom => {
-                    const checkboxDiv = document.createElement('div');
-                    const checkbox = document.createElement('input');
-                    checkbox.type = 'checkbox';
-                    checkbox.id = symptom;
-                    checkbox.name = 'symptoms';
-                    checkbox.value = symptom;
-
-                    const label = document.createElement('label');
-                    label.htmlFor = symptom;
-                    label.textContent = symptom;
-
-                    checkboxDiv.appendChild(checkbox);
-                    checkboxDiv.appendChild(label);
-                    symptomCheckboxesDiv.appendChild(checkboxDiv);
-                });
+            .then(response => response.ok ? response.json() : [])
+            .then(names => {
+                catalog = names;
+            })
+            .catch(error => console.error('Error loading symptom catalog:', error));
+    }
+
+    // Function to find matches in the loaded catalog when the typeahead endpoint is unreachable
+    function searchCatalog(query) {
+        const needle = query.toLowerCase();
+        const matches = catalog.filter(name => name.toLowerCase().includes(needle));
+        return { total: matches.length, results: matches.slice(0, TYPEAHEAD_LIMIT) };
+    }
+
+    // Function to render one page of matching symptoms
+    function renderMatches(page) {
+        symptomCheckboxesDiv.innerHTML = '';
+        if (page.results.length === 0) {
+            symptomCheckboxesDiv.innerHTML = '<p>No matching symptoms.</p>';
+            return;
+        }
+        page.results.forEach(symptom => {
+            symptomCheckboxesDiv.appendChild(createSymptomCheckbox(symptom));
+        });
+        if (page.total > page.results.length) {
+            const more = document.createElement('p');
+            more.textContent = `Showing ${page.results.length} of ${page.total} matches. Keep typing to narrow down.`;
+            symptomCheckboxesDiv.appendChild(more);
+        }
+    }
+
+    // Function to fetch matching symptoms from the server and render only those
+    function fetchAndDisplaySymptoms(query) {
+        latestQuery = query;
+        if (query === '') {
+            symptomCheckboxesDiv.innerHTML = '<p>Start typing to find symptoms.</p>';
+            return;
+        }
+        fetch(`/symptoms?q=${encodeURIComponent(query)}&limit=${TYPEAHEAD_LIMIT}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Request failed (${response.status})`);
+                }
+                return response.json();
+            })
+            .then(page => {
+                if (query === latestQuery) { // otherwise a newer search is in flight
+                    renderMatches(page);
+                }
             })
             .catch(error => {
                 console.error('Error fetching symptoms:', error);
-                symptomCheckboxesDiv.innerHTML = '<p>Error loading symptoms.</p>';
+                if (query !== latestQuery) {
+                    return;
+                }
+                if (catalog.length > 0) {
+                    renderMatches(searchCatalog(query));
+                } else {
+                    symptomCheckboxesDiv.innerHTML = '<p>Error loading symptoms.</p>';
+                }
             });
     }
 
+    symptomSearchInput.addEventListener('input', function() {
+        clearTimeout(searchTimer);
+        const query = symptomSearchInput.value.trim();
+        searchTimer = setTimeout(() => fetchAndDisplaySymptoms(query), 150);
+    });
+
+    // Enter picks a symptom (an exact catalog name, else the first listed match) instead of submitting the form
+    symptomSearchInput.addEventListener('keydown', function(event) {
+        if (event.key !== 'Enter') {
+            return;
+        }
+        event.preventDefault();
+        const typed = symptomSearchInput.value.trim().toLowerCase();
+        const exact = catalog.find(name => name.toLowerCase() === typed);
+        const firstMatch = symptomCheckboxesDiv.querySelector('input[type="checkbox"]:not(:checked)');
+        const symptom = exact || (firstMatch && firstMatch.value);
+        if (!symptom) {
+            return;
+        }
+        selectedSymptoms.add(symptom);
+        renderSelectedSymptoms();
+        clearTimeout(searchTimer);
+        symptomSearchInput.value = '';
+        fetchAndDisplaySymptoms('');
+    });
+
     // Function to fetch and display a random quote
     function fetchAndDisplayQuote() {
         const quotes = [
@@ -77,13 +195,36 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
 
+    // Function to render a titled list of "name: value" lines
+    function renderList(element, title, items) {
+        element.innerHTML = '';
+        if (!items || items.length === 0) {
+            return;
+        }
+        const heading = document.createElement('h4');
+        heading.textContent = title;
+        const list = document.createElement('ul');
+        items.forEach(item => {
+            const li = document.createElement('li');
+            li.textContent = item;
+            list.appendChild(li);
+        });
+        element.appendChild(heading);
+        element.appendChild(list);
+    }
+
+    // Function to format a symptom contribution in the units reported by the server
+    function formatContribution(value, units) {
+        const sign = value >= 0 ? '+' : '';
+        if (units === 'probability') {
+            return `${sign}${(value * 100).toFixed(2)}%`;
+        }
+        return `${sign}${value.toFixed(2)}`;
+    }
+
     // Function to collect selected symptoms
     function getSelectedSymptoms() {
-        const selectedSymptoms = [];
-        symptomCheckboxesDiv.querySelectorAll('input[name="symptoms"]:checked').forEach(checkbox => {
-            selectedSymptoms.push(checkbox.value);
-        });
-        return selectedSymptoms;
+        return Array.from(selectedSymptoms);
     }
 
     // Handle form submission
@@ -101,7 +242,12 @@ document.addEventListener('DOMContentLoaded', function() {
             },
             body: JSON.stringify({ symptoms: selectedSymptoms }),
         })
-        .then(response => response.json())
+        .then(response => response.json().catch(() => ({})).then(data => {
+            if (!response.ok) {
+                throw new Error(data.error || `Request failed (${response.status})`);
+            }
+            return data;
+        }))
         .then(data => {
             console.log("Prediction Results:", data);
             // Display results to the user
@@ -112,17 +258,24 @@ document.addEventListener('DOMContentLoaded', function() {
             } else {
                  confidenceLevelElement.textContent = 'Confidence Level: N/A';
             }
+            renderList(top5Element, 'Top 5 Predicted Diseases:',
+                (data.top5 || []).map(d => `${d.disease}: ${d.confidence.toFixed(2)}%`));
+            renderList(contributionsElement, 'Symptoms that drove this prediction:',
+                (data.contributions || []).map(c => `${c.symptom}: ${formatContribution(c.contribution, data.contribution_units)}`));
             precautionsElement.textContent = `Precautions: ${data.precautions}`;
         })
         .catch(error => {
             console.error('Error during prediction:', error);
-            predictedDiseaseElement.textContent = 'Predicted Disease: Error predicting disease.';
+            predictedDiseaseElement.textContent = `Predicted Disease: ${error.message || 'Error predicting disease.'}`;
             confidenceLevelElement.textContent = 'Confidence Level: N/A';
+            top5Element.innerHTML = '';
+            contributionsElement.innerHTML = '';
             precautionsElement.textContent = 'Precautions: Error fetching precautions.';
         });
     });
 
     // Initial load
-    fetchAndDisplaySymptoms();
+    loadCatalog();
+    fetchAndDisplaySymptoms('');
     fetchAndDisplayQuote();
 });
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The modules in Code/ import each other by flat name, like the scripts do when run from there
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Code"))
+
+SYMPTOMS = ["fever", "cough", "headache", "nausea", "vomiting", "rash", "fatigue", "chest pain"]
+DISEASES = ["flu", "migraine", "food poisoning", "measles"]
+# Symptoms each disease tends to show, by index into SYMPTOMS
+PROFILES = {"flu": [0, 1, 6], "migraine": [2, 3], "food poisoning": [3, 4, 6], "measles": [0, 5, 1]}
+
+
+def make_rows(n_rows=400, seed=0):
+    """Draws noisy binary symptom rows and their disease names from PROFILES."""
+    rng = np.random.default_rng(seed)
+    labels = rng.choice(DISEASES, size=n_rows)
+    X = (rng.random((n_rows, len(SYMPTOMS))) < 0.05).astype(np.float32)
+    for r, disease in enumerate(labels):
+        X[r, PROFILES[disease]] = rng.random(len(PROFILES[disease])) < 0.9
+    return X, labels
+
+
+@pytest.fixture
+def rows():
+    return make_rows()
+
+
+@pytest.fixture
+def dataset_csv(tmp_path):
+    """Writes a small dataset in the layout of cleaned_diseases_and_symptoms.csv."""
+    import pandas as pd
+
+    X, labels = make_rows(600)
+    df = pd.DataFrame(X.astype(np.int64), columns=SYMPTOMS)
+    df.insert(0, "diseases", labels)
+    path = tmp_path / "data.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def fitted_model(dataset_csv, tmp_path):
+    """A LogisticRegression fitted on label-encoder indices, saved like the shipped model."""
+    import joblib
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import LabelEncoder
+
+    df = pd.read_csv(dataset_csv)
+    encoder = LabelEncoder().fit(df["diseases"])
+    model = LogisticRegression(max_iter=500).fit(df[SYMPTOMS].to_numpy(dtype=np.float32),
+                                                 encoder.transform(df["diseases"]))
+    path = tmp_path / "model.joblib"
+    joblib.dump(model, path)
+    return str(path)
@@ -0,0 +1,77 @@
+import sqlite3
+import time
+
+from audit_log import AuditLog, _segments, iter_records
+
+TOP5 = [("flu", 80.0), ("measles", 10.0)]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_rows_survive_rotation_in_write_order(tmp_path):
+    log = AuditLog(str(tmp_path), max_bytes=1, batch_size=4, flush_interval=0.01)
+    for i in range(20):
+        log.record(["fever"], TOP5, "v1", float(i), ts=1000 + i)
+    log.close()
+    assert len(_segments(str(tmp_path))) > 1
+    assert [r["latency_ms"] for r in iter_records(str(tmp_path))] == [float(i) for i in range(20)]
+    assert log.stats()["written"] == 20 and log.stats()["dropped"] == 0
+
+
+class FlakyRotationLog(AuditLog):
+    """Fails to open the next segment a given number of times."""
+
+    failures = 0
+
+    def _open_segment(self, segment):
+        if self.failures and segment > getattr(self, "_segment", segment):
+            self.failures -= 1
+            raise sqlite3.OperationalError("disk full")
+        super()._open_segment(segment)
+
+
+def test_failed_rotation_reopens_the_segment_and_retries(tmp_path):
+    log = FlakyRotationLog(str(tmp_path), max_bytes=1, batch_size=1, flush_interval=0.01)
+    log.failures = 2
+    for i in range(6):
+        log.record(["fever"], TOP5, "v1", 1.0)
+        assert wait_for(lambda: log.stats()["written"] == i + 1)
+    log.close()
+    stats = log.stats()
+    assert stats["written"] == 6 and stats["dropped"] == 0 and stats["errors"] == 2
+    assert len(list(iter_records(str(tmp_path)))) == 6
+    assert len(_segments(str(tmp_path))) > 1
+
+
+def test_failed_batch_counts_its_rows_as_dropped(tmp_path):
+    log = AuditLog(str(tmp_path), batch_size=10, flush_interval=0.01)
+    log.record(["fever"], TOP5, "v1", 1.0)
+    assert wait_for(lambda: log.stats()["written"] == 1)
+
+    # Break the segment under the writer; its next batch fails as a whole
+    other = sqlite3.connect(log.path)
+    other.execute("DROP TABLE predictions")
+    other.commit()
+    other.close()
+    for _ in range(3):
+        log.record(["cough"], TOP5, "v1", 1.0)
+    assert wait_for(lambda: log.stats()["dropped"] == 3)
+
+    # The writer reopens the segment and carries on
+    log.record(["rash"], TOP5, "v1", 1.0)
+    log.close()
+    assert log.stats()["written"] == 2
+    assert [r["symptoms"] for r in iter_records(str(tmp_path))] == [["rash"]]
+
+
+def test_record_after_close_is_dropped(tmp_path):
+    log = AuditLog(str(tmp_path))
+    log.close()
+    assert log.record(["fever"], TOP5, "v1", 1.0) is False
+    assert log.stats()["dropped"] == 1
+    log.close()
@@ -0,0 +1,54 @@
+import numpy as np
+
+from augment import AugmentationRecipe, augment_batches, load_base_profiles, split_profiles
+from conftest import SYMPTOMS
+from inference import load_resources
+from model_registry import validate_model
+from train import main, train_augmented
+
+
+def test_about_add_rate_symptoms_are_added_per_variant():
+    profiles = np.array([[1, 1, 0, 0], [0, 0, 1, 1]], dtype=np.uint8)
+    recipe = AugmentationRecipe(variants_per_profile=5000, dropout_rate=0.0, add_rate=1.0, keep_original=False)
+    X = np.concatenate([X for X, _ in augment_batches(profiles, [0, 0], recipe, seed=0)])
+    added = X.sum(axis=1) - 2
+    assert abs(added.mean() - 1.0) < 0.05
+
+
+def test_variants_keep_their_label_and_are_never_empty():
+    profiles = np.array([[1, 0, 0], [0, 1, 1], [1, 1, 0]], dtype=np.uint8)
+    recipe = AugmentationRecipe(variants_per_profile=50, dropout_rate=0.9, add_rate=0.0)
+    for X, y in augment_batches(profiles, [0, 1, 1], recipe, batch_size=64, seed=1):
+        assert X.any(axis=1).all()
+        assert set(y) <= {0, 1}
+
+
+def test_split_keeps_profiles_apart_and_single_profiles_in_training():
+    labels = np.array([0] * 10 + [1] * 10 + [2])
+    train_idx, test_idx = split_profiles(labels, test_size=0.2, seed=0)
+    assert not set(train_idx) & set(test_idx)
+    assert sorted(np.concatenate([train_idx, test_idx])) == list(range(len(labels)))
+    assert 20 in train_idx
+    assert sorted(set(labels[test_idx])) == [0, 1]
+
+
+def test_augmented_training_streams_into_partial_fit(dataset_csv):
+    profiles, labels, classes, _ = load_base_profiles(dataset_csv)
+    model, accuracy, info = train_augmented(dataset_csv, AugmentationRecipe(3), test_variants=1, epochs=2,
+                                            batch_size=256, n_jobs=1)
+    _, test_idx = split_profiles(labels)
+    assert info["test_profiles"] == len(test_idx)
+    assert info["train_profiles"] + info["test_profiles"] == len(profiles)
+    assert info["train_rows"] == 2 * 4 * info["train_profiles"]
+    assert info["test_rows"] == 2 * info["test_profiles"]
+    assert list(model.feature_names_in_) == SYMPTOMS
+    assert model.classes_.tolist() == list(range(len(classes)))
+    assert accuracy > 0.3
+
+
+def test_augmented_model_is_servable(dataset_csv, tmp_path):
+    output = tmp_path / "model.joblib"
+    main([dataset_csv, "--augment", "--variants", "2", "--epochs", "1", "--n-jobs", "1",
+          "-o", str(output)])
+    model, label_encoder, symptom_names = load_resources(str(output), dataset_csv)
+    validate_model(model, label_encoder, symptom_names)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from conftest import SYMPTOMS
+from contributions import (LinearContributionEngine, TreeContributionEngine, build_contribution_engine,
+                           top_symptom_contributions)
+
+
+@pytest.mark.parametrize("model", [
+    DecisionTreeClassifier(max_depth=6, random_state=0),
+    RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0),
+    ExtraTreesClassifier(n_estimators=10, random_state=0),
+], ids=["decision_tree", "random_forest", "extra_trees"])
+def test_tree_contributions_reproduce_predict_proba(model, rows):
+    X, y = rows
+    model.fit(X, y)
+    engine = build_contribution_engine(model)
+    assert isinstance(engine, TreeContributionEngine)
+
+    contrib, bias, classes = engine.contributions(X[:50])
+    proba = model.predict_proba(X[:50])
+    np.testing.assert_array_equal(classes, proba.argmax(axis=1))
+    np.testing.assert_allclose(bias + contrib.sum(axis=1), proba[np.arange(50), classes], atol=1e-9)
+
+
+def test_tree_contributions_explain_requested_class(rows):
+    X, y = rows
+    model = DecisionTreeClassifier(max_depth=5, random_state=0).fit(X, y)
+    engine = TreeContributionEngine(model)
+    requested = np.zeros(10, dtype=int)
+    contrib, bias, classes = engine.contributions(X[:10], class_indices=requested)
+    np.testing.assert_array_equal(classes, requested)
+    np.testing.assert_allclose(bias + contrib.sum(axis=1), model.predict_proba(X[:10])[:, 0], atol=1e-9)
+
+
+def test_linear_contributions_reproduce_decision_function(rows):
+    X, y = rows
+    model = LogisticRegression(max_iter=500).fit(X, y)
+    engine = build_contribution_engine(model)
+    assert isinstance(engine, LinearContributionEngine)
+
+    contrib, bias, classes = engine.contributions(X[:20])
+    scores = model.decision_function(X[:20])
+    np.testing.assert_allclose(bias + contrib.sum(axis=1), scores[np.arange(20), classes], atol=1e-9)
+
+
+def test_top_contributions_only_report_present_symptoms(rows):
+    X, y = rows
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    row = np.zeros((1, len(SYMPTOMS)), dtype=np.float32)
+    row[0, [0, 1]] = 1
+    drivers = top_symptom_contributions(build_contribution_engine(model), row, SYMPTOMS)[0]
+    assert {name for name, _ in drivers} <= {"fever", "cough"}
+    assert [abs(v) for _, v in drivers] == sorted((abs(v) for _, v in drivers), reverse=True)
+
+
+def test_unsupported_model_has_no_engine():
+    assert build_contribution_engine(None) is None
+    assert build_contribution_engine(object()) is None
+
+
+def test_xgboost_contributions_accept_dataframe_fitted_booster(rows):
+    xgb = pytest.importorskip("xgboost")
+    import pandas as pd
+    from sklearn.preprocessing import LabelEncoder
+
+    X, y = rows
+    encoder = LabelEncoder().fit(y)
+    model = xgb.XGBClassifier(n_estimators=5, max_depth=3).fit(pd.DataFrame(X, columns=SYMPTOMS),
+                                                               encoder.transform(y))
+    contrib, bias, classes = build_contribution_engine(model).contributions(X[:5])
+    margins = model.predict(pd.DataFrame(X[:5], columns=SYMPTOMS), output_margin=True)
+    np.testing.assert_allclose(bias + contrib.sum(axis=1), margins[np.arange(5), classes], rtol=1e-4, atol=1e-4)
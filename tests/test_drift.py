@@ -0,0 +1,77 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from conftest import DISEASES, SYMPTOMS
+from drift import CONFIDENCE_EDGES, DriftBaseline, DriftMonitor
+
+
+def uniform_baseline(version):
+    return DriftBaseline(np.full(len(SYMPTOMS), 0.2), np.full(len(DISEASES), 0.25), np.full(len(DISEASES), 0.25),
+                         np.full(len(CONFIDENCE_EDGES) - 1, 0.1), version)
+
+
+def bundle(version):
+    return SimpleNamespace(model=None, label_encoder=None, symptom_names=SYMPTOMS, version=version)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_scores_compare_live_traffic_with_the_baseline():
+    monitor = DriftMonitor(SYMPTOMS, DISEASES, uniform_baseline("v1"), half_life=10)
+    for _ in range(50):
+        monitor.observe(["fever", "cough"], "flu", 95.0)
+    scores = monitor.scores()
+    assert scores["observed"] == 50
+    assert scores["baseline_model_version"] == "v1"
+    assert scores["predicted_class_js"] > 0.3
+    assert {s["symptom"] for s in scores["top_symptom_shifts"][:2]} == {"fever", "cough"}
+
+
+def test_monitor_is_suspended_until_the_new_baseline_is_ready(monkeypatch):
+    release = threading.Event()
+
+    def slow_baseline(model, label_encoder, symptom_names, data_path, version):
+        release.wait(5)
+        return uniform_baseline(version)
+
+    monkeypatch.setattr("drift.load_or_compute_baseline", slow_baseline)
+    monitor = DriftMonitor(SYMPTOMS, DISEASES, uniform_baseline("v1"), data_path="data.csv")
+    monitor.observe(["fever"], "flu", 90.0)
+
+    monitor.on_model_swap(bundle("v1"), bundle("v2"))
+    monitor.observe(["rash"], "measles", 40.0)
+    assert monitor.scores() == {"observed": 0, "effective_requests": 0.0, "baseline_pending": "v2"}
+
+    release.set()
+    assert wait_for(lambda: monitor.pending_version is None)
+    assert monitor.scores() == {"observed": 0, "effective_requests": 0.0}
+    monitor.observe(["rash"], "measles", 40.0)
+    assert monitor.scores()["baseline_model_version"] == "v2"
+
+
+def test_rebuild_overtaken_by_a_later_swap_is_discarded(monkeypatch):
+    gates = {"v2": threading.Event(), "v3": threading.Event()}
+
+    def gated_baseline(model, label_encoder, symptom_names, data_path, version):
+        gates[version].wait(5)
+        return uniform_baseline(version)
+
+    monkeypatch.setattr("drift.load_or_compute_baseline", gated_baseline)
+    monitor = DriftMonitor(SYMPTOMS, DISEASES, uniform_baseline("v1"), data_path="data.csv")
+    monitor.on_model_swap(bundle("v1"), bundle("v2"))
+    monitor.on_model_swap(bundle("v2"), bundle("v3"))
+
+    gates["v2"].set()
+    time.sleep(0.1)
+    assert monitor.pending_version == "v3"
+    gates["v3"].set()
+    assert wait_for(lambda: monitor.pending_version is None)
+    assert monitor.baseline.model_version == "v3"
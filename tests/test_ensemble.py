@@ -0,0 +1,171 @@
+import json
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pytest
+
+from conftest import DISEASES, make_rows
+from ensemble import EnsembleMember, EnsembleModel, load_ensemble, manifest_member_paths
+from inference import load_resources
+
+
+class FakeModel:
+    """Returns fixed probabilities after an optional delay, counting its calls."""
+
+    def __init__(self, classes, proba, delay=0.0, fail=False):
+        self.classes_ = np.asarray(classes)
+        self.proba = np.asarray(proba, dtype=float)
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.n_features_in_ = 3
+
+    def predict_proba(self, X):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("broken member")
+        return np.tile(self.proba, (len(X), 1))
+
+
+X = np.zeros((1, 3))
+
+
+def test_weighted_soft_vote_over_union_of_classes():
+    a = EnsembleMember("a", FakeModel([0, 1], [0.2, 0.8]), weight=1.0)
+    b = EnsembleMember("b", FakeModel([1, 2], [0.5, 0.5]), weight=3.0)
+    ensemble = EnsembleModel([a, b])
+    proba, report = ensemble.predict_proba_with_report(X)
+    np.testing.assert_allclose(proba[0], [0.05, 0.575, 0.375])
+    assert ensemble.classes_.tolist() == [0, 1, 2]
+    assert {entry["status"] for entry in report.values()} == {"ok"}
+    assert ensemble.predict(X).tolist() == [1]
+
+
+def test_slow_and_failing_members_are_left_out_of_the_vote():
+    fast = EnsembleMember("fast", FakeModel([0, 1], [0.9, 0.1]), deadline_ms=500)
+    slow = EnsembleMember("slow", FakeModel([0, 1], [0.0, 1.0], delay=0.3), deadline_ms=50)
+    broken = EnsembleMember("broken", FakeModel([0, 1], [0.5, 0.5], fail=True), deadline_ms=500)
+    ensemble = EnsembleModel([fast, slow, broken])
+    proba, report = ensemble.predict_proba_with_report(X)
+    np.testing.assert_allclose(proba[0], [0.9, 0.1])
+    assert report["slow"]["status"] == "timeout"
+    assert report["broken"]["status"] == "error"
+    stats = ensemble.stats()
+    assert stats["slow"]["timeouts"] == 1 and stats["broken"]["errors"] == 1
+
+
+def test_late_fallback_when_every_member_misses_its_deadline():
+    only = EnsembleMember("only", FakeModel([0, 1], [0.3, 0.7], delay=0.1), deadline_ms=10)
+    proba, report = EnsembleModel([only]).predict_proba_with_report(X)
+    np.testing.assert_allclose(proba[0], [0.3, 0.7])
+    assert report["only"]["status"] == "late"
+
+
+def test_late_fallback_gives_up_after_the_overall_timeout():
+    slow = EnsembleMember("slow", FakeModel([0, 1], [0.3, 0.7], delay=0.5), deadline_ms=10)
+    slower = EnsembleMember("slower", FakeModel([0, 1], [0.3, 0.7], delay=0.6), deadline_ms=20)
+    ensemble = EnsembleModel([slow, slower], timeout_ms=100)
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError, match="within 100 ms"):
+        ensemble.predict_proba(X)
+    assert time.perf_counter() - start < 0.4
+    assert ensemble.stats()["slow"]["timeouts"] == 1
+
+
+def test_queued_calls_of_timed_out_member_are_cancelled():
+    slow_model = FakeModel([0, 1], [0.0, 1.0], delay=0.3)
+    fast = EnsembleMember("fast", FakeModel([0, 1], [1.0, 0.0]), deadline_ms=1000)
+    slow = EnsembleMember("slow", slow_model, deadline_ms=20)
+    # One worker per member: the second concurrent call of "slow" has to queue and is cancelled
+    ensemble = EnsembleModel([fast, slow], concurrency=1)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        reports = [f.result()[1] for f in [pool.submit(ensemble.predict_proba_with_report, X) for _ in range(2)]]
+    assert all(r["slow"]["status"] == "timeout" for r in reports)
+    time.sleep(0.5)
+    assert slow_model.calls == 1
+
+
+def test_slow_member_does_not_delay_other_members_under_load():
+    fast = EnsembleMember("fast", FakeModel([0, 1], [1.0, 0.0], delay=0.01), deadline_ms=150)
+    slow = EnsembleMember("slow", FakeModel([0, 1], [0.0, 1.0], delay=0.5), deadline_ms=30)
+    ensemble = EnsembleModel([fast, slow], concurrency=8)
+    barrier = threading.Barrier(8)
+
+    def request():
+        barrier.wait()
+        return ensemble.predict_proba_with_report(X)[1]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        reports = list(pool.map(lambda _: request(), range(8)))
+    # Queueing behind the slow member's calls would make the fast member miss its deadline too
+    assert all(r["fast"]["status"] == "ok" for r in reports)
+
+
+def test_ensemble_pickles_without_executors():
+    member = EnsembleMember("a", FakeModel([0, 1], [0.4, 0.6]))
+    ensemble = EnsembleModel([member], concurrency=2)
+    ensemble.predict_proba(X)
+    restored = pickle.loads(pickle.dumps(ensemble))
+    np.testing.assert_allclose(restored.predict_proba(X)[0], [0.4, 0.6])
+    assert restored.concurrency == 2
+
+
+def test_load_ensemble_from_manifest(tmp_path):
+    joblib.dump(FakeModel([0, 1], [0.2, 0.8]), tmp_path / "a.joblib")
+    joblib.dump(FakeModel([0, 1], [0.6, 0.4]), tmp_path / "b.joblib")
+    manifest = {"deadline_ms": 100, "concurrency": 3,
+                "members": [{"name": "a", "path": "a.joblib"},
+                            {"name": "b", "path": "b.joblib", "weight": 3.0, "deadline_ms": 50}]}
+    path = tmp_path / "ensemble.json"
+    path.write_text(json.dumps(manifest))
+
+    ensemble = load_ensemble(str(path))
+    assert ensemble.concurrency == 3
+    assert [(m.name, m.weight, m.deadline_ms) for m in ensemble.members] == [("a", 1.0, 100.0), ("b", 3.0, 50.0)]
+    np.testing.assert_allclose(ensemble.predict_proba(X)[0], [0.5, 0.5])
+    assert manifest_member_paths(str(path)) == [str(tmp_path / "a.joblib"), str(tmp_path / "b.joblib")]
+
+
+def test_members_must_share_feature_count():
+    a = FakeModel([0, 1], [0.5, 0.5])
+    b = FakeModel([0, 1], [0.5, 0.5])
+    b.n_features_in_ = 4
+    with pytest.raises(ValueError, match="feature counts"):
+        EnsembleModel([EnsembleMember("a", a), EnsembleMember("b", b)])
+
+
+def test_members_with_encoded_and_name_labels_vote_together(dataset_csv, tmp_path):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import LabelEncoder
+
+    X_train, labels = make_rows(600)
+    encoded = LogisticRegression(max_iter=500).fit(X_train, LabelEncoder().fit_transform(labels))
+    named = LogisticRegression(max_iter=500).fit(X_train, labels)
+    joblib.dump(encoded, tmp_path / "encoded.joblib")
+    joblib.dump(named, tmp_path / "named.joblib")
+    manifest = {"members": [{"name": "encoded", "path": "encoded.joblib"},
+                            {"name": "named", "path": "named.joblib", "deadline_ms": 1000}]}
+    path = tmp_path / "ensemble.json"
+    path.write_text(json.dumps(manifest))
+
+    ensemble, label_encoder, _ = load_resources(str(path), dataset_csv)
+    assert ensemble.classes_.tolist() == list(range(len(DISEASES)))
+    expected = (encoded.predict_proba(X_train[:5]) + named.predict_proba(X_train[:5])) / 2
+    np.testing.assert_allclose(ensemble.predict_proba(X_train[:5]), expected)
+
+
+def test_members_must_fit_the_label_encoder():
+    a = EnsembleMember("a", FakeModel([0, 1], [0.5, 0.5]))
+    b = EnsembleMember("b", FakeModel(["flu", "mumps"], [0.5, 0.5]))
+    with pytest.raises(ValueError, match="mix encoded"):
+        EnsembleModel([a, b])
+    with pytest.raises(ValueError, match="member 'b'.*mumps"):
+        EnsembleModel([a, b], label_names=["flu", "measles"])
+    with pytest.raises(ValueError, match="member 'a'"):
+        EnsembleModel([a], label_names=["flu"])
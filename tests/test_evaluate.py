@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from conftest import SYMPTOMS
+from ensemble import EnsembleMember, EnsembleModel
+from evaluate import cross_validate, evaluate_held_out, evaluate_streaming
+from inference import load_resources
+
+
+def test_models_with_string_classes_score_like_index_models(fitted_model, dataset_csv):
+    model, label_encoder, symptom_names = load_resources(fitted_model, dataset_csv)
+    df = pd.read_csv(dataset_csv)
+    by_name = LogisticRegression(max_iter=500).fit(df[SYMPTOMS].to_numpy(dtype=np.float32), df["diseases"])
+
+    by_index = evaluate_streaming(model, label_encoder, symptom_names, dataset_csv, chunksize=100, workers=2)
+    named = evaluate_streaming(by_name, label_encoder, symptom_names, dataset_csv, chunksize=100, workers=2)
+    assert named["samples"] == by_index["samples"] == len(df)
+    assert named["accuracy"] == by_index["accuracy"] > 0.5
+    assert named["top_k_accuracy"] == by_index["top_k_accuracy"]
+    assert named["per_class"].keys() == by_index["per_class"].keys()
+
+
+def test_default_evaluation_uses_the_held_out_split(fitted_model, dataset_csv, tmp_path):
+    model, label_encoder, symptom_names = load_resources(fitted_model, dataset_csv)
+    report = evaluate_held_out(model, label_encoder, symptom_names, dataset_csv, str(tmp_path / "cache"),
+                               chunksize=50)
+    assert report["samples"] == 120  # the 20% test split of 600 rows
+    assert report["top_k_accuracy"]["top_5"] == 1.0
+
+
+def test_cross_validation_clones_an_ensemble(fitted_model, dataset_csv, tmp_path):
+    model, label_encoder, symptom_names = load_resources(fitted_model, dataset_csv)
+    ensemble = EnsembleModel([EnsembleMember("lr", model, weight=2.0, deadline_ms=1000),
+                              EnsembleMember("tree", DecisionTreeClassifier(max_depth=4).fit(
+                                  np.eye(len(SYMPTOMS)), np.arange(len(SYMPTOMS)) % 4), deadline_ms=1000)],
+                             concurrency=2)
+    cache_dir = tmp_path / "cache"
+    report = cross_validate(ensemble, label_encoder, symptom_names, dataset_csv, folds=3, n_jobs=1,
+                            chunksize=64, cache_dir=str(cache_dir))
+    assert len(report["folds"]) == 3
+    assert report["pooled"]["samples"] == 480  # the training split only
+    assert report["pooled"]["accuracy"] > 0.5
+    # Per-fold training matrices are removed after fitting
+    assert not [name for name in os.listdir(cache_dir) if name.startswith("cv-")]
+
+
+def test_cross_validation_folds_run_in_worker_processes(fitted_model, dataset_csv, tmp_path):
+    model, label_encoder, symptom_names = load_resources(fitted_model, dataset_csv)
+    report = cross_validate(model, label_encoder, symptom_names, dataset_csv, folds=2, n_jobs=2,
+                            cache_dir=str(tmp_path / "cache"))
+    assert [fold["samples"] for fold in report["folds"]] == [240, 240]
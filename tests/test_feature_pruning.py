@@ -0,0 +1,85 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from conftest import SYMPTOMS, make_rows
+from ensemble import EnsembleMember, EnsembleModel
+from feature_pruning import compact_model, load_eval_rows, main, select_features
+from inference import load_resources
+
+# Symptoms that never occur in the training rows below, so no model can use them
+UNUSED = [5, 7]
+
+
+@pytest.fixture
+def training_rows():
+    X, labels = make_rows(500, seed=3)
+    X[:, UNUSED] = 0
+    return X, labels
+
+
+@pytest.mark.parametrize("model", [
+    DecisionTreeClassifier(random_state=0),
+    RandomForestClassifier(n_estimators=10, random_state=0),
+    LogisticRegression(max_iter=500),
+])
+def test_compacted_model_predicts_exactly_like_the_full_one(model, training_rows):
+    X, labels = training_rows
+    model.fit(X, labels)
+    feature_map = select_features(model, SYMPTOMS)
+    assert set(UNUSED) <= {SYMPTOMS.index(name) for name in feature_map.pruned}
+
+    compact = compact_model(model, feature_map)
+    X_eval, _ = make_rows(200, seed=4)
+    np.testing.assert_array_equal(compact.predict_proba(feature_map.transform(X_eval)), model.predict_proba(X_eval))
+    assert list(compact.feature_names_in_) == feature_map.names
+
+
+def test_ensemble_members_are_compacted_together(training_rows):
+    X, labels = training_rows
+    members = [EnsembleMember("tree", DecisionTreeClassifier(random_state=0).fit(X, labels), deadline_ms=1000),
+               EnsembleMember("forest", RandomForestClassifier(n_estimators=5, random_state=0).fit(X, labels),
+                              deadline_ms=1000)]
+    ensemble = EnsembleModel(members, concurrency=2)
+    feature_map = select_features(ensemble, SYMPTOMS)
+    compact = compact_model(ensemble, feature_map)
+    assert compact.concurrency == 2
+    np.testing.assert_allclose(compact.predict_proba(feature_map.transform(X)), ensemble.predict_proba(X))
+
+
+def test_tree_using_a_pruned_symptom_is_not_compacted(rows):
+    X, labels = rows
+    model = DecisionTreeClassifier(random_state=0).fit(X, labels)
+    feature_map = select_features(model, SYMPTOMS, counts=np.arange(len(SYMPTOMS)), min_count=3)
+    with pytest.raises(ValueError, match="refit"):
+        compact_model(model, feature_map)
+
+
+def test_eval_rows_are_a_bounded_reproducible_sample(fitted_model, dataset_csv):
+    _, label_encoder, _ = load_resources(fitted_model, dataset_csv)
+    X, y = load_eval_rows(dataset_csv, SYMPTOMS, label_encoder, max_rows=100, chunksize=64)
+    assert X.shape == (100, len(SYMPTOMS)) and len(y) == 100
+    X_again, y_again = load_eval_rows(dataset_csv, SYMPTOMS, label_encoder, max_rows=100, chunksize=200)
+    np.testing.assert_array_equal(y, y_again)
+    np.testing.assert_array_equal(X, X_again)
+
+
+def test_refit_uses_the_whole_training_split(dataset_csv, tmp_path):
+    from sklearn.preprocessing import LabelEncoder
+
+    X, labels = make_rows(600)  # the rows of dataset_csv
+    X[:, UNUSED] = 0
+    model_path = tmp_path / "tree.joblib"
+    joblib.dump(DecisionTreeClassifier(random_state=0).fit(X, LabelEncoder().fit_transform(labels)), model_path)
+
+    output = tmp_path / "compact.joblib"
+    main(["--model", str(model_path), "--data", dataset_csv, "--refit", "--cache-dir", str(tmp_path / "cache"),
+          "-o", str(output), "--report", str(tmp_path / "report.json")])
+    compact, _, symptom_names = load_resources(str(output), dataset_csv)
+    assert not (tmp_path / "compact.features.json").exists()
+    assert not {SYMPTOMS[i] for i in UNUSED} & set(symptom_names)
+    # Fitted on the 80% training split of all 600 rows
+    assert compact.tree_.n_node_samples[0] == 480
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from sklearn.svm import LinearSVC
+
+from conftest import PROFILES, SYMPTOMS, make_rows
+from inference import load_gui_resources, predict_symptom_values
+
+
+def flu_symptoms():
+    return [1 if i in PROFILES["flu"] else 0 for i in range(len(SYMPTOMS))]
+
+
+def test_gui_resources_load_an_ensemble_manifest(fitted_model, dataset_csv, tmp_path):
+    path = tmp_path / "ensemble.json"
+    path.write_text(json.dumps({"members": [{"name": "a", "path": fitted_model},
+                                            {"name": "b", "path": fitted_model}]}))
+    model, label_encoder, symptom_names = load_gui_resources(SYMPTOMS, str(path), dataset_csv)
+    assert symptom_names == SYMPTOMS
+    predicted, confidences = predict_symptom_values(model, label_encoder, flu_symptoms())
+    assert predicted == "flu" and confidences[predicted] == max(confidences.values())
+
+
+def test_gui_resources_must_match_the_checkboxes(fitted_model, dataset_csv):
+    with pytest.raises(ValueError, match="different symptoms"):
+        load_gui_resources(SYMPTOMS[:-1], fitted_model, dataset_csv)
+
+
+def test_prediction_without_probabilities(fitted_model, dataset_csv):
+    _, label_encoder, _ = load_gui_resources(None, fitted_model, dataset_csv)
+    X, labels = make_rows()
+    model = LinearSVC().fit(X, label_encoder.transform(labels))
+    assert predict_symptom_values(model, label_encoder, flu_symptoms()) == ("flu", {"flu": 100.0})
+
+
+def test_failing_probabilities_still_return_the_prediction(fitted_model, dataset_csv, monkeypatch):
+    model, label_encoder, _ = load_gui_resources(None, fitted_model, dataset_csv)
+
+    def broken_predict_proba(X):
+        raise ValueError("broken")
+
+    monkeypatch.setattr(model, "predict_proba", broken_predict_proba)
+    assert predict_symptom_values(model, label_encoder, flu_symptoms()) == ("flu", None)
@@ -0,0 +1,133 @@
+import os
+import socket
+import stat
+import threading
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from conftest import SYMPTOMS, make_rows
+from daemon_client import DAEMON_ERRORS, DaemonClient, connect_daemon, recv_frame, send_frame
+from inference_daemon import InferenceDaemon, WarmPredictor, _remove_stale_socket, main
+from model_registry import ModelRegistry, file_version
+
+
+def start_daemon(path, model_path, data_path):
+    server = InferenceDaemon(path, WarmPredictor(ModelRegistry.from_path(model_path, data_path)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_daemon(server, path):
+    server.shutdown()
+    server.server_close()
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def restart_daemon(server, client, path, model_path, data_path):
+    """Replaces the daemon at ``path``; the client's connection dies with the old one."""
+    stop_daemon(server, path)
+    client._sock.shutdown(socket.SHUT_RDWR)
+    return start_daemon(path, model_path, data_path)
+
+
+@pytest.fixture
+def daemon_socket(fitted_model, dataset_csv, tmp_path):
+    path = str(tmp_path / "d.sock")
+    server = start_daemon(path, fitted_model, dataset_csv)
+    yield path
+    stop_daemon(server, path)
+
+
+def test_socket_is_owner_only(daemon_socket):
+    assert stat.S_IMODE(os.stat(daemon_socket).st_mode) & 0o077 == 0
+
+
+def test_hello_and_top_k_prediction(daemon_socket):
+    client = DaemonClient(daemon_socket)
+    assert client.symptom_names == SYMPTOMS
+    symptoms = [1 if name in ("fever", "cough", "fatigue") else 0 for name in SYMPTOMS]
+    predicted, confidences = client.predict_disease(symptoms, top_k=2)
+    assert len(confidences) == 2
+    assert predicted == "flu" and confidences[predicted] == max(confidences.values())
+    assert all(name in SYMPTOMS for name, _ in client.last_contributions(symptoms))
+    client.close()
+
+
+def test_unknown_opcode_is_answered_with_an_error(daemon_socket):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(daemon_socket)
+    send_frame(sock, bytes([99]))
+    assert b"unknown opcode" in recv_frame(sock)
+    sock.close()
+
+
+def test_live_socket_is_not_replaced(daemon_socket):
+    with pytest.raises(RuntimeError, match="already listening"):
+        _remove_stale_socket(daemon_socket)
+
+
+def test_dead_daemon_raises_a_daemon_error(fitted_model, dataset_csv, tmp_path):
+    path = str(tmp_path / "d.sock")
+    server = start_daemon(path, fitted_model, dataset_csv)
+    client = connect_daemon(path)
+    stop_daemon(server, path)
+    # The handler thread dies with the daemon process; drop its connection too
+    client._sock.shutdown(socket.SHUT_RDWR)
+    with pytest.raises(DAEMON_ERRORS):
+        client.predict_disease([1] + [0] * (len(SYMPTOMS) - 1), top_k=5)
+    assert connect_daemon(path) is None
+
+
+def test_reconnect_repeats_the_handshake(fitted_model, dataset_csv, tmp_path):
+    path = str(tmp_path / "d.sock")
+    server = start_daemon(path, fitted_model, dataset_csv)
+    client = connect_daemon(path)
+    symptoms = [1, 1] + [0] * (len(SYMPTOMS) - 2)
+    expected = client.predict_disease(symptoms, top_k=5)
+
+    # Same vocabulary, new model file: the client follows the new version
+    retrained = str(tmp_path / "retrained.joblib")
+    joblib.dump(joblib.load(fitted_model), retrained)
+    with open(retrained, "ab") as f:
+        f.write(b"\0")
+    server = restart_daemon(server, client, path, retrained, dataset_csv)
+    assert client.predict_disease(symptoms, top_k=5) == expected
+    assert client.model_version == file_version(retrained) != file_version(fitted_model)
+
+    # A model over fewer symptoms would read the client's indices against another list
+    X, labels = make_rows(200)
+    compact = str(tmp_path / "compact.joblib")
+    joblib.dump(LogisticRegression(max_iter=500).fit(pd.DataFrame(X[:, 1:], columns=SYMPTOMS[1:]), labels), compact)
+    server = restart_daemon(server, client, path, compact, dataset_csv)
+    with pytest.raises(ConnectionError, match="different symptom or disease list"):
+        client.predict_disease(symptoms, top_k=5)
+    stop_daemon(server, path)
+
+
+def test_main_runs_off_the_main_thread(fitted_model, dataset_csv, tmp_path, monkeypatch):
+    monkeypatch.setenv("AUDIT_LOG_DIR", "")
+    path = str(tmp_path / "d.sock")
+    errors = []
+
+    def run():
+        try:
+            main(["--socket", path, "--model", fitted_model, "--data", dataset_csv])
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    client = None
+    for _ in range(500):
+        if errors or os.path.exists(path):
+            client = connect_daemon(path)
+            if errors or client is not None:
+                break
+        thread.join(0.01)
+    assert not errors and client is not None
+    assert client.symptom_names == SYMPTOMS
+    client.close()
@@ -0,0 +1,63 @@
+import json
+
+import pandas as pd
+
+from conftest import SYMPTOMS
+from inference import load_resources
+from loadtest import build_workload, realistic_symptom_sets, run_load, start_local_server, summarize
+
+
+def test_profiles_are_named_by_dataset_columns(dataset_csv):
+    columns = [c for c in pd.read_csv(dataset_csv, nrows=0).columns if c != "diseases"]
+    # A server vocabulary in a different order and pruned to a subset
+    served = list(reversed(SYMPTOMS))[:4]
+    df = pd.read_csv(dataset_csv)
+    for profile in realistic_symptom_sets(served, dataset_csv, n_profiles=200):
+        assert profile
+        assert set(profile) <= set(columns)
+        # Every symptom named in a profile is present in some dataset row together with the others
+        assert (df[profile] > 0).all(axis=1).any()
+
+
+def test_profiles_fall_back_to_vocabulary_without_dataset():
+    for profile in realistic_symptom_sets(SYMPTOMS, None, n_profiles=50):
+        assert set(profile) <= set(SYMPTOMS)
+
+
+def test_workload_is_deterministic_per_seed(dataset_csv):
+    assert build_workload(SYMPTOMS, 100, data_path=dataset_csv, seed=7) == \
+        build_workload(SYMPTOMS, 100, data_path=dataset_csv, seed=7)
+
+
+
+def test_typeahead_handles_one_letter_symptoms():
+    workload = build_workload(SYMPTOMS + ["a"], 200, mix={"typeahead": 1.0})
+    assert "/symptoms?q=a" in {path for _, _, path, _ in workload}
+
+
+class CountingModel:
+    """Wraps a model and counts predict_proba calls."""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        return self.model.predict_proba(X)
+
+
+def test_bust_cache_runs_inference_for_repeated_profiles(fitted_model, dataset_csv, monkeypatch):
+    model, label_encoder, symptom_names = load_resources(fitted_model, dataset_csv)
+    counting = CountingModel(model)
+    monkeypatch.setattr("loadtest.load_resources", lambda *args: (counting, label_encoder, symptom_names))
+    base_url, server = start_local_server(fitted_model, dataset_csv, workers=2, prediction_cache_size=64)
+    try:
+        body = json.dumps({"symptoms": ["fever", "cough"]}).encode("utf-8")
+        workload = [("POST /predict", "POST", "/predict", body)] * 20
+        samples, elapsed = run_load(base_url, workload, concurrency=2, bust_cache=True)
+    finally:
+        server.shutdown()
+    assert summarize(samples, elapsed)["all"]["errors"] == 0
+    assert counting.calls == 20
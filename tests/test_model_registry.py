@@ -0,0 +1,90 @@
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from conftest import SYMPTOMS, make_rows
+from model_registry import ModelRegistry, validate_model
+
+
+@pytest.fixture
+def registry(fitted_model, dataset_csv):
+    return ModelRegistry.from_path(fitted_model, dataset_csv, poll_interval=0.05)
+
+
+def retrain(registry, path, **kwargs):
+    """Writes a differently fitted model of the same vocabulary to ``path``."""
+    X, labels = make_rows(300, seed=1)
+    model = DecisionTreeClassifier(random_state=0, **kwargs).fit(X, registry.current.label_encoder.transform(labels))
+    joblib.dump(model, path)
+    return model
+
+
+def test_reload_swaps_bundle_and_notifies_listeners(registry, fitted_model):
+    swaps = []
+    registry.add_listener(lambda old, new: swaps.append((old.version, new.version)))
+    old = registry.current
+    assert registry.reload() is False  # unchanged content
+
+    retrain(registry, fitted_model)
+    assert registry.reload() is True
+    new = registry.current
+    assert new is not old and new.version != old.version
+    assert swaps == [(old.version, new.version)]
+    assert new.symptom_names == old.symptom_names
+    assert new.contribution_engine is not None
+    # Same vocabulary, so browser-cached catalogs stay valid
+    assert new.catalog.etag == old.catalog.etag
+
+
+def test_rejected_model_keeps_serving_old_version(registry, fitted_model):
+    old = registry.current
+    X = np.zeros((10, 3))
+    joblib.dump(LogisticRegression().fit(X, np.arange(10) % 2), fitted_model)
+    assert registry.check_for_update() is False
+    assert registry.current is old
+
+    # A half-written file is rejected too
+    with open(fitted_model, "wb") as f:
+        f.write(b"not a model")
+    os.utime(fitted_model, ns=(1, 1))
+    assert registry.check_for_update() is False
+    assert registry.current is old
+
+
+def test_watcher_picks_up_new_artifact(registry, fitted_model):
+    old = registry.current
+    registry.start_watching()
+    try:
+        retrain(registry, fitted_model, max_depth=3)
+        deadline = time.time() + 5
+        while registry.current is old and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        registry.stop_watching()
+    assert registry.current is not old
+
+
+def test_validate_model_checks_vocabulary_and_classes(registry):
+    bundle = registry.current
+    X, labels = make_rows(200)
+    y = bundle.label_encoder.transform(labels)
+    validate_model(DecisionTreeClassifier().fit(X, y), bundle.label_encoder, bundle.symptom_names)
+
+    with pytest.raises(ValueError, match="features"):
+        validate_model(DecisionTreeClassifier().fit(X[:, :5], y), bundle.label_encoder, bundle.symptom_names)
+    with pytest.raises(ValueError, match="unknown"):
+        validate_model(DecisionTreeClassifier().fit(X, y + 10), bundle.label_encoder, bundle.symptom_names)
+    with pytest.raises(ValueError, match="unknown"):
+        validate_model(DecisionTreeClassifier().fit(X, np.where(y == 0, "not a disease", labels)),
+                       bundle.label_encoder, bundle.symptom_names)
+
+    reordered = list(reversed(SYMPTOMS))
+    with pytest.raises(ValueError, match="Feature order"):
+        validate_model(DecisionTreeClassifier().fit(pd.DataFrame(X[:, ::-1], columns=reordered), y),
+                       bundle.label_encoder, bundle.symptom_names)
@@ -0,0 +1,125 @@
+import pytest
+
+from conftest import SYMPTOMS
+from inference import load_resources
+from server import create_app
+
+
+@pytest.fixture
+def client(fitted_model, dataset_csv):
+    model, label_encoder, symptom_names = load_resources(fitted_model, dataset_csv)
+    app = create_app(model, label_encoder, symptom_names, precaution_provider=lambda disease: "rest")
+    return app.test_client()
+
+
+def test_predict_returns_top5_and_precautions(client):
+    response = client.post("/predict", json={"symptoms": ["fever", "cough", "not a symptom"]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["predicted_disease"] == data["top5"][0]["disease"]
+    assert data["precautions"] == "rest"
+    assert data["unknown_symptoms"] == ["not a symptom"]
+
+
+@pytest.mark.parametrize("payload", [
+    {},
+    {"symptoms": []},
+    {"symptoms": "fever"},
+    {"symptoms": [["fever"]]},
+    {"symptoms": ["fever", 3]},
+    {"symptoms": [{"name": "fever"}]},
+    ["fever"],
+    "fever",
+    3,
+    None,
+])
+def test_predict_rejects_malformed_symptoms(client, payload):
+    response = client.post("/predict", json=payload)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_symptom_catalog_lists_vocabulary(client):
+    response = client.get("/symptoms")
+    assert response.status_code == 200
+    assert response.get_json() == SYMPTOMS
+
+
+def test_catalog_etag_differs_per_content_coding(client):
+    identity = client.get("/symptoms", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/symptoms", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in identity.headers
+    assert identity.headers["ETag"] != gzipped.headers["ETag"]
+    assert gzipped.headers["Vary"] == "Accept-Encoding"
+
+    revalidated = client.get("/symptoms", headers={"Accept-Encoding": "gzip",
+                                                    "If-None-Match": gzipped.headers["ETag"]})
+    assert revalidated.status_code == 304
+    # A validator of the other representation must not match
+    crossed = client.get("/symptoms", headers={"Accept-Encoding": "identity",
+                                               "If-None-Match": gzipped.headers["ETag"]})
+    assert crossed.status_code == 200
+
+
+def test_typeahead_ranks_prefix_matches_first(client):
+    data = client.get("/symptoms?q=c&limit=1").get_json()
+    assert data["total"] == 2
+    assert data["results"] == ["cough"]
+    assert client.get("/symptoms?q=chest p").get_json()["results"] == ["chest pain"]
+
+
+@pytest.fixture
+def ensemble_app(fitted_model, dataset_csv):
+    from ensemble import EnsembleMember, EnsembleModel
+
+    model, label_encoder, symptom_names = load_resources(fitted_model, dataset_csv)
+    ensemble = EnsembleModel([EnsembleMember("a", model), EnsembleMember("b", model)])
+
+    def make(**kwargs):
+        return create_app(ensemble, label_encoder, symptom_names, precaution_provider=lambda disease: "rest",
+                          **kwargs).test_client()
+
+    return make
+
+
+def test_prediction_cache_is_off_by_default(ensemble_app):
+    client = ensemble_app()
+    for _ in range(2):
+        assert client.post("/predict", json={"symptoms": ["fever", "cough"]}).get_json()["ensemble_members"]
+
+
+def test_cached_predictions_drop_per_request_timings(ensemble_app):
+    client = ensemble_app(prediction_cache_size=16)
+
+    first = client.post("/predict", json={"symptoms": ["fever", "cough"]}).get_json()
+    second = client.post("/predict", json={"symptoms": ["cough", "fever"]}).get_json()
+    fresh = client.post("/predict", json={"symptoms": ["fever", "cough"]},
+                        headers={"Cache-Control": "no-cache"}).get_json()
+    assert first["ensemble_members"]
+    assert second["ensemble_members"] is None
+    assert fresh["ensemble_members"]
+    assert second["top5"] == first["top5"]
+
+
+def test_ensemble_without_a_timely_member_answers_503(fitted_model, dataset_csv):
+    import time
+
+    from ensemble import EnsembleMember, EnsembleModel
+
+    model, label_encoder, symptom_names = load_resources(fitted_model, dataset_csv)
+
+    class SlowModel:
+        classes_ = model.classes_
+        n_features_in_ = model.n_features_in_
+
+        def predict_proba(self, X):
+            time.sleep(0.3)
+            return model.predict_proba(X)
+
+    ensemble = EnsembleModel([EnsembleMember("slow", SlowModel(), deadline_ms=10)], timeout_ms=50)
+    client = create_app(ensemble, label_encoder, symptom_names,
+                        precaution_provider=lambda disease: "rest").test_client()
+    response = client.post("/predict", json={"symptoms": ["fever"]})
+    assert response.status_code == 503
+    assert "error" in response.get_json()
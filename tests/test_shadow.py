@@ -0,0 +1,70 @@
+import time
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from conftest import make_rows
+from inference import load_resources
+from server import create_app
+from shadow import ShadowScorer, load_shadow_scorer
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def resources(fitted_model, dataset_csv):
+    return load_resources(fitted_model, dataset_csv)
+
+
+def test_scorer_compares_candidate_with_primary(resources, fitted_model):
+    model, label_encoder, symptom_names = resources
+    scorer = load_shadow_scorer(fitted_model, label_encoder, symptom_names, sample_rate=1.0)
+    try:
+        X = np.zeros((1, len(symptom_names)), dtype=np.float32)
+        X[0, :2] = 1
+        primary = [label_encoder.classes_[i] for i in np.argsort(-model.predict_proba(X)[0])[:5]]
+        assert scorer.submit(X, primary, 0.5)
+        assert wait_for(lambda: scorer.stats()["scored"] == 1)
+        stats = scorer.stats()
+        assert stats["top1_agreement"] == 1.0 and stats["top5_overlap"] == 1.0
+    finally:
+        scorer.stop()
+
+
+def test_scorer_rejects_candidate_with_other_vocabulary(resources, tmp_path):
+    _, label_encoder, symptom_names = resources
+    X, labels = make_rows(100)
+    path = tmp_path / "candidate.joblib"
+    joblib.dump(DecisionTreeClassifier().fit(X[:, :4], label_encoder.transform(labels)), path)
+    with pytest.raises(ValueError):
+        load_shadow_scorer(str(path), label_encoder, symptom_names)
+
+
+def test_sampling_is_independent_of_the_prediction_cache(resources, fitted_model):
+    model, label_encoder, symptom_names = resources
+    scorer = load_shadow_scorer(fitted_model, label_encoder, symptom_names, sample_rate=1.0)
+    try:
+        client = create_app(model, label_encoder, symptom_names, precaution_provider=lambda d: "rest",
+                            shadow=scorer, prediction_cache_size=16).test_client()
+        for _ in range(10):
+            assert client.post("/predict", json={"symptoms": ["fever", "cough"]}).status_code == 200
+        assert scorer.stats()["submitted"] == 10
+        assert wait_for(lambda: scorer.stats()["scored"] == 10)
+    finally:
+        scorer.stop()
+
+
+def test_sample_rate_zero_never_submits():
+    scorer = ShadowScorer(None, [], sample_rate=0.0)
+    try:
+        assert not scorer.submit(np.zeros((1, 3)), ["a"], 1.0)
+        assert scorer.stats()["submitted"] == 0
+    finally:
+        scorer.stop()
@@ -0,0 +1,57 @@
+import pytest
+
+from symptom_parser import SymptomMatcher, tokenize
+
+VOCABULARY = ["decreased appetite", "vomiting", "fever", "headache", "cough", "sore throat",
+              "sharp chest pain", "chills", "paresthesia", "nausea"]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return SymptomMatcher(VOCABULARY)
+
+
+def parse_names(matcher, text):
+    present, negated = matcher.parse(text)
+    return matcher.names(present), matcher.names(negated)
+
+
+@pytest.mark.parametrize("text, present, negated", [
+    # Cue words inside a matched phrase do not negate what follows
+    ("She has no appetite and vomiting", ["decreased appetite", "vomiting"], []),
+    ("I'm not hungry and have a fever", ["decreased appetite", "fever"], []),
+    # Commas and conjunctions end a negation scope
+    ("pain free, headache", ["headache"], []),
+    ("no fever, headache", ["headache"], ["fever"]),
+    ("no fever and headache", ["headache"], ["fever"]),
+    ("no fever but a bad headache", ["headache"], ["fever"]),
+    ("fever and sore throat, no cough", ["fever", "sore throat"], ["cough"]),
+    # "or" keeps the scope open
+    ("denies fever or chills", [], ["fever", "chills"]),
+    # A break word inside a phrase does not end the scope
+    ("no pins and needles or nausea", [], ["paresthesia", "nausea"]),
+    # A later non-negated mention wins
+    ("no fever yesterday. Fever today", ["fever"], []),
+])
+def test_negation_scopes(matcher, text, present, negated):
+    assert parse_names(matcher, text) == (sorted(present, key=VOCABULARY.index),
+                                          sorted(negated, key=VOCABULARY.index))
+
+
+def test_negation_window_is_limited(matcher):
+    assert parse_names(matcher, "no real problems to speak of really just fever") == (["fever"], [])
+
+
+def test_leftmost_longest_match(matcher):
+    assert parse_names(matcher, "sharp chest pain with throwing up") == (["vomiting", "sharp chest pain"], [])
+
+
+def test_tokenize_normalizes_apostrophes_and_punctuation():
+    assert tokenize("I’m NOT hungry, really.") == ["i'm", "not", "hungry", ",", "really", "."]
+
+
+def test_parse_many_builds_csr_rows(matcher):
+    indptr, indices, negated = matcher.parse_many(["fever and cough", "", "no headache"])
+    assert indptr.tolist() == [0, 2, 2, 2]
+    assert matcher.names(indices) == ["fever", "cough"]
+    assert [matcher.names(row) for row in negated] == [[], [], ["headache"]]
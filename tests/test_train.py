@@ -0,0 +1,35 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from conftest import SYMPTOMS
+from inference import load_resources, predict_top_k
+from model_registry import validate_model
+from train import build_feature_store, main, train_forest
+
+
+def test_trained_model_is_servable(dataset_csv, tmp_path):
+    output = tmp_path / "best_disease_model.joblib"
+    main([dataset_csv, "--cache-dir", str(tmp_path / "cache"), "--n-estimators", "5", "--n-jobs", "1",
+          "-o", str(output)])
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["best_disease_model.joblib", "cache", "data.csv"]
+
+    model, label_encoder, symptom_names = load_resources(str(output), dataset_csv)
+    assert symptom_names == SYMPTOMS
+    # Same label convention as the shipped model: the label encoder's indices
+    assert model.classes_.tolist() == list(range(len(label_encoder.classes_)))
+    validate_model(model, label_encoder, symptom_names)
+
+    X = pd.DataFrame(np.eye(len(SYMPTOMS))[:2], columns=SYMPTOMS)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        results, _ = predict_top_k(model, label_encoder, X, k=2)
+    assert all(name in label_encoder.classes_ for row in results for name, _ in row)
+
+
+def test_feature_names_wrap_the_memory_map_without_copying(dataset_csv, tmp_path):
+    store = build_feature_store(dataset_csv, str(tmp_path / "cache"))
+    model = train_forest(store.X_train, store.y_train, n_estimators=2, n_jobs=1, feature_names=store.symptom_names)
+    assert list(model.feature_names_in_) == SYMPTOMS
+    assert np.shares_memory(pd.DataFrame(store.X_train, columns=SYMPTOMS, copy=False).to_numpy(), store.X_train)